@@ -0,0 +1,129 @@
+import os
+from dotenv import load_dotenv
+
+# Load settings from a local .env file if present
+load_dotenv()
+
+def _env_int(name: str, default: int) -> int:
+    """Read an integer setting from the environment"""
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+def _env_bool(name: str, default: bool) -> bool:
+    """Read a true/false setting from the environment"""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+def _env_float(name: str, default: float) -> float:
+    """Read a float setting from the environment"""
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+CPU_COUNT = os.cpu_count() or 1
+
+# Level of the service's own log messages (OCR cascade diagnostics log at DEBUG)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+
+# Bump when OCR or parsing changes so cached results are not reused
+PIPELINE_VERSION = os.getenv("PIPELINE_VERSION", "1")
+
+# OCR worker pool - one process per core by default
+OCR_WORKERS = max(1, _env_int("OCR_WORKERS", CPU_COUNT))
+
+# Requests allowed to wait for a free worker before new ones are rejected
+OCR_QUEUE_SIZE = max(0, _env_int("OCR_QUEUE_SIZE", OCR_WORKERS * 2))
+
+# Largest number of images accepted by the batch endpoint
+BATCH_MAX_FILES = max(1, _env_int("BATCH_MAX_FILES", 500))
+
+# Seconds clients are asked to wait before retrying when the pool is full
+OCR_RETRY_AFTER = max(1, _env_int("OCR_RETRY_AFTER", 5))
+
+# OCR configs evaluated at once when the first cascade candidate is rejected;
+# defaults to the cores left over per worker, but at least 2 on multi-core
+# machines (the fan-out only runs after a miss, so it oversubscribes briefly).
+# 1 turns the fan-out off
+OCR_CANDIDATE_PARALLELISM = max(1, _env_int("OCR_CANDIDATE_PARALLELISM",
+                                            max(min(2, CPU_COUNT), CPU_COUNT // OCR_WORKERS)))
+
+# Threads each tesseract process may use (OMP_THREAD_LIMIT)
+OCR_TESSERACT_THREADS = max(1, _env_int("OCR_TESSERACT_THREADS", 1))
+
+# OCR cascade - stop trying configs once a candidate is confident and reconciles
+OCR_CONFIDENCE_THRESHOLD = _env_float("OCR_CONFIDENCE_THRESHOLD", 0.75)
+
+# Allowed difference between the item sum and the receipt total (fraction of total)
+OCR_RECONCILE_TOLERANCE = _env_float("OCR_RECONCILE_TOLERANCE", 0.02)
+
+# Parsed results cached by image hash - in-memory budget and optional SQLite file
+RESULT_CACHE_MAX_BYTES = max(0, _env_int("RESULT_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+RESULT_CACHE_DB_PATH = os.getenv("RESULT_CACHE_DB_PATH", "")
+
+# Directory for runtime files (the job database); python-backend/data by default
+DATA_DIR = os.getenv("DATA_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data"))
+
+# SQLite file holding background receipt jobs, opened when the service starts
+JOB_DB_PATH = os.getenv("JOB_DB_PATH", os.path.join(DATA_DIR, "receipt_jobs.db"))
+
+# Seconds finished jobs and their results are kept (0 keeps them forever)
+JOB_RETENTION = max(0, _env_int("JOB_RETENTION", 24 * 60 * 60))
+
+# Background jobs and batch images holding pool slots at once, shared by all of
+# them; kept below the pool's capacity so background work leaves queue slots for
+# interactive requests
+JOB_CONCURRENCY = max(1, _env_int("JOB_CONCURRENCY", OCR_WORKERS))
+
+# Longest a job status request may wait for the job to finish (seconds)
+JOB_MAX_WAIT = max(0, _env_int("JOB_MAX_WAIT", 30))
+
+# Image scaling before OCR: 'auto' sizes text to OCR_TARGET_TEXT_HEIGHT pixels,
+# 'fixed' always scales by OCR_FIXED_SCALE (which also caps auto upscaling)
+OCR_SCALE_MODE = os.getenv("OCR_SCALE_MODE", "auto")
+OCR_TARGET_TEXT_HEIGHT = _env_float("OCR_TARGET_TEXT_HEIGHT", 32.0)
+OCR_FIXED_SCALE = _env_float("OCR_FIXED_SCALE", 3.0)
+OCR_MIN_SCALE = _env_float("OCR_MIN_SCALE", 0.25)
+
+# Largest image (in decoded pixels) a worker will take on; bigger JPEGs are
+# decoded at 1/2, 1/4 or 1/8 size, other formats are refused
+OCR_MAX_PIXELS = max(1, _env_int("OCR_MAX_PIXELS", 25_000_000))
+
+# Crop and deskew photos to the receipt paper before preprocessing
+OCR_DETECT_REGION = _env_bool("OCR_DETECT_REGION", True)
+
+# Tall pages are OCR'd as strips of about this many pixels in parallel (0 disables);
+# needs OCR_CANDIDATE_PARALLELISM above 1, since strips read one by one gain nothing
+OCR_TILE_HEIGHT = _env_int("OCR_TILE_HEIGHT", 1600)
+OCR_TILE_OVERLAP = _env_int("OCR_TILE_OVERLAP", 96)
+
+# OCR backend: 'auto' (tesserocr if installed), 'tesserocr' or 'pytesseract'
+OCR_ENGINE = os.getenv("OCR_ENGINE", "auto")
+
+# Item rows that look misread are re-OCR'd one by one before trying other page modes
+OCR_REPAIR_MAX_ROWS = _env_int("OCR_REPAIR_MAX_ROWS", 8)
+OCR_REPAIR_SCALE = _env_float("OCR_REPAIR_SCALE", 2.0)
+
+# Quality gate - clean images (already binary, or sharp, contrasty and straight)
+# skip denoising and contrast enhancement and are read with a single page mode
+OCR_QUALITY_GATE = _env_bool("OCR_QUALITY_GATE", True)
+OCR_FAST_MIN_SHARPNESS = _env_float("OCR_FAST_MIN_SHARPNESS", 500.0)
+OCR_FAST_MIN_CONTRAST = _env_float("OCR_FAST_MIN_CONTRAST", 80.0)
+OCR_FAST_MAX_SKEW = _env_float("OCR_FAST_MAX_SKEW", 1.0)
+
+# Product categories: optional JSON file mapping each category to its keywords,
+# highest priority first; the built-in taxonomy is used when unset
+PRODUCT_TAXONOMY_PATH = os.getenv("PRODUCT_TAXONOMY_PATH", "")
+PRODUCT_CATEGORY_CACHE_SIZE = max(0, _env_int("PRODUCT_CATEGORY_CACHE_SIZE", 4096))
+
+# Product catalog for fuzzy matching of item names: optional CSV/JSON snapshot
+# loaded at startup, and the lowest trigram similarity reported as a match
+PRODUCT_CATALOG_PATH = os.getenv("PRODUCT_CATALOG_PATH", "")
+PRODUCT_MATCH_MIN_SCORE = _env_float("PRODUCT_MATCH_MIN_SCORE", 0.3)
+
+# Largest number of item names matched by one request
+PRODUCT_MATCH_MAX_NAMES = max(1, _env_int("PRODUCT_MATCH_MAX_NAMES", 500))
@@ -1,15 +1,28 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, File, HTTPException, Query, UploadFile
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse, PlainTextResponse, StreamingResponse
+import logging
+import time
 import uvicorn
-from .models.receipt import ReceiptProcessRequest, ReceiptProcessResponse
+from typing import List, Optional, Set
+from .models.product import ProductMatchRequest, ProductMatchResponse, ProductUpsertRequest
+from .models.receipt import JobStatusResponse, ReceiptProcessRequest, ReceiptProcessResponse
+from .services.product_catalog import ProductCatalog
 from .services.receipt_service import ReceiptService
+from .services.worker_pool import PoolFullError
+from .utils.json_encoding import data_fields, ndjson_line, receipt_response
+from .utils.ocr_service import decode_base64
+from . import config
+
+logging.basicConfig(level=config.LOG_LEVEL)
 
 # Create FastAPI app
 app = FastAPI(
     title="Receipt Processing API",
     description="Python backend for processing grocery receipts using OCR and AI",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # Add CORS middleware
@@ -22,7 +35,55 @@ app.add_middleware(
 )
 
 # Initialize services
-receipt_service = ReceiptService()
+receipt_service = ReceiptService.from_config()
+product_catalog = ProductCatalog(min_score=config.PRODUCT_MATCH_MIN_SCORE)
+
+def _busy_error(exc: PoolFullError) -> HTTPException:
+    """Tell clients to back off while the OCR queue is full"""
+    return HTTPException(
+        status_code=503,
+        detail=str(exc),
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+def _selected_fields(fields: Optional[str], include_raw_text: bool) -> Optional[Set[str]]:
+    """Receipt data fields to return, rejecting unknown field names"""
+    try:
+        return data_fields(fields, include_raw_text)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _receipt_response(result: ReceiptProcessResponse, include: Optional[Set[str]]):
+    """Encode a receipt result, timing serialization for the metrics"""
+    started = time.perf_counter()
+    response = receipt_response(result, include)
+    receipt_service.metrics.observe("serialize", time.perf_counter() - started, result)
+    return response
+
+FIELDS_QUERY = Query(None, description="Comma-separated receipt data fields to return, e.g. vendor,total,items")
+RAW_TEXT_QUERY = Query(True, description="Include the OCR text (raw_text) in the receipt data")
+
+def _job_accepted(job_id: str) -> JSONResponse:
+    """202 response pointing clients at the job's status and result endpoints"""
+    return JSONResponse(
+        status_code=202,
+        content={
+            "job_id": job_id,
+            "status_url": f"/api/receipts/jobs/{job_id}",
+            "result_url": f"/api/receipts/jobs/{job_id}/result"
+        }
+    )
+
+@app.on_event("startup")
+async def startup():
+    receipt_service.start()
+    if config.PRODUCT_CATALOG_PATH:
+        count = product_catalog.load(config.PRODUCT_CATALOG_PATH)
+        print(f"Loaded {count} catalog products from {config.PRODUCT_CATALOG_PATH}")
+
+@app.on_event("shutdown")
+async def shutdown():
+    receipt_service.shutdown()
 
 @app.get("/")
 async def root():
@@ -36,28 +97,137 @@ async def health_check():
         "status": "healthy",
         "service": "receipt-processing-api",
         "version": "1.0.0",
-        "supported_stores": receipt_service.get_supported_stores()
+        "supported_stores": receipt_service.get_supported_stores(),
+        "worker_pool": receipt_service.pool.stats() if receipt_service.pool else None,
+        "cache": receipt_service.cache.stats() if receipt_service.cache else None,
+        "catalog_products": len(product_catalog)
     }
 
 @app.post("/api/receipts/process", response_model=ReceiptProcessResponse)
-async def process_receipt(request: ReceiptProcessRequest):
-    """Process a receipt image and extract structured data"""
+async def process_receipt(request: ReceiptProcessRequest,
+                          run_async: bool = Query(False, alias="async"),
+                          fields: Optional[str] = FIELDS_QUERY,
+                          include_raw_text: bool = RAW_TEXT_QUERY):
+    """Process a receipt image and extract structured data.
+    
+    With ?async=true the receipt is queued as a background job and the
+    response (202) only carries the job id. fields and include_raw_text
+    trim the receipt data returned.
+    """
+    include = _selected_fields(fields, include_raw_text)
     try:
         if not request.image_base64:
             raise HTTPException(status_code=400, detail="No image data provided")
         
+        if run_async:
+            return await _submit_job_base64(request.image_base64)
+        
         # Process the receipt
-        result = receipt_service.process_receipt(request.image_base64)
+        result = await receipt_service.process_receipt_async(request.image_base64)
+        
+        if not result.success:
+            raise HTTPException(status_code=422, detail=result.error)
+        
+        return _receipt_response(result, include)
+        
+    except PoolFullError as e:
+        raise _busy_error(e)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+@app.post("/api/receipts/process/upload", response_model=ReceiptProcessResponse)
+async def process_receipt_upload(file: UploadFile = File(...),
+                                 run_async: bool = Query(False, alias="async"),
+                                 fields: Optional[str] = FIELDS_QUERY,
+                                 include_raw_text: bool = RAW_TEXT_QUERY):
+    """Process a receipt uploaded as multipart/form-data, without base64 encoding"""
+    include = _selected_fields(fields, include_raw_text)
+    try:
+        image_bytes = await file.read()
+        if not image_bytes:
+            raise HTTPException(status_code=400, detail="No image data provided")
+        
+        if run_async:
+            return _job_accepted(receipt_service.submit_job(image_bytes))
+        
+        result = await receipt_service.process_image_async(image_bytes)
         
         if not result.success:
             raise HTTPException(status_code=422, detail=result.error)
         
-        return result
+        return _receipt_response(result, include)
         
+    except PoolFullError as e:
+        raise _busy_error(e)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+    finally:
+        await file.close()
+
+@app.post("/api/receipts/process/batch")
+async def process_receipt_batch(files: List[UploadFile] = File(...),
+                                fields: Optional[str] = FIELDS_QUERY,
+                                include_raw_text: bool = RAW_TEXT_QUERY):
+    """Process many receipt images, streaming one NDJSON line per receipt as each finishes"""
+    include = _selected_fields(fields, include_raw_text)
+    if not files:
+        raise HTTPException(status_code=400, detail="No image data provided")
+    if len(files) > config.BATCH_MAX_FILES:
+        raise HTTPException(status_code=413, detail=f"At most {config.BATCH_MAX_FILES} images per batch")
+    
+    images = []
+    for file in files:
+        images.append((file.filename, await file.read()))
+        await file.close()
+    
+    async def stream():
+        async for item in receipt_service.process_batch(images, include):
+            yield ndjson_line(item)
+    
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+async def _submit_job_base64(base64_image: str) -> JSONResponse:
+    try:
+        image_bytes = decode_base64(base64_image)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid image data: {str(e)}")
+    return _job_accepted(receipt_service.submit_job(image_bytes))
+
+@app.post("/api/receipts/jobs", status_code=202)
+async def submit_receipt_job(request: ReceiptProcessRequest):
+    """Queue a receipt for background processing"""
+    if not request.image_base64:
+        raise HTTPException(status_code=400, detail="No image data provided")
+    return await _submit_job_base64(request.image_base64)
+
+@app.get("/api/receipts/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_receipt_job(job_id: str, wait: float = Query(0.0, ge=0)):
+    """Job status and current stage; wait=N long-polls up to N seconds for completion"""
+    job = await receipt_service.get_job(job_id, wait=min(wait, config.JOB_MAX_WAIT))
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.get("/api/receipts/jobs/{job_id}/result", response_model=ReceiptProcessResponse)
+async def get_receipt_job_result(job_id: str,
+                                 fields: Optional[str] = FIELDS_QUERY,
+                                 include_raw_text: bool = RAW_TEXT_QUERY):
+    """Result of a finished job; 202 with the job status while it is still running"""
+    include = _selected_fields(fields, include_raw_text)
+    job = await receipt_service.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    result = receipt_service.get_job_result(job_id)
+    if result is None:
+        return JSONResponse(status_code=202, content=job.model_dump())
+    if not result.success:
+        raise HTTPException(status_code=422, detail=result.error)
+    return _receipt_response(result, include)
 
 @app.post("/api/receipts/test-ocr")
 async def test_ocr(request: ReceiptProcessRequest):
@@ -66,7 +236,7 @@ async def test_ocr(request: ReceiptProcessRequest):
         if not request.image_base64:
             raise HTTPException(status_code=400, detail="No image data provided")
         
-        result = receipt_service.test_ocr(request.image_base64)
+        result = await receipt_service.test_ocr_async(request.image_base64)
         
         if not result["success"]:
             raise HTTPException(status_code=422, detail=result["error"])
@@ -75,9 +245,12 @@ async def test_ocr(request: ReceiptProcessRequest):
             "success": True,
             "text": result["text"],
             "confidence": result["confidence"],
-            "text_length": len(result["text"])
+            "text_length": len(result["text"]),
+            "ocr_stats": result["ocr_stats"]
         }
         
+    except PoolFullError as e:
+        raise _busy_error(e)
     except HTTPException:
         raise
     except Exception as e:
@@ -91,6 +264,40 @@ async def get_supported_stores():
         "count": len(receipt_service.get_supported_stores())
     }
 
+@app.get("/api/receipts/cache-stats")
+async def get_cache_stats():
+    """Result cache hit/miss counters"""
+    if not receipt_service.cache:
+        return {"enabled": False}
+    return {"enabled": True, **receipt_service.cache.stats()}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Stage latency histograms by vendor and OCR config, with cache and queue counters, for Prometheus"""
+    return PlainTextResponse(receipt_service.metrics_text(), media_type="text/plain; version=0.0.4")
+
+@app.post("/api/products/match", response_model=ProductMatchResponse)
+async def match_products(request: ProductMatchRequest):
+    """Best catalog product and similarity score for each item name of a receipt"""
+    if len(request.names) > config.PRODUCT_MATCH_MAX_NAMES:
+        raise HTTPException(status_code=413, detail=f"At most {config.PRODUCT_MATCH_MAX_NAMES} names per request")
+    # About a millisecond per name on a large catalog: keep it off the event loop
+    matches = await run_in_threadpool(product_catalog.match_many, request.names, request.min_score)
+    return ProductMatchResponse(matches=matches)
+
+@app.put("/api/products")
+async def upsert_products(request: ProductUpsertRequest):
+    """Add catalog products or update the ones with the same id"""
+    product_catalog.upsert(request.products)
+    return {"updated": len(request.products), "count": len(product_catalog)}
+
+@app.delete("/api/products/{product_id}")
+async def delete_product(product_id: str):
+    """Remove a product from the catalog"""
+    if not product_catalog.remove(product_id):
+        raise HTTPException(status_code=404, detail="Product not found")
+    return {"deleted": product_id, "count": len(product_catalog)}
+
 @app.exception_handler(404)
 async def not_found_handler(request, exc):
     return JSONResponse(
@@ -0,0 +1,24 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+class CatalogProduct(BaseModel):
+    id: str
+    name: str
+    category: Optional[str] = None
+
+class ProductUpsertRequest(BaseModel):
+    products: List[CatalogProduct]
+
+class ProductMatchRequest(BaseModel):
+    names: List[str]
+    min_score: Optional[float] = None
+
+class ProductMatch(BaseModel):
+    name: str
+    product_id: Optional[str] = None
+    product_name: Optional[str] = None
+    category: Optional[str] = None
+    score: float = 0.0
+
+class ProductMatchResponse(BaseModel):
+    matches: List[ProductMatch]
@@ -9,6 +9,25 @@ class ReceiptItem(BaseModel):
     total_price: float
     category: Optional[str] = "Other"
 
+class OCRStats(BaseModel):
+    engine_calls: int = 0
+    cancelled_calls: int = 0
+    preprocess_calls: int = 0
+    config: Optional[str] = None
+    early_exit: bool = False
+    cache_hit: bool = False
+    scale: Optional[float] = None
+    text_height: Optional[float] = None
+    input_pixels: Optional[int] = None
+    decode_reduction: int = 1
+    ocr_pixels: Optional[int] = None
+    cropped: bool = False
+    tiles: int = 1
+    line_calls: int = 0
+    repaired_rows: int = 0
+    fast_path: bool = False
+    time_saved: Optional[float] = None
+
 class ParsedReceiptData(BaseModel):
     vendor: str
     date: str
@@ -16,6 +35,7 @@ class ParsedReceiptData(BaseModel):
     items: List[ReceiptItem]
     raw_text: Optional[str] = None
     confidence: Optional[float] = None
+    ocr_stats: Optional[OCRStats] = None
 
 class ReceiptProcessRequest(BaseModel):
     image_base64: str
@@ -23,4 +43,12 @@ class ReceiptProcessRequest(BaseModel):
 class ReceiptProcessResponse(BaseModel):
     success: bool
     data: Optional[ParsedReceiptData] = None
-    error: Optional[str] = None
\ No newline at end of file
+    error: Optional[str] = None
+
+class JobStatusResponse(BaseModel):
+    job_id: str
+    status: str
+    stage: str
+    created_at: float
+    updated_at: float
+    error: Optional[str] = None
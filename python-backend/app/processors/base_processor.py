@@ -1,11 +1,20 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from typing import List, Optional, Tuple, Union
 import re
 from datetime import datetime
-from ..models.receipt import ParsedReceiptData, ReceiptItem
+from .records import ItemRecord, ReceiptRecord
+from .product_categorizer import DEFAULT_CATEGORIZER, ProductCategorizer
+from .receipt_document import ReceiptDocument
+from .table_parser import TableParser, TableRow
 
 class BaseReceiptProcessor(ABC):
     
+    # Reads the item table from word boxes; None when the vendor has no table layout
+    table_parser: Optional[TableParser] = None
+    
+    # Keyword automaton for product categories, compiled once and shared
+    categorizer: ProductCategorizer = DEFAULT_CATEGORIZER
+    
     @property
     @abstractmethod
     def name(self) -> str:
@@ -17,35 +26,94 @@ class BaseReceiptProcessor(ABC):
         pass
     
     @abstractmethod
-    def can_process(self, text: str) -> bool:
+    def can_process(self, document: Union[ReceiptDocument, str]) -> bool:
         pass
     
     @abstractmethod
-    def process_receipt(self, text: str, image_data: Optional[bytes] = None) -> ParsedReceiptData:
+    def process_receipt(self, document: Union[ReceiptDocument, str], image_data: Optional[bytes] = None,
+                        words: Optional[dict] = None) -> ReceiptRecord:
+        """Parse OCR text; words are the image_to_data word boxes when available
+        (defaulting to the document's own)"""
         pass
     
-    def categorize_product(self, product_name: str) -> str:
-        """Categorize product based on name"""
-        categories = {
-            'Dairy': ['milk', 'cheese', 'yogurt', 'butter', 'cream', 'paneer', 'curd', 'ghee', 'amul'],
-            'Produce': ['banana', 'apple', 'orange', 'spinach', 'lettuce', 'tomato', 'onion', 'carrot', 'potato', 'mango'],
-            'Meat': ['chicken', 'mutton', 'fish', 'prawns', 'eggs'],
-            'Bakery': ['bread', 'pav', 'bun', 'rusk', 'cake', 'biscuit', 'britannia'],
-            'Grains': ['rice', 'wheat', 'atta', 'flour', 'dal', 'basmati', 'aashirvaad'],
-            'Beverages': ['tea', 'coffee', 'juice', 'water', 'cola', 'tata', 'nescafe'],
-            'Spices': ['turmeric', 'chili', 'coriander', 'cumin', 'garam', 'masala', 'mdh', 'everest'],
-            'Snacks': ['chips', 'namkeen', 'biscuits', 'maggi', 'noodles', 'kurkure'],
-            'Household': ['soap', 'detergent', 'shampoo', 'surf', 'vim', 'lizol'],
-            'Oil': ['oil', 'sunflower', 'coconut', 'mustard', 'fortune', 'saffola']
-        }
+    def _extract_total(self, lines: List[str]) -> float:
+        """Total printed on the receipt, 0.0 if none was found"""
+        return 0.0
+    
+    def items_reconcile(self, parsed: ReceiptRecord, tolerance: float = 0.02,
+                        document: Optional[ReceiptDocument] = None) -> bool:
+        """Check that the extracted item prices add up to the printed total"""
+        if not parsed.items:
+            return False
         
-        lower_name = product_name.lower()
+        document = document or ReceiptDocument.coerce(parsed.raw_text)
+        printed_total = self._extract_total(document.lines)
+        if printed_total <= 0:
+            return False
+        
+        items_total = sum(item.total_price for item in parsed.items)
+        return abs(items_total - printed_total) <= max(1.0, printed_total * tolerance)
+    
+    def table_rows(self, words: dict) -> List[Tuple[TableRow, Optional[ItemRecord]]]:
+        """Item table rows with the item read from each (None when a row could not be read)"""
+        if self.table_parser is None:
+            return []
+        return [(row, self._item_from_row(row)) for row in self.table_parser.parse(words)]
+    
+    def _extract_table_items(self, words: dict) -> List[ItemRecord]:
+        """Extract items in one pass over the item table's word boxes"""
+        items = [item for _, item in self.table_rows(words) if item]
+        print(f"{self.name}: Extracted {len(items)} items from the item table")
+        return items
+    
+    def _item_from_row(self, row: TableRow) -> Optional[ItemRecord]:
+        """Item for one table row"""
+        return None
+    
+    def parse_item_line(self, line: str) -> Optional[ItemRecord]:
+        """Parse a single re-OCR'd item row"""
+        return None
+    
+    def is_suspicious_item(self, item: Optional[ItemRecord]) -> bool:
+        """Whether an item looks misread: missing, qty x rate != value, or a junk name"""
+        if item is None:
+            return True
+        if len(item.name) < 3:
+            return True
+        return abs(item.quantity * item.unit_price - item.total_price) > max(0.05, 0.001 * item.total_price)
+    
+    def _table_item(self, name: str, quantity: Optional[float], unit_price: Optional[float],
+                    total_price: Optional[float]) -> Optional[ItemRecord]:
+        """Build an item from table cells, deriving a missing value from the others"""
+        if total_price is None and unit_price is not None:
+            total_price = unit_price * (quantity or 1.0)
+        if unit_price is None and total_price is not None:
+            unit_price = total_price / quantity if quantity else total_price
+        if not name or not total_price or total_price <= 0 or not unit_price or unit_price <= 0:
+            return None
         
-        for category, keywords in categories.items():
-            if any(keyword in lower_name for keyword in keywords):
-                return category
+        # The value column is what adds up to the total, so trust it over a misread quantity
+        implied_quantity = total_price / unit_price
+        if not quantity or (abs(quantity * unit_price - total_price) > 0.01 * total_price
+                            and abs(implied_quantity - round(implied_quantity)) < 0.01):
+            quantity = round(implied_quantity, 3)
         
-        return 'Other'
+        return ItemRecord(
+            name=name,
+            quantity=quantity,
+            unit_price=unit_price,
+            total_price=total_price
+        )
+    
+    def categorize_product(self, product_name: str) -> str:
+        """Categorize product based on name"""
+        return self.categorizer.categorize(product_name)
+    
+    def categorize_items(self, items: List[ItemRecord]):
+        """Set the category of every item with one batched categorizer call"""
+        categories = self.categorizer.categorize_many([item.name for item in items])
+        for item, category in zip(items, categories):
+            item.category = category
     
     def parse_date(self, date_str: str) -> Optional[str]:
         """Parse Indian date formats to YYYY-MM-DD"""
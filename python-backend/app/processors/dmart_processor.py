@@ -1,10 +1,64 @@
 import re
-from typing import List, Optional
+from typing import AbstractSet, List, Optional, Union
 from .base_processor import BaseReceiptProcessor
-from ..models.receipt import ParsedReceiptData, ReceiptItem
+from .line_tokenizer import tokenize
+from .receipt_document import ReceiptDocument
+from .table_parser import TableColumn, TableParser, TableRow
+from .records import ItemRecord, ReceiptRecord
+
+# Names the line parser produces from tax and header lines rather than products
+NON_PRODUCT_NAME = re.compile(r'^(cost|cgst|sgst|phone|sy|nn|ecana|s\d+|ti|vee|wun|ven)$')
+
+# Lines that are never items: store header, taxes and totals, the table
+# header, separators and lone numbers
+SKIP_LINE = re.compile(
+    r'^(?:(?:avenue|dmart|supermarts|gstin|cin|phone|tax|invoice|cashier|date|time|bill)'
+    r'|(?:sgst|cgst|cess|discount|total|subtotal|amount|net|gross)'
+    r'|(?:nsh|particulars|qty|rate|value|item)(?:\s|$)'
+    r'|\s*[-=]+\s*$'
+    r'|\s*\d+\s*$)',
+    re.IGNORECASE
+)
+
+# Item code and whatever OCR noise precedes it
+ITEM_CODE_PREFIX = re.compile(r'^[^A-Za-z]*\d{5,6}\s+')
+TRAILING_NUMBERS = re.compile(r'[\d,.\s]+$')
+
+# Item table header and the lines that end the item table
+ITEM_SECTION_HINT = re.compile(r'(nsh|particulars|qty|rate|value|item)')
+ITEM_SECTION_COLUMN = re.compile(r'(nsh|particulars|qty|rate|value)')
+ITEM_SECTION_END = re.compile(
+    r'(total.*items|gross.*amount|sub.*total|total.*qty|total.*value|cgst|sgst|discount|net.*amount)'
+)
+
+# Lines that start with a DMart item code, with the prefixes OCR puts before it
+ITEM_CODE_LINE = re.compile('|'.join([
+    r'^\d{6}\s+[A-Za-z]',                    # Direct: "040120 NANDINT PASTE..."
+    r'^[~\s]*\d{6}\s+[A-Za-z]',              # With ~: "~ 040510 NANDINI..."
+    r'^\d+\s+\d{6}\s+[A-Za-z]',              # With number: "7 190590 GANESH..."
+    r'^[#=«©—»]\s*\d{6}\s+[A-Za-z]',         # With symbols: "#250100 KWALITY..."
+    r'^[=\s]*\d{5,6}\s+[A-Za-z]',            # 5-6 digits: "= 71320 TATA..."
+    r'^[—»]\s*\d{6}\s+[A-Za-z]',             # With dash/quotes: "— 210690 TOO YUM..."
+]))
+LEADING_NUMBER = re.compile(r'^\d+')
 
 class DMartProcessor(BaseReceiptProcessor):
     
+    # Item table as printed on DMart bills: HSN Particulars Qty/Kgs N/Rate Value
+    table_parser = TableParser(
+        columns=[
+            TableColumn('hsn', r'^(hsn|nsh)'),
+            TableColumn('name', r'partic|icular', numeric=False),
+            TableColumn('qty', r'^qty'),
+            TableColumn('mrp', r'^mrp'),
+            TableColumn('rate', r'rate'),
+            TableColumn('value', r'^val')
+        ],
+        key_column='hsn',
+        key_pattern=r'\d{4,8}',
+        end_pattern=r'^items\s*:|\btotal\b|taxable|amount\s+received'
+    )
+    
     @property
     def name(self) -> str:
         return "DMart"
@@ -16,26 +70,32 @@ class DMartProcessor(BaseReceiptProcessor):
             r'avenue\s*supermarts'
         ]
     
-    def can_process(self, text: str) -> bool:
-        text_lower = text.lower()
-        return any(re.search(pattern, text_lower, re.IGNORECASE) for pattern in self.patterns)
+    def can_process(self, document: Union[ReceiptDocument, str]) -> bool:
+        text_lower = ReceiptDocument.coerce(document).lower_text
+        return any(re.search(pattern, text_lower) for pattern in self.patterns)
     
-    def process_receipt(self, text: str, image_data: Optional[bytes] = None) -> ParsedReceiptData:
-        lines = [line.strip() for line in text.split('\n') if line.strip()]
+    def process_receipt(self, document: Union[ReceiptDocument, str], image_data: Optional[bytes] = None,
+                        words: Optional[dict] = None) -> ReceiptRecord:
+        document = ReceiptDocument.coerce(document)
+        words = words if words is not None else document.words
+        lines = document.lines
         
-        result = ParsedReceiptData(
+        result = ReceiptRecord(
             vendor="DMart",
             date=self._extract_date(lines),
             total=0.0,
             items=[],
-            raw_text=text
+            raw_text=document.text
         )
         
         # Extract total
         result.total = self._extract_total(lines)
         
-        # Extract items
-        result.items = self._extract_items(lines)
+        # Extract items, reading columns by position when word boxes are available
+        result.items = self._extract_table_items(words) if words else []
+        if not result.items:
+            result.items = self._extract_items(document)
+        self.categorize_items(result.items)
         
         # Calculate total if not found
         if result.total == 0.0 and result.items:
@@ -78,24 +138,40 @@ class DMartProcessor(BaseReceiptProcessor):
         
         return 0.0
     
-    def _extract_items(self, lines: List[str]) -> List[ReceiptItem]:
+    def _item_from_row(self, row: TableRow) -> Optional[ItemRecord]:
+        return self._table_item(
+            self._clean_dmart_item_name(row.text('name')),
+            row.number('qty'),
+            row.number('rate'),
+            row.number('value')
+        )
+    
+    def parse_item_line(self, line: str) -> Optional[ItemRecord]:
+        return self._parse_dmart_item_line(line)
+    
+    def is_suspicious_item(self, item: Optional[ItemRecord]) -> bool:
+        return super().is_suspicious_item(item) or bool(NON_PRODUCT_NAME.match(item.name.lower()))
+    
+    def _extract_items(self, document: ReceiptDocument) -> List[ItemRecord]:
         """Extract items from DMart receipt"""
         items = []
         in_item_section = False
+        # Lines this pass has parsed, so the comprehensive pass does not parse them again
+        parsed_lines = set()
         
         print("DMart: Starting item extraction...")
         
-        for i, line in enumerate(lines):
+        for i, (line, line_lower) in enumerate(zip(document.lines, document.lower_lines)):
             # Check if we're entering the items section - look for table headers
-            if re.search(r'(nsh|particulars|qty|rate|value|item)', line, re.IGNORECASE):
+            if ITEM_SECTION_HINT.search(line_lower):
                 # Check if this looks like a header line with multiple column indicators
-                if len(re.findall(r'(nsh|particulars|qty|rate|value)', line, re.IGNORECASE)) >= 2:
+                if len(ITEM_SECTION_COLUMN.findall(line_lower)) >= 2:
                     in_item_section = True
                     print(f"DMart: Found items section header at line {i+1}: {line}")
                     continue
             
             # Check if we're leaving the items section
-            if re.search(r'(total.*items|gross.*amount|sub.*total|total.*qty|total.*value|cgst|sgst|discount|net.*amount)', line, re.IGNORECASE):
+            if ITEM_SECTION_END.search(line_lower):
                 # Only exit if we found some items already
                 if items:
                     in_item_section = False
@@ -104,6 +180,7 @@ class DMartProcessor(BaseReceiptProcessor):
             
             # Try to parse item lines even if not in formal section (fallback)
             item = self._parse_dmart_item_line(line, strict=in_item_section)
+            parsed_lines.add(line)
             if item:
                 items.append(item)
                 print(f"DMart: Added item: {item.name} - ₹{item.total_price}")
@@ -114,7 +191,7 @@ class DMartProcessor(BaseReceiptProcessor):
         # Additional pass: extract items from lines that might have been missed
         if len(items) < 20:  # If we got less items than expected
             print("DMart: Low item count, trying additional extraction methods")
-            additional_items = self._extract_dmart_items_comprehensive(lines)
+            additional_items = self._extract_dmart_items_comprehensive(document, parsed_lines)
             # Merge without duplicates
             existing_names = {item.name.lower() for item in items}
             for item in additional_items:
@@ -124,38 +201,28 @@ class DMartProcessor(BaseReceiptProcessor):
         print(f"DMart: Extracted {len(items)} items")
         return items
     
-    def _parse_dmart_item_line(self, line: str, strict: bool = False) -> Optional[ReceiptItem]:
+    def _parse_dmart_item_line(self, line: str, strict: bool = False) -> Optional[ItemRecord]:
         """Parse DMart item line - improved for actual DMart receipt format"""
         if not line.strip():
             return None
         
         # Skip obvious non-item lines
-        skip_patterns = [
-            r'^(avenue|dmart|supermarts|gstin|cin|phone|tax|invoice|cashier|date|time|bill)',
-            r'^(sgst|cgst|cess|discount|total|subtotal|amount|net|gross)',
-            r'^(nsh|particulars|qty|rate|value|item)(\s|$)',  # Header lines
-            r'^\s*[-=]+\s*$',  # Separator lines
-            r'^\s*\d+\s*$',  # Lines with just numbers
-        ]
-        
-        for pattern in skip_patterns:
-            if re.search(pattern, line, re.IGNORECASE):
-                return None
+        if SKIP_LINE.match(line):
+            return None
         
         # Pattern 1: DMart format - extract last 2 decimal numbers as unit_price and total_price
         # Format: ITEM_CODE ITEM_NAME [various_numbers] UNIT_PRICE TOTAL_PRICE
         # Example: "040510 NANDINI SALTED-100g 1 56.00 56.00"
         # Example: "190230 MAGGI SPICY GA-240g = 1 90.00 90.00"
         
-        # First extract item code and clean the line
-        item_code_match = re.search(r'\d{5,6}', line)
-        if not item_code_match:
+        # One scan finds the item code and every kind of number in the line
+        tokens = tokenize(line)
+        item_code = tokens.item_code
+        if item_code is None:
             return None
-            
-        item_code = item_code_match.group()
         
         # Find all decimal numbers (prices) in the line
-        decimal_numbers = re.findall(r'\b\d+\.\d+\b', line)
+        decimal_numbers = tokens.decimals
         
         if len(decimal_numbers) >= 2:
             # Last two decimal numbers are unit_price and total_price
@@ -164,10 +231,10 @@ class DMartProcessor(BaseReceiptProcessor):
             
             # Extract product name (everything between item code and the price numbers)
             # Remove the item code and prefix symbols
-            name_part = re.sub(r'^[^A-Za-z]*\d{5,6}\s+', '', line)
+            name_part = ITEM_CODE_PREFIX.sub('', line)
             # Remove the last price numbers and their context
             for price in decimal_numbers[-2:]:
-                name_part = re.sub(r'\s*' + re.escape(price) + r'.*$', '', name_part)
+                name_part = self._cut_at(name_part, price)
             
             # Clean the name
             cleaned_name = self._clean_dmart_item_name(name_part)
@@ -179,20 +246,18 @@ class DMartProcessor(BaseReceiptProcessor):
                 # If total_price is much larger than unit_price, try to extract quantity
                 if total_price > unit_price * 1.5:  # Allow some tolerance
                     # Look for standalone numbers that might be quantity
-                    standalone_numbers = re.findall(r'\b(\d+)\b', line)
-                    for num_str in standalone_numbers:
+                    for num_str in tokens.integers:
                         if num_str != item_code and len(num_str) < 4:  # Not item code, reasonable qty
                             test_qty = float(num_str)
                             if abs(test_qty * unit_price - total_price) < abs(1.0 * unit_price - total_price):
                                 quantity = test_qty
                                 break
                 
-                return ReceiptItem(
+                return ItemRecord(
                     name=cleaned_name,
                     quantity=quantity,
                     unit_price=unit_price,
-                    total_price=total_price,
-                    category=self.categorize_product(cleaned_name)
+                    total_price=total_price
                 )
         
         # Fallback: if only one decimal price found
@@ -200,13 +265,12 @@ class DMartProcessor(BaseReceiptProcessor):
             total_price = float(decimal_numbers[0])
             
             # Extract product name
-            name_part = re.sub(r'^[^A-Za-z]*\d{5,6}\s+', '', line)
-            name_part = re.sub(r'\s*' + re.escape(decimal_numbers[0]) + r'.*$', '', name_part)
+            name_part = self._cut_at(ITEM_CODE_PREFIX.sub('', line), decimal_numbers[0])
             cleaned_name = self._clean_dmart_item_name(name_part)
             
             if len(cleaned_name) > 2:
                 # Look for integer numbers that might be unit prices or quantities
-                integers = [n for n in re.findall(r'\b(\d{1,4})\b', line) if n != item_code and len(n) <= 4]
+                integers = [n for n in tokens.integers if n != item_code and len(n) <= 4]
                 
                 # Try to find a reasonable unit price
                 unit_price = total_price  # Default: assume qty=1, unit_price=total_price
@@ -228,7 +292,7 @@ class DMartProcessor(BaseReceiptProcessor):
                 
                 # If we still have unit_price = total_price, look for comma-separated numbers
                 # "99,00" should be "99.00"
-                comma_numbers = re.findall(r'\b(\d{1,4}),(\d{2})\b', line)
+                comma_numbers = tokens.comma_decimals
                 if comma_numbers and unit_price == total_price:
                     # Use comma number as unit price
                     for int_part, dec_part in comma_numbers:
@@ -240,24 +304,23 @@ class DMartProcessor(BaseReceiptProcessor):
                 
                 # Validation: ensure reasonable values
                 if 0.01 <= quantity <= 100 and 0.1 <= unit_price <= 5000:
-                    return ReceiptItem(
+                    return ItemRecord(
                         name=cleaned_name,
                         quantity=quantity,
                         unit_price=unit_price,
-                        total_price=total_price,
-                        category=self.categorize_product(cleaned_name)
+                        total_price=total_price
                     )
         
         # Last resort: handle lines with no decimal numbers at all
         else:
             # Look for comma-formatted prices like "99,00" or "5.00" that might be missed
-            comma_prices = re.findall(r'\b(\d{1,4}),(\d{2})\b', line)
-            all_integers = [n for n in re.findall(r'\b(\d{1,4})\b', line) if n != item_code and len(n) <= 4]
+            comma_prices = tokens.comma_decimals
+            all_integers = [n for n in tokens.integers if n != item_code and len(n) <= 4]
             
             if comma_prices or (all_integers and len(all_integers) >= 2):
-                name_part = re.sub(r'^[^A-Za-z]*\d{5,6}\s+', '', line)
+                name_part = ITEM_CODE_PREFIX.sub('', line)
                 # Remove numbers from end
-                name_part = re.sub(r'[\d,.\s]+$', '', name_part)
+                name_part = TRAILING_NUMBERS.sub('', name_part)
                 cleaned_name = self._clean_dmart_item_name(name_part)
                 
                 if len(cleaned_name) > 2:
@@ -275,17 +338,24 @@ class DMartProcessor(BaseReceiptProcessor):
                     
                     # Validation
                     if 0.01 <= quantity <= 100 and 0.1 <= unit_price <= 5000 and total_price > 0:
-                        return ReceiptItem(
+                        return ItemRecord(
                             name=cleaned_name,
                             quantity=quantity,
                             unit_price=unit_price,
-                            total_price=total_price,
-                            category=self.categorize_product(cleaned_name)
+                            total_price=total_price
                         )
         
         return None
     
-    def _extract_dmart_items_pattern(self, lines: List[str]) -> List[ReceiptItem]:
+    @staticmethod
+    def _cut_at(text: str, price: str) -> str:
+        """Drop the first occurrence of price, the whitespace before it and everything after"""
+        index = text.find(price)
+        if index < 0:
+            return text
+        return text[:index].rstrip()
+    
+    def _extract_dmart_items_pattern(self, lines: List[str]) -> List[ItemRecord]:
         """Extract DMart items using pattern matching"""
         items = []
         text = ' '.join(lines).lower()
@@ -342,19 +412,18 @@ class DMartProcessor(BaseReceiptProcessor):
         for pattern_info in item_patterns:
             if re.search(pattern_info['pattern'], text, re.IGNORECASE):
                 item_data = pattern_info['item']
-                item = ReceiptItem(
+                item = ItemRecord(
                     name=item_data['name'],
                     quantity=item_data['quantity'],
                     unit_price=item_data['unit_price'],
-                    total_price=item_data['total_price'],
-                    category=self.categorize_product(item_data['name'])
+                    total_price=item_data['total_price']
                 )
                 items.append(item)
                 print(f"DMart: Pattern match found: {item.name}")
         
         return items
     
-    def _extract_dmart_items_direct(self, lines: List[str]) -> List[ReceiptItem]:
+    def _extract_dmart_items_direct(self, lines: List[str]) -> List[ItemRecord]:
         """Extract items directly from all lines - for when header detection fails"""
         items = []
         
@@ -371,48 +440,44 @@ class DMartProcessor(BaseReceiptProcessor):
         
         return items
     
-    def _extract_dmart_items_comprehensive(self, lines: List[str]) -> List[ReceiptItem]:
-        """Comprehensive item extraction using multiple strategies"""
+    def _extract_dmart_items_comprehensive(self, document: ReceiptDocument,
+                                           parsed_lines: AbstractSet[str] = frozenset()) -> List[ItemRecord]:
+        """Comprehensive item extraction using multiple strategies.
+        
+        Lines in parsed_lines were already parsed by the main pass, whose items
+        are already on the receipt, so they are skipped here. Every other line
+        is parsed at most once and the pass stays linear in the line count.
+        """
         items = []
+        lines = document.lines
         
         print("DMart: Running comprehensive item extraction...")
         
         # Strategy 1: Look for lines with DMart item code patterns
         for line in lines:
-            # Skip empty lines and short lines
-            if not line.strip() or len(line.strip()) < 15:
+            # Skip empty lines, short lines and lines the main pass handled
+            if len(line) < 15 or line in parsed_lines:
                 continue
             
             # Look for lines that start with 6-digit item codes (DMart pattern)
-            # Handle various prefixes that DMart uses
-            item_patterns = [
-                r'^\d{6}\s+[A-Za-z]',                    # Direct: "040120 NANDINT PASTE..."
-                r'^[~\s]*\d{6}\s+[A-Za-z]',              # With ~: "~ 040510 NANDINI..."
-                r'^\d+\s+\d{6}\s+[A-Za-z]',              # With number: "7 190590 GANESH..."
-                r'^[#=«©—»]\s*\d{6}\s+[A-Za-z]',         # With symbols: "#250100 KWALITY..."
-                r'^[=\s]*\d{5,6}\s+[A-Za-z]',            # 5-6 digits: "= 71320 TATA..."
-                r'^[—»]\s*\d{6}\s+[A-Za-z]',             # With dash/quotes: "— 210690 TOO YUM..."
-            ]
-            
-            for pattern in item_patterns:
-                if re.match(pattern, line):
-                    item = self._parse_dmart_item_line(line, strict=False)
-                    if item:
-                        items.append(item)
-                        break  # Don't try other patterns if one matched
+            if ITEM_CODE_LINE.match(line):
+                item = self._parse_dmart_item_line(line, strict=False)
+                if item:
+                    items.append(item)
         
         # Strategy 2: Handle multi-line items (where name might be split)
         combined_lines = []
         i = 0
+        numbers = document.numeric_spans
         while i < len(lines):
-            current_line = lines[i].strip()
+            current_line = lines[i]
             
             # If current line starts with a number and has few numbers, 
             # check if next line complements it
-            if re.match(r'^\d+', current_line) and len(re.findall(r'\d+(?:\.\d+)?', current_line)) < 3:
+            if LEADING_NUMBER.match(current_line) and len(numbers[i]) < 3:
                 if i + 1 < len(lines):
-                    next_line = lines[i + 1].strip()
-                    if re.search(r'\d+(?:\.\d+)?', next_line):
+                    next_line = lines[i + 1]
+                    if numbers[i + 1]:
                         combined = f"{current_line} {next_line}"
                         combined_lines.append(combined)
                         i += 2  # Skip next line since we combined it
@@ -423,7 +488,7 @@ class DMartProcessor(BaseReceiptProcessor):
         
         # Parse combined lines
         for line in combined_lines:
-            if line not in [l.strip() for l in lines]:  # Only parse newly combined lines
+            if line not in document.line_set:  # Only parse newly combined lines
                 item = self._parse_dmart_item_line(line, strict=False)
                 if item:
                     items.append(item)
@@ -446,7 +511,7 @@ class DMartProcessor(BaseReceiptProcessor):
                 continue
                 
             # Skip obvious non-product names
-            if re.match(r'^(cost|cgst|sgst|phone|sy|nn|ecana|s\d+|ti|vee|wun|ven)$', item.name.lower()):
+            if NON_PRODUCT_NAME.match(item.name.lower()):
                 print(f"DMart: Skipping non-product: {item.name}")
                 continue
                 
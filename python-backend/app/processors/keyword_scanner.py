@@ -0,0 +1,57 @@
+import re
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+class KeywordScanner:
+    """Finds every occurrence of a set of keywords in one pass over a text.
+
+    The keywords are compiled into a single trie-shaped regex, so each text
+    position tries at most one branch per character however many keywords
+    there are, which is what an Aho-Corasick automaton gives as well. A
+    lookahead reports keywords that start inside other keywords, and the
+    shorter keywords a match starts with are reported with it.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords = frozenset(keyword for keyword in keywords if keyword)
+        # Keyword -> itself and the shorter keywords it starts with
+        self._prefixes: Dict[str, List[str]] = {
+            keyword: [keyword[:end] for end in range(1, len(keyword) + 1) if keyword[:end] in self.keywords]
+            for keyword in self.keywords
+        }
+        self._scan = re.compile(f"(?=({_trie_pattern(self.keywords)}))") if self.keywords else None
+
+    def finditer(self, text: str) -> Iterator[Tuple[int, str]]:
+        """(start, keyword) for every keyword occurrence in text"""
+        if self._scan is None:
+            return
+        for match in self._scan.finditer(text):
+            for keyword in self._prefixes[match.group(1)]:
+                yield match.start(), keyword
+
+    def find(self, text: str) -> set:
+        """The keywords that occur in text"""
+        if self._scan is None:
+            return set()
+        found = set()
+        for longest in set(self._scan.findall(text)):
+            found.update(self._prefixes[longest])
+        return found
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """Regex matching any of words, shaped as a trie so each position tries one branch per character"""
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node: dict) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        # Greedy, so the longest word at a position wins
+        return f"(?:{body})?" if '' in node else body
+
+    return build(trie)
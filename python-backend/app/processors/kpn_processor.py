@@ -1,10 +1,30 @@
 import re
-from typing import List, Optional
+from typing import List, Optional, Union
 from .base_processor import BaseReceiptProcessor
-from ..models.receipt import ParsedReceiptData, ReceiptItem
+from .receipt_document import ReceiptDocument
+from .table_parser import TableColumn, TableParser, TableRow
+from .records import ItemRecord, ReceiptRecord
+
+# One price column of an item row ("45", "45.", "45.50")
+PRICE_FIELD = re.compile(r'\d+\.?\d*')
 
 class KPNProcessor(BaseReceiptProcessor):
     
+    # Item table as printed on KPN bills: Sno Item MRP Rate Qty Amt
+    table_parser = TableParser(
+        columns=[
+            TableColumn('sno', r'^s\.?no'),
+            TableColumn('name', r'^item', numeric=False),
+            TableColumn('mrp', r'^mrp'),
+            TableColumn('rate', r'^rate'),
+            TableColumn('qty', r'^qty'),
+            TableColumn('amount', r'^(amt|amount)')
+        ],
+        key_column='sno',
+        key_pattern=r'\d{1,3}',
+        end_pattern=r'sub\s*total'
+    )
+    
     @property
     def name(self) -> str:
         return "KPN Fresh"
@@ -16,26 +36,32 @@ class KPNProcessor(BaseReceiptProcessor):
             r'kpn\s*fresh'
         ]
     
-    def can_process(self, text: str) -> bool:
-        text_lower = text.lower()
-        return any(re.search(pattern, text_lower, re.IGNORECASE) for pattern in self.patterns)
+    def can_process(self, document: Union[ReceiptDocument, str]) -> bool:
+        text_lower = ReceiptDocument.coerce(document).lower_text
+        return any(re.search(pattern, text_lower) for pattern in self.patterns)
     
-    def process_receipt(self, text: str, image_data: Optional[bytes] = None) -> ParsedReceiptData:
-        lines = [line.strip() for line in text.split('\n') if line.strip()]
+    def process_receipt(self, document: Union[ReceiptDocument, str], image_data: Optional[bytes] = None,
+                        words: Optional[dict] = None) -> ReceiptRecord:
+        document = ReceiptDocument.coerce(document)
+        words = words if words is not None else document.words
+        lines = document.lines
         
-        result = ParsedReceiptData(
+        result = ReceiptRecord(
             vendor="KPN Fresh",
             date=self._extract_date(lines),
             total=0.0,
             items=[],
-            raw_text=text
+            raw_text=document.text
         )
         
         # Extract total
         result.total = self._extract_total(lines)
         
-        # Extract items
-        result.items = self._extract_items(lines)
+        # Extract items, reading columns by position when word boxes are available
+        result.items = self._extract_table_items(words) if words else []
+        if not result.items:
+            result.items = self._extract_items(document)
+        self.categorize_items(result.items)
         
         # Calculate total if not found
         if result.total == 0.0 and result.items:
@@ -74,23 +100,38 @@ class KPNProcessor(BaseReceiptProcessor):
         
         return 0.0
     
-    def _extract_items(self, lines: List[str]) -> List[ReceiptItem]:
+    def _item_from_row(self, row: TableRow) -> Optional[ItemRecord]:
+        return self._table_item(
+            self._clean_item_name(row.text('name')),
+            row.number('qty'),
+            row.number('rate'),
+            row.number('amount')
+        )
+    
+    def parse_item_line(self, line: str) -> Optional[ItemRecord]:
+        item_match = re.match(r'^(\d+)\s+(.+)$', line.strip())
+        if not item_match:
+            return None
+        return self._parse_kpn_item_line(item_match.group(2).strip(), int(item_match.group(1)))
+    
+    def _extract_items(self, document: ReceiptDocument) -> List[ItemRecord]:
         """Extract items from KPN receipt using improved parsing"""
+        lines = document.lines
         items = []
         in_item_section = False
         current_item = None
         
         print("KPN: Starting item extraction...")
         
-        for i, line in enumerate(lines):
+        for i, (line, line_lower) in enumerate(zip(lines, document.lower_lines)):
             # Check if we're entering the items section
-            if re.search(r'sno.*item.*mrp.*rate.*qty.*amt', line, re.IGNORECASE):
+            if re.search(r'sno.*item.*mrp.*rate.*qty.*amt', line_lower):
                 in_item_section = True
                 print("KPN: Found items section header")
                 continue
             
             # Check if we're leaving the items section
-            if re.search(r'sub\s*total', line, re.IGNORECASE):
+            if re.search(r'sub\s*total', line_lower):
                 in_item_section = False
                 print("KPN: End of items section")
                 break
@@ -123,7 +164,7 @@ class KPNProcessor(BaseReceiptProcessor):
                 
                 # Check next few lines for price data
                 for j in range(i + 1, min(i + 4, len(lines))):
-                    next_line = lines[j].strip()
+                    next_line = lines[j]
                     price_match = re.search(r'(\d+\.?\d*)\s+(\d+\.?\d*)\s+(\d+\.?\d*)\s+(\d+\.?\d*)', next_line)
                     if price_match:
                         mrp, rate, qty, amount = price_match.groups()
@@ -137,12 +178,11 @@ class KPNProcessor(BaseReceiptProcessor):
                             current_item['unit_price'] = float(price_str[:-2] + '.' + price_str[-2:])
                             current_item['total_price'] = current_item['unit_price'] * current_item['quantity']
                         
-                        item_obj = ReceiptItem(
+                        item_obj = ItemRecord(
                             name=current_item['name'],
                             quantity=current_item['quantity'],
                             unit_price=current_item['unit_price'],
-                            total_price=current_item['total_price'],
-                            category=self.categorize_product(current_item['name'])
+                            total_price=current_item['total_price']
                         )
                         items.append(item_obj)
                         print(f"KPN: Added item from next line: {item_obj.name}")
@@ -151,12 +191,12 @@ class KPNProcessor(BaseReceiptProcessor):
         print(f"KPN: Extracted {len(items)} items")
         return items
     
-    def _parse_kpn_item_line(self, content: str, item_number: int) -> Optional[ReceiptItem]:
+    def _parse_kpn_item_line(self, content: str, item_number: int) -> Optional[ItemRecord]:
         """Parse KPN item line with inline prices"""
-        # Pattern: Name MRP Rate Qty Amount
-        match = re.search(r'(.+?)\s+(\d+\.?\d*)\s+(\d+\.?\d*)\s+(\d+\.?\d*)\s+(\d+\.?\d*)$', content)
-        if match:
-            name, mrp, rate, qty, amount = match.groups()
+        # Pattern: Name MRP Rate Qty Amount - the last four fields, all numbers
+        fields = content.rsplit(None, 4)
+        if len(fields) == 5 and all(PRICE_FIELD.fullmatch(field) for field in fields[1:]):
+            name, mrp, rate, qty, amount = fields
             
             clean_name = self._clean_item_name(name)
             unit_price = float(rate)
@@ -169,12 +209,11 @@ class KPNProcessor(BaseReceiptProcessor):
                 unit_price = float(price_str[:-2] + '.' + price_str[-2:])
                 total_price = unit_price * quantity
             
-            item = ReceiptItem(
+            item = ItemRecord(
                 name=clean_name,
                 quantity=quantity,
                 unit_price=unit_price,
-                total_price=total_price,
-                category=self.categorize_product(clean_name)
+                total_price=total_price
             )
             
             print(f"KPN: Parsed inline item: {item.name} - ₹{item.total_price}")
@@ -0,0 +1,169 @@
+import re
+from dataclasses import dataclass
+from functools import cached_property
+from typing import List, Optional, Tuple
+
+CODE = "code"
+DECIMAL = "decimal"
+COMMA_DECIMAL = "comma_decimal"
+INTEGER = "integer"
+WORD = "word"
+SYMBOL = "symbol"
+
+# Digit runs joined by single separators ("56.00", "1,50")
+NUMBER_CHUNK = re.compile(r'\d+(?:[.,]\d+)*')
+# Number chunks, letter runs and any other visible character; whitespace falls between matches
+TOKEN_PATTERN = re.compile(r'(?P<number>\d+(?:[.,]\d+)*)|(?P<word>[^\W\d]+)|(?P<symbol>[^\w\s])')
+SEPARATOR = re.compile(r'([.,])')
+
+@dataclass
+class Token:
+    """One typed piece of an OCR line"""
+    kind: str
+    text: str
+    start: int
+    end: int
+
+def _is_word_char(char: str) -> bool:
+    """Whether a character counts as \\w for regex word boundaries"""
+    return char.isalnum() or char == '_'
+
+class LineTokens:
+    """Typed tokens of a line, with the number views item parsers need.
+
+    One scan over the line's fields collects each view exactly as the
+    corresponding regex over the whole line would find it:
+
+    - item_code: the first 5-6 digits of the first run of 5+ digits (\\d{5,6})
+    - decimals: \\b\\d+\\.\\d+\\b matches
+    - comma_decimals: \\b(\\d{1,4}),(\\d{2})\\b matches as (whole, fraction)
+    - integers: \\b(\\d+)\\b matches, including the halves of decimals
+
+    The full token stream, with words and OCR noise symbols, is only built
+    when asked for.
+    """
+
+    def __init__(self, line: str):
+        self.line = line
+        self.item_code: Optional[str] = None
+        self.decimals: List[str] = []
+        self.comma_decimals: List[Tuple[str, str]] = []
+        self.integers: List[str] = []
+
+        # Whitespace is a word boundary, so each field can be read on its own
+        for field in line.split():
+            if field.isdecimal():
+                # Plain digit run, by far the most common case
+                if self.item_code is None and len(field) >= 5:
+                    self.item_code = field[:6]
+                self.integers.append(field)
+            elif field.isalpha():
+                continue
+            else:
+                whole, dot, fraction = field.partition('.')
+                if dot and whole.isdecimal() and fraction.isdecimal():
+                    # A standalone price such as "56.00"
+                    if self.item_code is None and max(len(whole), len(fraction)) >= 5:
+                        self.item_code = (whole if len(whole) >= 5 else fraction)[:6]
+                    self.integers += (whole, fraction)
+                    self.decimals.append(field)
+                else:
+                    for match in NUMBER_CHUNK.finditer(field):
+                        self._read_number(match.group(), *_bounds(field, *match.span()))
+
+    def _read_number(self, text: str, left: bool, right: bool):
+        if text.isdecimal():
+            if self.item_code is None and len(text) >= 5:
+                self.item_code = text[:6]
+            if left and right:
+                self.integers.append(text)
+            return
+
+        parts = SEPARATOR.split(text)
+        self._read_runs(parts[0::2], parts[1::2], left, right)
+
+    def _read_runs(self, runs: List[str], separators: List[str], left: bool, right: bool):
+        """Record the digit runs of one number chunk and the decimals they form"""
+        last = len(runs) - 1
+        for i, run in enumerate(runs):
+            if self.item_code is None and len(run) >= 5:
+                self.item_code = run[:6]
+            # Separators inside the chunk are word boundaries too
+            if (left or i > 0) and (right or i < last):
+                self.integers.append(run)
+
+        for i in _pair_up(runs, separators, '.', left, right):
+            self.decimals.append(runs[i] + '.' + runs[i + 1])
+        for i in _pair_up(runs, separators, ',', left, right):
+            self.comma_decimals.append((runs[i], runs[i + 1]))
+
+    @cached_property
+    def tokens(self) -> List[Token]:
+        """Every token of the line in order; whitespace is dropped"""
+        tokens: List[Token] = []
+        for match in TOKEN_PATTERN.finditer(self.line):
+            kind = match.lastgroup
+            if kind == 'number':
+                tokens.extend(self._number_tokens(match.group(), *match.span()))
+            else:
+                tokens.append(Token(kind, match.group(), match.start(), match.end()))
+        return tokens
+
+    def _number_tokens(self, text: str, start: int, end: int) -> List[Token]:
+        """Split a number chunk into decimals, comma decimals, codes, integers and separators"""
+        parts = SEPARATOR.split(text)
+        runs, separators = parts[0::2], parts[1::2]
+        left, right = _bounds(self.line, start, end)
+        decimal_starts = _pair_up(runs, separators, '.', left, right)
+        comma_starts = _pair_up(runs, separators, ',', left, right)
+
+        tokens = []
+        position = start
+        last = len(runs) - 1
+        i = 0
+        while i <= last:
+            if i in decimal_starts or (i in comma_starts and i + 1 not in decimal_starts):
+                kind = DECIMAL if i in decimal_starts else COMMA_DECIMAL
+                piece = runs[i] + separators[i] + runs[i + 1]
+                i += 2
+            else:
+                kind = CODE if len(runs[i]) >= 5 else INTEGER
+                piece = runs[i]
+                i += 1
+            tokens.append(Token(kind, piece, position, position + len(piece)))
+            position += len(piece)
+            if i - 1 < last:
+                tokens.append(Token(SYMBOL, separators[i - 1], position, position + 1))
+                position += 1
+        return tokens
+
+    def __iter__(self):
+        return iter(self.tokens)
+
+    def __len__(self) -> int:
+        return len(self.tokens)
+
+def _bounds(text: str, start: int, end: int) -> Tuple[bool, bool]:
+    """Whether text[start:end] has a word boundary before and after it"""
+    return (start == 0 or not _is_word_char(text[start - 1]),
+            end == len(text) or not _is_word_char(text[end]))
+
+def _pair_up(runs: List[str], separators: List[str], separator: str, left: bool, right: bool) -> List[int]:
+    """Start indexes of run pairs joined by separator, scanned left to right like re.findall"""
+    last = len(runs) - 1
+    starts = []
+    i = 0
+    while i < last:
+        matched = separators[i] == separator and (left or i > 0) and (right or i + 1 < last)
+        if matched and separator == ',':
+            matched = len(runs[i]) <= 4 and len(runs[i + 1]) == 2
+        if matched:
+            starts.append(i)
+            i += 2
+        else:
+            i += 1
+    return starts
+
+def tokenize(line: str) -> LineTokens:
+    """Split an OCR line into typed tokens in a single scan"""
+    return LineTokens(line)
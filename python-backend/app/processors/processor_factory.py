@@ -1,7 +1,9 @@
-from typing import List, Optional
+from typing import Dict, List, Optional, Union
 from .base_processor import BaseReceiptProcessor
 from .kpn_processor import KPNProcessor
 from .dmart_processor import DMartProcessor
+from .receipt_document import ReceiptDocument
+from .vendor_index import VendorIndex
 
 class ProcessorFactory:
     
@@ -10,17 +12,35 @@ class ProcessorFactory:
             KPNProcessor(),
             DMartProcessor()
         ]
+        # Processors are stateless, so receipts without a store name share this one
+        self.fallback: BaseReceiptProcessor = self.processors[0]
+        self._index: Optional[VendorIndex] = None
     
-    def get_processor(self, text: str) -> BaseReceiptProcessor:
+    @property
+    def index(self) -> VendorIndex:
+        """Compiled store-name patterns of all processors, rebuilt after add_processor"""
+        if self._index is None:
+            self._index = VendorIndex(self.processors)
+        return self._index
+    
+    def vendor_scores(self, document: Union[ReceiptDocument, str]) -> Dict[str, int]:
+        """Store name matches per vendor, in the header when it names a store, else in the full text"""
+        document = ReceiptDocument.coerce(document)
+        return self.index.scores(document.head.lower_text) or self.index.scores(document.lower_text)
+    
+    def get_processor(self, document: Union[ReceiptDocument, str]) -> BaseReceiptProcessor:
         """Get the appropriate processor for the given text"""
-        for processor in self.processors:
-            if processor.can_process(text):
+        document = ReceiptDocument.coerce(document)
+        # Store names are printed at the top, so the full text is rarely scanned
+        for region in (document.head, document):
+            processor = self.index.best(region.lower_text)
+            if processor is not None:
                 print(f"Using {processor.name} processor")
                 return processor
         
         # Default to KPN processor as fallback
         print("No specific processor found, using KPN processor as fallback")
-        return KPNProcessor()
+        return self.fallback
     
     def get_all_processors(self) -> List[BaseReceiptProcessor]:
         """Get all available processors"""
@@ -29,6 +49,7 @@ class ProcessorFactory:
     def add_processor(self, processor: BaseReceiptProcessor):
         """Add a new processor"""
         self.processors.append(processor)
+        self._index = None
     
     def list_supported_stores(self) -> List[str]:
         """List all supported store names"""
@@ -0,0 +1,119 @@
+import bisect
+import json
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Sequence, Tuple
+from .. import config
+from .keyword_scanner import KeywordScanner
+
+# Category keywords, highest priority first: a name matching several
+# categories gets the first one ("maggi masala noodles" is Spices, not Snacks)
+DEFAULT_TAXONOMY: List[Tuple[str, List[str]]] = [
+    ('Dairy', ['milk', 'cheese', 'yogurt', 'butter', 'cream', 'paneer', 'curd', 'ghee', 'amul']),
+    ('Produce', ['banana', 'apple', 'orange', 'spinach', 'lettuce', 'tomato', 'onion', 'carrot', 'potato', 'mango']),
+    ('Meat', ['chicken', 'mutton', 'fish', 'prawns', 'eggs']),
+    ('Bakery', ['bread', 'pav', 'bun', 'rusk', 'cake', 'biscuit', 'britannia']),
+    ('Grains', ['rice', 'wheat', 'atta', 'flour', 'dal', 'basmati', 'aashirvaad']),
+    ('Beverages', ['tea', 'coffee', 'juice', 'water', 'cola', 'tata', 'nescafe']),
+    ('Spices', ['turmeric', 'chili', 'coriander', 'cumin', 'garam', 'masala', 'mdh', 'everest']),
+    ('Snacks', ['chips', 'namkeen', 'biscuits', 'maggi', 'noodles', 'kurkure']),
+    ('Household', ['soap', 'detergent', 'shampoo', 'surf', 'vim', 'lizol']),
+    ('Oil', ['oil', 'sunflower', 'coconut', 'mustard', 'fortune', 'saffola'])
+]
+
+DEFAULT_CATEGORY = 'Other'
+
+def load_taxonomy(path: str) -> List[Tuple[str, List[str]]]:
+    """Read a JSON taxonomy: {"Category": ["keyword", ...], ...}, highest priority first"""
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    if not isinstance(data, dict) or not all(
+            isinstance(keywords, list) and all(isinstance(keyword, str) for keyword in keywords)
+            for keywords in data.values()):
+        raise ValueError(f"{path}: expected an object mapping categories to lists of keywords")
+    return list(data.items())
+
+class ProductCategorizer:
+    """Assigns product categories from keywords found anywhere in the name.
+
+    All keywords are compiled once into a KeywordScanner. A batch of names
+    is categorized with a single scan over the names joined together, and
+    recent names are remembered in an LRU memo since the same products turn
+    up on receipt after receipt.
+    """
+
+    def __init__(self, taxonomy: Sequence[Tuple[str, List[str]]], cache_size: int = 4096,
+                 default: str = DEFAULT_CATEGORY):
+        self.categories = [category for category, _ in taxonomy]
+        self.default = default
+        # Keyword -> priority of the first category that lists it
+        self._priority: Dict[str, int] = {}
+        for priority, (_, keywords) in enumerate(taxonomy):
+            for keyword in keywords:
+                keyword = keyword.strip().lower()
+                if keyword and '\n' not in keyword:
+                    self._priority.setdefault(keyword, priority)
+        self._scanner = KeywordScanner(self._priority)
+        self.cache_size = cache_size
+        self._memo: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def categorize(self, name: str) -> str:
+        """Category for one product name"""
+        return self.categorize_many([name])[0]
+
+    def categorize_many(self, names: Sequence[str]) -> List[str]:
+        """Categories for a batch of product names, in the same order"""
+        lower_names = [name.lower() for name in names]
+        categories: Dict[str, str] = {}
+        with self._lock:
+            for lower_name in lower_names:
+                category = self._memo.get(lower_name)
+                if category is not None:
+                    self._memo.move_to_end(lower_name)
+                    categories[lower_name] = category
+
+        missing = list(dict.fromkeys(name for name in lower_names if name not in categories))
+        if missing:
+            computed = self._scan(missing)
+            categories.update(computed)
+            self._remember(computed)
+
+        return [categories[lower_name] for lower_name in lower_names]
+
+    def _scan(self, lower_names: List[str]) -> Dict[str, str]:
+        """Categorize names with one scan of their concatenation"""
+        starts = []
+        position = 0
+        for lower_name in lower_names:
+            starts.append(position)
+            position += len(lower_name) + 1
+        # Keywords never contain a newline, so no match runs across two names
+        text = '\n'.join(lower_names)
+
+        best = [len(self.categories)] * len(lower_names)
+        for start, keyword in self._scanner.finditer(text):
+            index = bisect.bisect_right(starts, start) - 1
+            best[index] = min(best[index], self._priority[keyword])
+
+        return {
+            lower_name: self.categories[priority] if priority < len(self.categories) else self.default
+            for lower_name, priority in zip(lower_names, best)
+        }
+
+    def _remember(self, categories: Dict[str, str]):
+        if self.cache_size <= 0:
+            return
+        with self._lock:
+            self._memo.update(categories)
+            for lower_name in categories:
+                self._memo.move_to_end(lower_name)
+            while len(self._memo) > self.cache_size:
+                self._memo.popitem(last=False)
+
+def _default_categorizer() -> ProductCategorizer:
+    taxonomy = load_taxonomy(config.PRODUCT_TAXONOMY_PATH) if config.PRODUCT_TAXONOMY_PATH else DEFAULT_TAXONOMY
+    return ProductCategorizer(taxonomy, cache_size=config.PRODUCT_CATEGORY_CACHE_SIZE)
+
+# Compiled once at import and shared by every processor
+DEFAULT_CATEGORIZER = _default_categorizer()
@@ -0,0 +1,56 @@
+import re
+from functools import cached_property
+from typing import List, Optional, Tuple, Union
+
+# Lines at the top of a receipt that hold the store name, address and GSTIN
+HEADER_LINES = 8
+
+# Numbers as the text parsers read them ("56", "56.00")
+NUMBER = re.compile(r'\d+(?:\.\d+)?')
+
+class ReceiptDocument:
+    """OCR output of one receipt with the views processors parse it through.
+
+    Each view is computed on first use and then shared, so vendor detection
+    and parsing normalize the text only once however many processors look
+    at it.
+    """
+
+    def __init__(self, text: str, words: Optional[dict] = None):
+        self.text = text
+        # image_to_data word boxes, when the text came from OCR
+        self.words = words
+
+    @classmethod
+    def coerce(cls, document: Union['ReceiptDocument', str]) -> 'ReceiptDocument':
+        """Wrap plain text in a document, passing documents through"""
+        if isinstance(document, ReceiptDocument):
+            return document
+        return cls(document or '')
+
+    @cached_property
+    def lines(self) -> List[str]:
+        """Non-empty lines with surrounding whitespace removed"""
+        return [line.strip() for line in self.text.split('\n') if line.strip()]
+
+    @cached_property
+    def line_set(self) -> frozenset:
+        return frozenset(self.lines)
+
+    @cached_property
+    def lower_text(self) -> str:
+        return self.text.lower()
+
+    @cached_property
+    def lower_lines(self) -> List[str]:
+        return [line.lower() for line in self.lines]
+
+    @cached_property
+    def head(self) -> 'ReceiptDocument':
+        """The first lines of the receipt, where the store name is printed"""
+        return ReceiptDocument('\n'.join(self.lines[:HEADER_LINES]))
+
+    @cached_property
+    def numeric_spans(self) -> List[List[Tuple[int, int]]]:
+        """(start, end) of every number in each line"""
+        return [[match.span() for match in NUMBER.finditer(line)] for line in self.lines]
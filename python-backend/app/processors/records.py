@@ -0,0 +1,52 @@
+from typing import List, Optional
+
+class ItemRecord:
+    """One parsed item line, as the processors pass it around.
+
+    Parsing builds a candidate for every line that looks like an item and
+    throws many of them away again, so candidates are plain slotted objects
+    rather than validated pydantic models. ReceiptService turns the items
+    that survive into ReceiptItem once, when it builds the response.
+    """
+
+    __slots__ = ('name', 'quantity', 'unit_price', 'total_price', 'category')
+
+    def __init__(self, name: str, quantity: float, unit_price: float, total_price: float,
+                 category: Optional[str] = "Other"):
+        self.name = name
+        self.quantity = quantity
+        self.unit_price = unit_price
+        self.total_price = total_price
+        self.category = category
+
+    def reading(self) -> tuple:
+        """What was read from the receipt, leaving out the category derived from it"""
+        return (self.name, self.quantity, self.unit_price, self.total_price)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, ItemRecord):
+            return NotImplemented
+        return self.reading() == other.reading() and self.category == other.category
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return (f"ItemRecord(name={self.name!r}, quantity={self.quantity!r}, unit_price={self.unit_price!r}, "
+                f"total_price={self.total_price!r}, category={self.category!r})")
+
+class ReceiptRecord:
+    """A processor's parse of one receipt; ReceiptService converts it to ParsedReceiptData"""
+
+    __slots__ = ('vendor', 'date', 'total', 'items', 'raw_text')
+
+    def __init__(self, vendor: str, date: str, total: float, items: List[ItemRecord],
+                 raw_text: Optional[str] = None):
+        self.vendor = vendor
+        self.date = date
+        self.total = total
+        self.items = items
+        self.raw_text = raw_text
+
+    def __repr__(self) -> str:
+        return (f"ReceiptRecord(vendor={self.vendor!r}, date={self.date!r}, total={self.total!r}, "
+                f"items={len(self.items)})")
@@ -0,0 +1,236 @@
+import re
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Pattern, Set
+
+# A word that is only a number, allowing OCR noise around it ("=", "~", quotes)
+NUMBER_WORD = re.compile(r'^[^\w]*\d[\d.,]*[^\w]*$')
+NUMBER_VALUE = re.compile(r'\d[\d,]*(?:\.\d+)?')
+# A lone comma before exactly two closing digits is a decimal comma ("99,00")
+DECIMAL_COMMA = re.compile(r'^\d+,\d{2}$')
+KEY_TRIM = re.compile(r'^\D+|\D+$')
+SPLIT_DECIMAL = re.compile(r'(\d)\s+(?=[.,]\d)|(?<=\d[.,])\s+(?=\d)')
+
+@dataclass
+class Word:
+    """One word box from tesseract's image_to_data output"""
+    text: str
+    left: int
+    top: int
+    width: int
+    height: int
+    conf: float = -1.0
+
+    @property
+    def right(self) -> int:
+        return self.left + self.width
+
+    @property
+    def centre_x(self) -> float:
+        return self.left + self.width / 2.0
+
+    @property
+    def centre_y(self) -> float:
+        return self.top + self.height / 2.0
+
+    @property
+    def is_number(self) -> bool:
+        return bool(NUMBER_WORD.match(self.text))
+
+@dataclass
+class TableColumn:
+    """A receipt table column, found by matching its header word"""
+    name: str
+    header: str
+    numeric: bool = True
+
+@dataclass
+class TableRow:
+    """Words of one table row, grouped by column"""
+    cells: Dict[str, List[Word]] = field(default_factory=dict)
+    key: Optional[str] = None
+    top: int = 0
+    bottom: int = 0
+    left: int = 0
+    right: int = 0
+
+    def text(self, column: str) -> str:
+        return ' '.join(word.text for word in self.cells.get(column, []))
+
+    def number(self, column: str) -> Optional[float]:
+        """Numeric value of a column, preferring its rightmost readable number"""
+        # Re-join numbers OCR split at the decimal point ("147 .00")
+        text = ' '.join(word.text for word in self.cells.get(column, []))
+        matches = NUMBER_VALUE.findall(SPLIT_DECIMAL.sub(r'\1', text))
+        if not matches:
+            return None
+        number = matches[-1]
+        # Any other comma groups thousands ("1,299.00", "2,50,000")
+        number = number.replace(',', '.') if DECIMAL_COMMA.match(number) else number.replace(',', '')
+        whole, _, fraction = number.partition('.')
+        # Amounts have paise at most; extra digits are OCR noise
+        return float(f"{whole}.{fraction[:2] or 0}")
+
+    def has_numbers(self, ignore: Optional[str] = None) -> bool:
+        """Whether any column other than `ignore` holds a number"""
+        return any(word.is_number for column, words in self.cells.items() if column != ignore
+                   for word in words)
+
+    def extend(self, other: 'TableRow'):
+        """Absorb a continuation row (a wrapped name or prices printed below it)"""
+        for column, words in other.cells.items():
+            self.cells.setdefault(column, []).extend(words)
+        self.top, self.bottom = min(self.top, other.top), max(self.bottom, other.bottom)
+        self.left, self.right = min(self.left, other.left), max(self.right, other.right)
+
+def words_from_data(data: dict) -> List[Word]:
+    """Non-empty word boxes from image_to_data style output"""
+    words = []
+    for i, text in enumerate(data.get('text', [])):
+        if data['level'][i] != 5 or not str(text).strip():
+            continue
+        words.append(Word(
+            text=str(text).strip(),
+            left=int(data['left'][i]),
+            top=int(data['top'][i]),
+            width=int(data['width'][i]),
+            height=int(data['height'][i]),
+            conf=float(data['conf'][i])
+        ))
+    return words
+
+def group_rows(words: List[Word]) -> List[List[Word]]:
+    """Cluster words into text rows, each sorted left to right, rows top to bottom.
+
+    Words are chained left to right onto the row whose last word they overlap
+    vertically, so slightly skewed lines stay together. Geometry is used
+    instead of tesseract's line numbers so the result does not depend on the
+    page segmentation mode.
+
+    Rows are bucketed by where their last word starts, in bands one word
+    height tall. A word can only overlap rows whose last word starts less
+    than a word height above it, so it is compared with the rows of two or
+    three bands instead of every row on the page.
+    """
+    if not words:
+        return []
+    band = max(1, max(word.height for word in words))
+    rows: List[List[Word]] = []
+    # Band of the last word's top -> indices of the rows ending there
+    bands: Dict[int, Set[int]] = defaultdict(set)
+    for word in sorted(words, key=lambda w: w.left):
+        best, best_overlap = None, 0.0
+        for key in range((word.top - band) // band, (word.top + word.height) // band + 1):
+            for index in bands.get(key, ()):
+                last = rows[index][-1]
+                if last.left >= word.left:
+                    continue
+                overlap = min(last.top + last.height, word.top + word.height) - max(last.top, word.top)
+                if overlap > 0.5 * min(last.height, word.height) and (
+                        overlap > best_overlap or (overlap == best_overlap and index < best)):
+                    # Ties go to the row started first
+                    best, best_overlap = index, overlap
+        if best is None:
+            best = len(rows)
+            rows.append([word])
+        else:
+            bands[rows[best][-1].top // band].discard(best)
+            rows[best].append(word)
+        bands[word.top // band].add(best)
+
+    rows.sort(key=lambda row: sum(w.centre_y for w in row) / len(row))
+    return rows
+
+class TableParser:
+    """Reads receipt item tables from word boxes by column position.
+
+    The header row fixes where each column sits. Words under a text column's
+    header belong to it, other numbers go to the nearest numeric column, and
+    rows without a key (HSN code, serial number) are folded into the record
+    above while it still lacks prices. Rows are read in a single pass.
+    """
+
+    def __init__(self, columns: List[TableColumn], key_column: str, key_pattern: str,
+                 end_pattern: str, min_header_columns: int = 3):
+        self.columns = columns
+        self.key_column = key_column
+        self.key_pattern: Pattern = re.compile(key_pattern)
+        self.end_pattern: Pattern = re.compile(end_pattern, re.IGNORECASE)
+        self.min_header_columns = min_header_columns
+        self._headers = [(column, re.compile(column.header, re.IGNORECASE)) for column in columns]
+        self._numeric = {column.name: column.numeric for column in columns}
+
+    def parse(self, data: dict) -> List[TableRow]:
+        """Table records in page order; empty when no header row is found"""
+        rows = group_rows(words_from_data(data))
+
+        for index, row in enumerate(rows):
+            positions = self._match_header(row)
+            if len(positions) >= self.min_header_columns:
+                return self._read_rows(rows[index + 1:], positions)
+        return []
+
+    def _match_header(self, row: List[Word]) -> Dict[str, Word]:
+        positions: Dict[str, Word] = {}
+        for word in row:
+            for column, pattern in self._headers:
+                if column.name not in positions and pattern.search(word.text):
+                    positions[column.name] = word
+                    break
+        return positions
+
+    def _read_rows(self, rows: List[List[Word]], positions: Dict[str, Word]) -> List[TableRow]:
+        numeric = [(name, word.centre_x) for name, word in positions.items() if self._numeric[name]]
+        text_columns = sorted(((name, word) for name, word in positions.items() if not self._numeric[name]),
+                              key=lambda item: item[1].left)
+        # A text column spans from its header to where the next header starts
+        text_bounds = []
+        for name, header in text_columns:
+            following = [word.left for word in positions.values() if word.left > header.left]
+            text_bounds.append((name, header.left, min(following) if following else float('inf')))
+
+        records: List[TableRow] = []
+        for words in rows:
+            line = ' '.join(word.text for word in words)
+            if self.end_pattern.search(line):
+                break
+
+            row = self._assign(words, numeric, text_bounds)
+            if row.key is not None:
+                records.append(row)
+            elif records and not records[-1].has_numbers(ignore=self.key_column):
+                # Prices (or the rest of the name) printed on the next line
+                records[-1].extend(row)
+        return records
+
+    def _assign(self, words: List[Word], numeric: list, text_bounds: list) -> TableRow:
+        row = TableRow(
+            top=min(word.top for word in words),
+            bottom=max(word.top + word.height for word in words),
+            left=min(word.left for word in words),
+            right=max(word.right for word in words)
+        )
+        for word in words:
+            if not re.search(r'\w', word.text):
+                continue
+
+            # Numbers wholly inside a text column are part of it ("FORCE 10 TOILET");
+            # right-aligned prices may start under the text column but end past it
+            edge = word.right if word.is_number else word.left
+            column = next((name for name, start, end in text_bounds
+                           if word.centre_x >= start and edge < end), None)
+            if column is None and word.is_number and numeric:
+                column = min(numeric, key=lambda item: abs(item[1] - word.centre_x))[0]
+            elif column is None and not word.is_number:
+                column = next((name for name, _, end in text_bounds if word.left < end), None)
+            if column is None:
+                continue
+
+            if column == self.key_column and row.key is None:
+                key = KEY_TRIM.sub('', word.text)
+                if self.key_pattern.fullmatch(key):
+                    row.key = key
+                    continue
+            row.cells.setdefault(column, []).append(word)
+        return row
+
@@ -0,0 +1,119 @@
+import re
+from typing import Dict, FrozenSet, List, Optional, Sequence, Set, Tuple
+from .base_processor import BaseReceiptProcessor
+from .keyword_scanner import KeywordScanner
+
+# Shorter literals would match almost everywhere and filter nothing
+MIN_LITERAL = 3
+
+class VendorIndex:
+    """Store-name patterns of every registered processor, indexed for one scan.
+
+    The literal runs of each pattern ("avenue" and "supermarts" in
+    avenue\\s*supermarts) go into a KeywordScanner that finds all of them in
+    a single pass over the text, so the pass costs about the same however
+    many stores are registered. Only processors with a pattern whose literals
+    all occur in the text (or with a pattern no literals can be taken from)
+    then run their own patterns, and the number of matches is the
+    processor's score.
+    """
+
+    def __init__(self, processors: Sequence[BaseReceiptProcessor]):
+        self.processors: List[BaseReceiptProcessor] = list(processors)
+        self._patterns = [re.compile('|'.join(processor.patterns)) if processor.patterns else None
+                          for processor in self.processors]
+        # Longest literal of a pattern -> (processor, all literals of the pattern)
+        self._entries: Dict[str, List[Tuple[int, FrozenSet[str]]]] = {}
+        self._literals: Set[str] = set()
+        # Processors with a pattern no literal can be taken from; always checked
+        self._unindexed: Set[int] = set()
+        for index, processor in enumerate(self.processors):
+            for pattern in processor.patterns:
+                literals = required_literals(pattern)
+                if not literals:
+                    self._unindexed.add(index)
+                    continue
+                key = max(literals, key=len)
+                self._entries.setdefault(key, []).append((index, frozenset(literals)))
+                self._literals.update(literals)
+        self._scanner = KeywordScanner(self._literals)
+
+    def _candidates(self, text_lower: str) -> List[int]:
+        candidates = set(self._unindexed)
+        found = self._scanner.find(text_lower)
+        for key in found:
+            for index, literals in self._entries.get(key, ()):
+                if literals <= found:
+                    candidates.add(index)
+        return sorted(candidates)
+
+    def _score(self, index: int, text_lower: str) -> int:
+        return sum(1 for _ in self._patterns[index].finditer(text_lower))
+
+    def scores(self, text_lower: str) -> Dict[str, int]:
+        """Store name matches per vendor in lowercase text; vendors without a match are left out"""
+        scores = {}
+        for index in self._candidates(text_lower):
+            count = self._score(index, text_lower)
+            if count:
+                scores[self.processors[index].name] = count
+        return scores
+
+    def best(self, text_lower: str) -> Optional[BaseReceiptProcessor]:
+        """The vendor with the most matches, the first registered on a tie, None without any"""
+        best, top = None, 0
+        for index in self._candidates(text_lower):
+            count = self._score(index, text_lower)
+            if count > top:
+                best, top = self.processors[index], count
+        return best
+
+def required_literals(pattern: str) -> List[str]:
+    """Runs of plain characters every match of pattern contains, [] if unsure.
+
+    Only simple patterns are analysed: groups and alternation give [], and
+    runs shorter than MIN_LITERAL are left out.
+    """
+    if '|' in pattern or '(' in pattern:
+        return []
+    runs, run, i = [], '', 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == '\\':
+            # Escapes and character classes end the run
+            runs.append(run)
+            run = ''
+            i += 2
+            continue
+        if char == '[':
+            runs.append(run)
+            run = ''
+            i = _class_end(pattern, i)
+            continue
+        if char in '?*{':
+            # The quantified character is optional
+            runs.append(run[:-1])
+            run = ''
+            if char == '{':
+                close = pattern.find('}', i)
+                i = close if close != -1 else len(pattern)
+        elif char in '+.^$':
+            runs.append(run)
+            run = ''
+        else:
+            run += char
+        i += 1
+    runs.append(run)
+    return [run for run in runs if len(run) >= MIN_LITERAL]
+
+def _class_end(pattern: str, start: int) -> int:
+    """Index just past the character class opening at start"""
+    i = start + 1
+    # A ']' first in the class (after any '^') is a literal, as is an escaped one
+    if i < len(pattern) and pattern[i] == '^':
+        i += 1
+    if i < len(pattern) and pattern[i] == ']':
+        i += 1
+    while i < len(pattern) and pattern[i] != ']':
+        i += 2 if pattern[i] == '\\' else 1
+    return i + 1
@@ -0,0 +1,140 @@
+import os
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
+
+# Job lifecycle
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+
+PENDING_STATUSES = (JOB_QUEUED, JOB_RUNNING)
+FINISHED_STATUSES = (JOB_COMPLETED, JOB_FAILED)
+
+class JobStore:
+    """Receipt processing jobs persisted in SQLite.
+
+    Each call opens its own connection so the API process and the OCR worker
+    processes can all update the same database. Finished jobs are deleted
+    once they are older than retention seconds (0 keeps them forever).
+    """
+
+    def __init__(self, db_path: str, retention: float = 0):
+        self.db_path = db_path
+        self.retention = retention
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, status TEXT NOT NULL, stage TEXT NOT NULL, "
+                "image BLOB, result TEXT, error TEXT, "
+                "created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_by_status ON jobs (status, updated_at)")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Short-lived connection that commits on success and always closes"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _execute(self, sql: str, params: tuple):
+        with self._connect() as conn:
+            conn.execute(sql, params)
+
+    def _finish(self, sql: str, params: tuple):
+        """Record a job's outcome and drop finished jobs past their retention"""
+        with self._connect() as conn:
+            conn.execute(sql, params)
+            self._prune(conn)
+
+    def _prune(self, conn: sqlite3.Connection) -> int:
+        if self.retention <= 0:
+            return 0
+        cursor = conn.execute(
+            "DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?",
+            (*FINISHED_STATUSES, time.time() - self.retention)
+        )
+        return cursor.rowcount
+
+    def prune(self) -> int:
+        """Delete finished jobs older than the retention period, returning how many"""
+        with self._connect() as conn:
+            return self._prune(conn)
+
+    def create(self, image_bytes: bytes) -> str:
+        """Queue a new job for an image and return its id"""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        self._execute(
+            "INSERT INTO jobs (id, status, stage, image, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (job_id, JOB_QUEUED, JOB_QUEUED, image_bytes, now, now)
+        )
+        return job_id
+
+    def set_running(self, job_id: str):
+        self._execute(
+            "UPDATE jobs SET status = ?, updated_at = ? WHERE id = ?",
+            (JOB_RUNNING, time.time(), job_id)
+        )
+
+    def set_stage(self, job_id: str, stage: str):
+        """Record the processing stage a job has reached"""
+        self._execute(
+            "UPDATE jobs SET stage = ?, updated_at = ? WHERE id = ?",
+            (stage, time.time(), job_id)
+        )
+
+    def complete(self, job_id: str, result_json: str):
+        """Store the result and drop the image, which is no longer needed"""
+        self._finish(
+            "UPDATE jobs SET status = ?, stage = 'done', result = ?, image = NULL, updated_at = ? WHERE id = ?",
+            (JOB_COMPLETED, result_json, time.time(), job_id)
+        )
+
+    def fail(self, job_id: str, error: str):
+        self._finish(
+            "UPDATE jobs SET status = ?, error = ?, image = NULL, updated_at = ? WHERE id = ?",
+            (JOB_FAILED, error, time.time(), job_id)
+        )
+
+    def get(self, job_id: str) -> Optional[dict]:
+        """Job status and result, without the image"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT id, status, stage, result, error, created_at, updated_at FROM jobs WHERE id = ?",
+                (job_id,)
+            ).fetchone()
+        if not row:
+            return None
+        return {
+            "job_id": row[0],
+            "status": row[1],
+            "stage": row[2],
+            "result": row[3],
+            "error": row[4],
+            "created_at": row[5],
+            "updated_at": row[6]
+        }
+
+    def get_image(self, job_id: str) -> Optional[bytes]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT image FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return row[0] if row else None
+
+    def pending(self) -> List[str]:
+        """Ids of jobs that were queued or running, oldest first"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id FROM jobs WHERE status IN (?, ?) ORDER BY created_at",
+                PENDING_STATUSES
+            ).fetchall()
+        return [row[0] for row in rows]
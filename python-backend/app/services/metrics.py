@@ -0,0 +1,117 @@
+import bisect
+import math
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+from ..models.receipt import ReceiptProcessResponse
+from ..utils.stage_timer import StageTimer
+
+# Bucket upper bounds in seconds, from sub-millisecond parsing to slow tesseract passes
+STAGE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# (name, type, help, value) of a metric read from elsewhere at scrape time
+ExternalMetric = Tuple[str, str, str, float]
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _label_text(names: Sequence[str], values: Sequence[str]) -> str:
+    return ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+def _bound_text(bound: float) -> str:
+    return '+Inf' if math.isinf(bound) else repr(bound)
+
+class Histogram:
+    """Latency histogram per label set, rendered with cumulative buckets as Prometheus expects"""
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str],
+                 buckets: Sequence[float] = STAGE_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.bounds = tuple(sorted(buckets)) + (math.inf,)
+        # Label values -> (count per bucket, not cumulative; [sum, count])
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float, *label_values: str):
+        index = bisect.bisect_left(self.bounds, seconds)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = ([0] * len(self.bounds), [0.0, 0])
+            counts, totals = series
+            counts[index] += 1
+            totals[0] += seconds
+            totals[1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((labels, list(counts), list(totals)) for labels, (counts, totals) in self._series.items())
+        for label_values, counts, (total, count) in series:
+            labels = _label_text(self.label_names, label_values)
+            bucket_labels = f'{labels},' if labels else ''
+            cumulative = 0
+            for bound, bucket_count in zip(self.bounds, counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{{{bucket_labels}le="{_bound_text(bound)}"}} {cumulative}')
+            series_labels = f'{{{labels}}}' if labels else ''
+            lines.append(f"{self.name}_sum{series_labels} {total!r}")
+            lines.append(f"{self.name}_count{series_labels} {count}")
+        return lines
+
+def receipt_labels(result: ReceiptProcessResponse) -> Tuple[str, str]:
+    """(vendor, OCR config) of a result, "none" for what a failed receipt never got"""
+    data = result.data
+    vendor = data.vendor if data and data.vendor else "none"
+    psm = data.ocr_stats.config if data and data.ocr_stats and data.ocr_stats.config else "none"
+    return vendor, psm
+
+def receipt_outcome(result: ReceiptProcessResponse) -> str:
+    if not result.success:
+        return "error"
+    if result.data and result.data.ocr_stats and result.data.ocr_stats.cache_hit:
+        return "cache_hit"
+    return "success"
+
+class ReceiptMetrics:
+    """Per-stage and end-to-end receipt latency, exported in the Prometheus text format.
+
+    Stage samples come from a StageTimer, possibly filled in a worker
+    process, and are labeled with the vendor and OCR config of the receipt
+    once its result is known. Stages tied to one OCR config (a tesseract
+    call, parsing one candidate's text) keep that config instead.
+    """
+
+    def __init__(self, buckets: Sequence[float] = STAGE_BUCKETS):
+        self.stage_seconds = Histogram(
+            "receipt_stage_seconds",
+            "Time spent in each stage of processing a receipt",
+            ("stage", "vendor", "psm"),
+            buckets
+        )
+        self.receipt_seconds = Histogram(
+            "receipt_processing_seconds",
+            "Time from receiving a receipt to its result, by outcome",
+            ("vendor", "psm", "outcome"),
+            buckets
+        )
+
+    def record(self, timer: StageTimer, result: ReceiptProcessResponse):
+        """Record a finished receipt's stage samples and end-to-end time"""
+        vendor, psm = receipt_labels(result)
+        for stage, seconds, stage_psm in list(timer.samples):
+            self.stage_seconds.observe(seconds, stage, vendor, stage_psm or psm)
+        self.receipt_seconds.observe(timer.elapsed(), vendor, psm, receipt_outcome(result))
+
+    def observe(self, stage: str, seconds: float, result: ReceiptProcessResponse):
+        """Record one stage that ran after the result was recorded, such as serialization"""
+        vendor, psm = receipt_labels(result)
+        self.stage_seconds.observe(seconds, stage, vendor, psm)
+
+    def render(self, external: Optional[List[ExternalMetric]] = None) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines = self.stage_seconds.render() + self.receipt_seconds.render()
+        for name, metric_type, help_text, value in external or []:
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}", f"{name} {value}"]
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,91 @@
+import logging
+from typing import Dict, List, Optional, Tuple
+from ..processors.base_processor import BaseReceiptProcessor
+from ..processors.processor_factory import ProcessorFactory
+from ..processors.receipt_document import ReceiptDocument
+from ..processors.records import ReceiptRecord
+from ..utils.ocr_service import OCRCascade, OCRResult
+from ..utils.stage_timer import StageTimer
+from .psm_stats import PSMStats
+from .row_repair import RowRepairer
+
+logger = logging.getLogger(__name__)
+
+class ReceiptCascade(OCRCascade):
+    """OCR cascade that stops once a candidate is confident and its items add up.
+
+    Configs are ordered by how often they won for the detected vendor. Parsed
+    candidates are kept so the winner does not need to be parsed again. When a
+    confident candidate does not add up, its misread rows are re-OCR'd first,
+    which is much cheaper than another full page pass.
+    """
+
+    def __init__(self, processor_factory: ProcessorFactory, psm_stats: PSMStats,
+                 confidence_threshold: float, reconcile_tolerance: float,
+                 row_repairer: Optional[RowRepairer] = None, timer: Optional[StageTimer] = None):
+        self.processor_factory = processor_factory
+        self.psm_stats = psm_stats
+        self.confidence_threshold = confidence_threshold
+        self.reconcile_tolerance = reconcile_tolerance
+        self.row_repairer = row_repairer
+        # Vendor detection, item extraction and row re-reads of this receipt
+        self.timer = timer or StageTimer()
+        self.vendor: Optional[str] = None
+        self._documents: Dict[str, ReceiptDocument] = {}
+        self._parsed: Dict[str, Tuple[BaseReceiptProcessor, ReceiptRecord]] = {}
+
+    def next_configs(self, tried: List[OCRResult]) -> List[str]:
+        done = {candidate.config for candidate in tried}
+        return [config for config in self.psm_stats.order(self.vendor) if config not in done]
+
+    def accept(self, candidate: OCRResult) -> bool:
+        if not candidate.text.strip():
+            return False
+
+        processor, parsed = self.parse(candidate)
+        document = self.document(candidate)
+        # Later configs are ordered for the vendor this text looks like
+        self.vendor = processor.name
+
+        if candidate.confidence < self.confidence_threshold:
+            logger.debug("OCR cascade: %s confidence %.2f below threshold", candidate.config, candidate.confidence)
+            return False
+
+        if processor.items_reconcile(parsed, self.reconcile_tolerance, document):
+            return True
+
+        if self.row_repairer is not None:
+            candidate.line_calls, candidate.repaired_rows = self.row_repairer.repair(
+                processor, parsed, candidate.words, candidate.page, self.timer
+            )
+            if candidate.repaired_rows and processor.items_reconcile(parsed, self.reconcile_tolerance, document):
+                logger.debug("OCR cascade: %s reconciled after re-reading %d rows", candidate.config, candidate.line_calls)
+                return True
+
+        logger.debug("OCR cascade: %s items do not reconcile with the total", candidate.config)
+        return False
+
+    def document(self, candidate: OCRResult) -> ReceiptDocument:
+        """The candidate's text and word boxes, shared by vendor detection and parsing"""
+        document = self._documents.get(candidate.config)
+        if document is None:
+            document = ReceiptDocument(candidate.text, candidate.words)
+            self._documents[candidate.config] = document
+        return document
+
+    def parse(self, candidate: OCRResult) -> Tuple[BaseReceiptProcessor, ReceiptRecord]:
+        """Parse a candidate's text, reusing earlier work for the same config"""
+        cached = self._parsed.get(candidate.config)
+        if cached is None:
+            document = self.document(candidate)
+            with self.timer.stage('vendor_detection', candidate.config):
+                processor = self.processor_factory.get_processor(document)
+            with self.timer.stage('item_extraction', candidate.config):
+                cached = (processor, processor.process_receipt(document))
+            self._parsed[candidate.config] = cached
+        return cached
+
+    def record(self, result: OCRResult):
+        """Remember the winning config for the vendor when the cascade stopped early"""
+        if result.accepted and result.config:
+            self.psm_stats.record_win(self.vendor, result.config)
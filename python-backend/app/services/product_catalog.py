@@ -0,0 +1,151 @@
+import csv
+import json
+import re
+import threading
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set
+import numpy as np
+from ..models.product import CatalogProduct, ProductMatch
+
+NON_ALPHANUMERIC = re.compile(r'[^a-z0-9]+')
+
+def trigrams(name: str) -> FrozenSet[str]:
+    """Character trigrams of each word, padded like pg_trgm ("  n", " na", "nan", ..., "ni ")"""
+    grams = set()
+    for word in NON_ALPHANUMERIC.sub(' ', name.lower()).split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+class ProductCatalog:
+    """Canonical product names indexed by trigram for fuzzy matching of OCR item names.
+
+    Each trigram maps to the products containing it, and products are scored
+    by trigram similarity (shared / all distinct trigrams of the pair), so
+    misreads such as "NANDINT PASTE-500m" still find "Nandini Paste 500ml".
+    Products live in numbered slots; a query concatenates the slot arrays of
+    its trigrams and counts shared trigrams for every product at once with
+    numpy, however common the trigrams are. Slot arrays are rebuilt lazily
+    for the trigrams an update touched.
+    """
+
+    def __init__(self, min_score: float = 0.3):
+        self.min_score = min_score
+        self._products: Dict[str, CatalogProduct] = {}
+        self._grams: Dict[str, FrozenSet[str]] = {}
+        self._slots: Dict[str, int] = {}
+        self._slot_ids: List[Optional[str]] = []
+        self._free_slots: List[int] = []
+        # Trigram count of the product in each slot
+        self._sizes = np.zeros(0, dtype=np.float64)
+        self._postings: Dict[str, Set[int]] = {}
+        self._arrays: Dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._products)
+
+    def upsert(self, products: Iterable[CatalogProduct]):
+        """Add products or replace the ones with the same id"""
+        with self._lock:
+            for product in products:
+                self._remove(product.id)
+                grams = trigrams(product.name)
+                slot = self._take_slot(product.id)
+                self._products[product.id] = product
+                self._grams[product.id] = grams
+                self._sizes[slot] = len(grams)
+                for gram in grams:
+                    self._postings.setdefault(gram, set()).add(slot)
+                    self._arrays.pop(gram, None)
+
+    def remove(self, product_id: str) -> bool:
+        """Drop a product from the index, returning whether it was there"""
+        with self._lock:
+            return self._remove(product_id)
+
+    def _take_slot(self, product_id: str) -> int:
+        if self._free_slots:
+            slot = self._free_slots.pop()
+            self._slot_ids[slot] = product_id
+        else:
+            slot = len(self._slot_ids)
+            self._slot_ids.append(product_id)
+            if slot >= len(self._sizes):
+                self._sizes = np.concatenate([self._sizes, np.zeros(max(1024, len(self._sizes)))])
+        self._slots[product_id] = slot
+        return slot
+
+    def _remove(self, product_id: str) -> bool:
+        if product_id not in self._products:
+            return False
+        slot = self._slots.pop(product_id)
+        for gram in self._grams.pop(product_id):
+            postings = self._postings[gram]
+            postings.discard(slot)
+            if not postings:
+                del self._postings[gram]
+            self._arrays.pop(gram, None)
+        del self._products[product_id]
+        self._slot_ids[slot] = None
+        self._sizes[slot] = 0
+        self._free_slots.append(slot)
+        return True
+
+    def _posting_array(self, gram: str) -> np.ndarray:
+        array = self._arrays.get(gram)
+        if array is None:
+            array = np.fromiter(self._postings[gram], dtype=np.intp, count=len(self._postings[gram]))
+            self._arrays[gram] = array
+        return array
+
+    def match(self, name: str, min_score: Optional[float] = None) -> ProductMatch:
+        """Best catalog product for one item name; product_id is None below min_score"""
+        min_score = self.min_score if min_score is None else min_score
+        query = trigrams(name)
+        with self._lock:
+            arrays = [self._posting_array(gram) for gram in query if gram in self._postings]
+            if not arrays:
+                return ProductMatch(name=name)
+
+            shared = np.bincount(np.concatenate(arrays))
+            sizes = self._sizes[:len(shared)]
+            # Products sharing nothing score 0, as do free slots
+            scores = shared / (len(query) + sizes - shared)
+            best_score = float(scores.max())
+            # Ties go to the shorter name, then the lower id
+            best_id = min((sizes[slot], self._slot_ids[slot]) for slot in np.flatnonzero(scores == best_score))[1]
+            product = self._products[best_id]
+
+        if best_score < min_score:
+            return ProductMatch(name=name, score=round(best_score, 4))
+        return ProductMatch(name=name, product_id=product.id, product_name=product.name,
+                            category=product.category, score=round(best_score, 4))
+
+    def match_many(self, names: List[str], min_score: Optional[float] = None) -> List[ProductMatch]:
+        """Best product for each item name of a receipt, in order; repeated names are matched once"""
+        matches: Dict[str, ProductMatch] = {}
+        for name in names:
+            if name not in matches:
+                matches[name] = self.match(name, min_score)
+        return [matches[name] for name in names]
+
+    def load(self, path: str) -> int:
+        """Add the products of a CSV (id,name[,category] header) or JSON snapshot, returning how many"""
+        products = _read_snapshot(path)
+        self.upsert(products)
+        return len(products)
+
+def _read_snapshot(path: str) -> List[CatalogProduct]:
+    """Products of a snapshot file: CSV with a header row, or a JSON list of {id, name, category}"""
+    with open(path, encoding='utf-8', newline='') as f:
+        if path.lower().endswith('.json'):
+            data = json.load(f)
+            if not isinstance(data, list):
+                raise ValueError(f"{path}: expected a list of products")
+            return [CatalogProduct.model_validate(product) for product in data]
+
+        reader = csv.DictReader(f)
+        if not reader.fieldnames or not {'id', 'name'} <= set(reader.fieldnames):
+            raise ValueError(f"{path}: expected a CSV header with id and name columns")
+        return [CatalogProduct(id=row['id'], name=row['name'], category=row.get('category') or None)
+                for row in reader]
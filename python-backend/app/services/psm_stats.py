@@ -0,0 +1,36 @@
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+class PSMStats:
+    """Tracks which OCR config won for each vendor so the cascade tries it first.
+
+    Win counts live in memory in the process that runs the cascade, so each
+    pool worker learns on its own and starts over after a restart. The
+    winning configs across all workers are visible on /metrics as
+    receipt_processing_seconds_count by vendor and psm.
+    """
+
+    def __init__(self, default_order: List[str]):
+        self.default_order = list(default_order)
+        self._wins: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self._lock = threading.Lock()
+
+    def record_win(self, vendor: Optional[str], config: str):
+        """Remember that config produced the accepted result for vendor"""
+        with self._lock:
+            self._wins[vendor or "unknown"][config] += 1
+
+    def order(self, vendor: Optional[str] = None) -> List[str]:
+        """Configs ordered by past wins for vendor (or all vendors), best first"""
+        with self._lock:
+            if vendor:
+                wins = dict(self._wins.get(vendor, {}))
+            else:
+                wins = defaultdict(int)
+                for vendor_wins in self._wins.values():
+                    for config, count in vendor_wins.items():
+                        wins[config] += count
+
+        # Stable sort keeps the default order for configs with equal wins
+        return sorted(self.default_order, key=lambda config: -wins.get(config, 0))
@@ -1,22 +1,396 @@
-from typing import Optional
-from ..models.receipt import ParsedReceiptData, ReceiptProcessResponse
-from ..utils.ocr_service import OCRService
+import asyncio
+import logging
+import os
+import time
+from typing import AsyncIterator, Callable, Dict, List, Optional, Set, Tuple
+from ..models.receipt import JobStatusResponse, OCRStats, ParsedReceiptData, ReceiptItem, ReceiptProcessResponse
+from ..utils.json_encoding import receipt_content
+from ..utils.ocr_service import OCR_CONFIGS, OCRResult, OCRService, decode_base64
+from ..utils.stage_timer import StageSample, StageTimer
 from ..processors.processor_factory import ProcessorFactory
+from ..processors.records import ReceiptRecord
+from .ocr_cascade import ReceiptCascade
+from .psm_stats import PSMStats
+from .job_store import JOB_COMPLETED, JOB_FAILED, JobStore
+from .metrics import ExternalMetric, ReceiptMetrics
+from .result_cache import ResultCache, cache_key
+from .row_repair import RowRepairer
+from .worker_pool import WorkerPool
+from .. import config
+
+# Service instance owned by each worker process
+_worker_service: Optional["ReceiptService"] = None
+
+def _init_worker():
+    """Create the per-process service when a pool worker starts"""
+    global _worker_service
+    # Spawned workers start with logging unconfigured
+    logging.basicConfig(level=config.LOG_LEVEL)
+    # Cap tesseract's OpenMP threads so parallel candidates don't oversubscribe cores
+    os.environ["OMP_THREAD_LIMIT"] = str(config.OCR_TESSERACT_THREADS)
+    _worker_service = ReceiptService()
+    # Load the language model now rather than on the first receipt
+    _worker_service.ocr_service.warm_up()
+
+def _worker_timer(submitted_at: float) -> StageTimer:
+    """Timer for a receipt in a worker, starting with how long it waited for one"""
+    timer = StageTimer()
+    timer.add('queue_wait', max(0.0, time.time() - submitted_at))
+    return timer
+
+def _process_image_in_worker(image_bytes: bytes,
+                             submitted_at: float) -> Tuple[ReceiptProcessResponse, List[StageSample]]:
+    timer = _worker_timer(submitted_at)
+    return _worker_service.process_image(image_bytes, timer=timer), timer.samples
+
+def _test_ocr_in_worker(image_bytes: bytes) -> dict:
+    return _worker_service.test_ocr_image(image_bytes)
+
+def _process_job_in_worker(job_id: str, db_path: str,
+                           submitted_at: float) -> Tuple[ReceiptProcessResponse, List[StageSample]]:
+    """Process a stored job, recording each stage in the job database"""
+    timer = _worker_timer(submitted_at)
+    store = JobStore(db_path)
+    image_bytes = store.get_image(job_id)
+    if image_bytes is None:
+        return ReceiptProcessResponse(success=False, error="Job image not found"), timer.samples
+    result = _worker_service.process_image(image_bytes, progress=lambda stage: store.set_stage(job_id, stage),
+                                           timer=timer)
+    return result, timer.samples
 
 class ReceiptService:
     
-    def __init__(self):
+    def __init__(self, pool: Optional[WorkerPool] = None, cache: Optional[ResultCache] = None,
+                 job_store: Optional[JobStore] = None, job_concurrency: Optional[int] = None,
+                 job_db_path: Optional[str] = None, job_retention: float = 0):
         self.ocr_service = OCRService()
         self.processor_factory = ProcessorFactory()
+        self.psm_stats = PSMStats(OCR_CONFIGS)
+        self.row_repairer = RowRepairer(
+            self.ocr_service.read_lines,
+            max_rows=config.OCR_REPAIR_MAX_ROWS,
+            scale=config.OCR_REPAIR_SCALE
+        )
+        self.pool = pool
+        self.cache = cache
+        self.job_store = job_store
+        # Database opened by start() when no store was given, so creating the service touches no files
+        self.job_db_path = job_db_path
+        self.job_retention = job_retention
+        # Stage latency histograms, filled in the main process from worker timings
+        self.metrics = ReceiptMetrics()
+        # Jobs running in this process, signalled when they finish (for long-polling)
+        self._job_events: Dict[str, asyncio.Event] = {}
+        self._job_tasks: Set[asyncio.Task] = set()
+        # Jobs and batch images wait here for their turn so background work never
+        # takes every pool slot, however many batches and jobs run at once
+        self._background_slots = asyncio.Semaphore(self._background_limit(job_concurrency))
+        # Cached results are only valid for this pipeline version and set of stores
+        self.cache_version = f"{config.PIPELINE_VERSION}:{','.join(self.get_supported_stores())}"
+    
+    @classmethod
+    def from_config(cls) -> "ReceiptService":
+        """Create a service with the worker pool, result cache and job database described by config"""
+        pool = WorkerPool(
+            max_workers=config.OCR_WORKERS,
+            max_queue=config.OCR_QUEUE_SIZE,
+            retry_after=config.OCR_RETRY_AFTER,
+            initializer=_init_worker
+        )
+        cache = ResultCache(
+            max_bytes=config.RESULT_CACHE_MAX_BYTES,
+            db_path=config.RESULT_CACHE_DB_PATH or None
+        )
+        return cls(pool=pool, cache=cache, job_concurrency=config.JOB_CONCURRENCY,
+                   job_db_path=config.JOB_DB_PATH, job_retention=config.JOB_RETENTION)
+    
+    def _background_limit(self, job_concurrency: Optional[int]) -> int:
+        """Jobs and batch images allowed on the pool at once, leaving at least one slot for interactive requests"""
+        if not self.pool:
+            return 1
+        limit = job_concurrency or self.pool.max_workers
+        return max(1, min(limit, self.pool.capacity - 1))
+    
+    def start(self):
+        """Start background workers, open the job database and resume jobs interrupted by a restart"""
+        if self.pool:
+            self.pool.start()
+        if self.job_store is None and self.job_db_path:
+            self.job_store = JobStore(self.job_db_path, retention=self.job_retention)
+        if self.job_store:
+            expired = self.job_store.prune()
+            if expired:
+                print(f"Removed {expired} expired receipt jobs")
+            pending = self.job_store.pending()
+            if pending:
+                print(f"Resuming {len(pending)} unfinished receipt jobs")
+            for job_id in pending:
+                self._schedule_job(job_id)
+    
+    def shutdown(self):
+        """Stop background workers"""
+        if self.pool:
+            self.pool.shutdown()
+        if self.cache:
+            self.cache.close()
+    
+    async def process_receipt_async(self, base64_image: str) -> ReceiptProcessResponse:
+        """Process a receipt on the worker pool without blocking the event loop"""
+        timer = StageTimer()
+        try:
+            with timer.stage('base64_decode'):
+                image_bytes = decode_base64(base64_image)
+        except Exception as e:
+            return self._finish(timer, self._decode_error(e))
+        
+        return await self.process_image_async(image_bytes, timer=timer)
+    
+    async def process_image_async(self, image_bytes: bytes, wait: bool = False,
+                                  timer: Optional[StageTimer] = None) -> ReceiptProcessResponse:
+        """Process raw image bytes on the worker pool without blocking the event loop.
+        
+        With wait=True the call waits for a free worker instead of being
+        rejected when the queue is full.
+        """
+        timer = timer or StageTimer()
+        cached = self._cached_result(image_bytes)
+        if cached:
+            return self._finish(timer, cached)
+        
+        if not self.pool:
+            result = self.process_image(image_bytes, timer=timer)
+        else:
+            result, samples = await self.pool.submit(_process_image_in_worker, image_bytes, time.time(), wait=wait)
+            timer.extend(samples)
+        
+        self._store_result(image_bytes, result)
+        return self._finish(timer, result)
+    
+    async def process_batch(self, images: List[Tuple[str, bytes]],
+                            include: Optional[Set[str]] = None) -> AsyncIterator[dict]:
+        """Process many images concurrently, yielding each result as soon as it finishes.
+        
+        Results arrive in completion order and carry the image's index and
+        name, with only the include data fields when given. A failing image
+        yields an error entry instead of aborting the batch.
+        """
+        async def run(index: int, name: str, image_bytes: bytes) -> dict:
+            # Shared with jobs and other batches, leaving queue slots for interactive requests
+            async with self._background_slots:
+                try:
+                    result = await self.process_image_async(image_bytes, wait=True)
+                except Exception as e:
+                    result = ReceiptProcessResponse(
+                        success=False,
+                        error=f"Failed to process receipt: {str(e)}"
+                    )
+            return {"index": index, "filename": name, **receipt_content(result, include)}
+        
+        tasks = [asyncio.create_task(run(index, name, image_bytes))
+                 for index, (name, image_bytes) in enumerate(images)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # Stop outstanding work if the client went away
+            for task in tasks:
+                task.cancel()
+    
+    async def test_ocr_async(self, base64_image: str) -> dict:
+        """Run OCR on the worker pool without blocking the event loop"""
+        try:
+            image_bytes = decode_base64(base64_image)
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+        
+        cached = self._cached_result(image_bytes)
+        if cached:
+            return {
+                "success": True,
+                "text": cached.data.raw_text or "",
+                "confidence": cached.data.confidence,
+                "ocr_stats": cached.data.ocr_stats.model_dump()
+            }
+        
+        if not self.pool:
+            return self.test_ocr_image(image_bytes)
+        return await self.pool.submit(_test_ocr_in_worker, image_bytes)
     
     def process_receipt(self, base64_image: str) -> ReceiptProcessResponse:
-        """Process a receipt image and extract structured data"""
+        """Process a base64 encoded receipt image and extract structured data"""
+        timer = StageTimer()
+        try:
+            with timer.stage('base64_decode'):
+                image_bytes = decode_base64(base64_image)
+        except Exception as e:
+            return self._finish(timer, self._decode_error(e))
+        
+        cached = self._cached_result(image_bytes)
+        if cached:
+            return self._finish(timer, cached)
+        
+        result = self.process_image(image_bytes, timer=timer)
+        self._store_result(image_bytes, result)
+        return self._finish(timer, result)
+    
+    def _finish(self, timer: StageTimer, result: ReceiptProcessResponse) -> ReceiptProcessResponse:
+        """Record a receipt's stage timings and hand its result back"""
+        self.metrics.record(timer, result)
+        return result
+    
+    def metrics_text(self) -> str:
+        """Stage latency histograms plus cache and queue counters in the Prometheus text format"""
+        external: List[ExternalMetric] = []
+        if self.cache:
+            stats = self.cache.stats()
+            external += [
+                ("receipt_cache_hits_total", "counter", "Receipts served from the result cache", stats["hits"]),
+                ("receipt_cache_misses_total", "counter", "Result cache lookups that missed", stats["misses"])
+            ]
+        if self.pool:
+            external += [
+                ("receipt_queue_depth", "gauge", "Admitted receipts waiting for a worker", self.pool.queue_depth),
+                ("receipt_in_flight", "gauge", "Receipts admitted to the worker pool", self.pool.in_flight),
+                ("receipt_rejected_total", "counter", "Receipts rejected because the queue was full",
+                 self.pool.rejected)
+            ]
+        return self.metrics.render(external)
+    
+    def _decode_error(self, error: Exception) -> ReceiptProcessResponse:
+        return ReceiptProcessResponse(
+            success=False,
+            error=f"Invalid image data: {str(error)}"
+        )
+    
+    def _cached_result(self, image_bytes: bytes) -> Optional[ReceiptProcessResponse]:
+        """Previously parsed result for identical image bytes, skipping OCR entirely"""
+        if not self.cache:
+            return None
+        
+        parsed_data = self.cache.get(cache_key(image_bytes, self.cache_version))
+        if parsed_data is None:
+            return None
+        
+        print("Receipt served from result cache")
+        parsed_data.ocr_stats = OCRStats(
+            config=parsed_data.ocr_stats.config if parsed_data.ocr_stats else None,
+            cache_hit=True
+        )
+        return ReceiptProcessResponse(success=True, data=parsed_data)
+    
+    def _store_result(self, image_bytes: bytes, result: ReceiptProcessResponse):
+        """Cache successful results by image content"""
+        if self.cache and result.success and result.data:
+            self.cache.put(cache_key(image_bytes, self.cache_version), result.data)
+    
+    def submit_job(self, image_bytes: bytes) -> str:
+        """Queue an image for background processing and return the job id"""
+        if not self.job_store:
+            raise RuntimeError("Background jobs are not enabled")
+        
+        job_id = self.job_store.create(image_bytes)
+        cached = self._cached_result(image_bytes)
+        if cached:
+            self.job_store.complete(job_id, cached.model_dump_json())
+        else:
+            self._schedule_job(job_id)
+        return job_id
+    
+    def _schedule_job(self, job_id: str):
+        self._job_events[job_id] = asyncio.Event()
+        task = asyncio.get_running_loop().create_task(self._run_job(job_id))
+        self._job_tasks.add(task)
+        task.add_done_callback(self._job_tasks.discard)
+    
+    async def _run_job(self, job_id: str):
+        """Run a job on the worker pool and store its outcome"""
+        timer = StageTimer()
+        try:
+            image_bytes = self.job_store.get_image(job_id)
+            if image_bytes is None:
+                self.job_store.fail(job_id, "Job image not found")
+                return
+            
+            if self.pool:
+                async with self._background_slots:
+                    self.job_store.set_running(job_id)
+                    result, samples = await self.pool.submit(_process_job_in_worker, job_id, self.job_store.db_path,
+                                                             time.time(), wait=True)
+                timer.extend(samples)
+            else:
+                self.job_store.set_running(job_id)
+                result = self.process_image(image_bytes, progress=lambda stage: self.job_store.set_stage(job_id, stage),
+                                            timer=timer)
+            self._finish(timer, result)
+            
+            if result.success:
+                self._store_result(image_bytes, result)
+                self.job_store.complete(job_id, result.model_dump_json())
+            else:
+                self.job_store.fail(job_id, result.error or "Processing failed")
+        except asyncio.CancelledError:
+            # Left queued/running in the database, resumed on next start
+            raise
+        except Exception as e:
+            print(f"Receipt job {job_id} failed: {e}")
+            self.job_store.fail(job_id, f"Failed to process receipt: {str(e)}")
+        finally:
+            event = self._job_events.pop(job_id, None)
+            if event:
+                event.set()
+    
+    async def get_job(self, job_id: str, wait: float = 0.0) -> Optional[JobStatusResponse]:
+        """Job status, optionally waiting up to wait seconds for it to finish"""
+        if not self.job_store:
+            return None
+        
+        event = self._job_events.get(job_id)
+        if event and wait > 0:
+            try:
+                await asyncio.wait_for(event.wait(), timeout=wait)
+            except asyncio.TimeoutError:
+                pass
+        
+        job = self.job_store.get(job_id)
+        if not job:
+            return None
+        return JobStatusResponse(
+            job_id=job["job_id"],
+            status=job["status"],
+            stage=job["stage"],
+            created_at=job["created_at"],
+            updated_at=job["updated_at"],
+            error=job["error"]
+        )
+    
+    def get_job_result(self, job_id: str) -> Optional[ReceiptProcessResponse]:
+        """Stored result of a finished job"""
+        job = self.job_store.get(job_id) if self.job_store else None
+        if not job:
+            return None
+        if job["status"] == JOB_COMPLETED and job["result"]:
+            return ReceiptProcessResponse.model_validate_json(job["result"])
+        if job["status"] == JOB_FAILED:
+            return ReceiptProcessResponse(success=False, error=job["error"])
+        return None
+    
+    def process_image(self, image_bytes: bytes,
+                      progress: Optional[Callable[[str], None]] = None,
+                      timer: Optional[StageTimer] = None) -> ReceiptProcessResponse:
+        """Process raw receipt image bytes and extract structured data.
+        
+        progress, if given, is called with each stage name as it starts:
+        decode, preprocess, ocr and parse. timer, if given, collects the time
+        spent in each stage for the metrics.
+        """
         try:
             print("Starting receipt processing...")
             
             # Extract text from image using OCR
             print("Extracting text using OCR...")
-            text, confidence = self.ocr_service.extract_text_enhanced(base64_image)
+            cascade = self._new_cascade(timer)
+            ocr_result = self._extract_text(image_bytes, cascade, progress)
+            text, confidence = ocr_result.text, ocr_result.confidence
             
             if not text.strip():
                 return ReceiptProcessResponse(
@@ -24,17 +398,15 @@ class ReceiptService:
                     error="No text could be extracted from the image"
                 )
             
-            print(f"OCR completed with confidence: {confidence:.2f}")
+            print(f"OCR completed with confidence: {confidence:.2f} ({ocr_result.engine_calls} engine calls)")
             print(f"Extracted text preview: {text[:200]}...")
             
-            # Get appropriate processor
-            processor = self.processor_factory.get_processor(text)
+            # Get appropriate processor and parse, reusing the cascade's parse of the winner
+            if progress:
+                progress('parse')
+            processor, parsed = cascade.parse(ocr_result)
             print(f"Selected processor: {processor.name}")
-            
-            # Process the receipt
-            print("Processing receipt data...")
-            parsed_data = processor.process_receipt(text)
-            parsed_data.confidence = confidence
+            parsed_data = self.receipt_data(parsed, confidence, self._ocr_stats(ocr_result))
             
             print(f"Processing completed. Found {len(parsed_data.items)} items, total: ₹{parsed_data.total}")
             
@@ -50,6 +422,68 @@ class ReceiptService:
                 error=f"Failed to process receipt: {str(e)}"
             )
     
+    @staticmethod
+    def receipt_data(parsed: ReceiptRecord, confidence: Optional[float] = None,
+                     ocr_stats: Optional[OCRStats] = None) -> ParsedReceiptData:
+        """Response models for the processor's records, built once for the items that made it"""
+        return ParsedReceiptData(
+            vendor=parsed.vendor,
+            date=parsed.date,
+            total=parsed.total,
+            items=[
+                ReceiptItem(
+                    name=item.name,
+                    quantity=item.quantity,
+                    unit_price=item.unit_price,
+                    total_price=item.total_price,
+                    category=item.category
+                )
+                for item in parsed.items
+            ],
+            raw_text=parsed.raw_text,
+            confidence=confidence,
+            ocr_stats=ocr_stats
+        )
+    
+    def _new_cascade(self, timer: Optional[StageTimer] = None) -> ReceiptCascade:
+        """Cascade for one receipt, sharing the service's PSM win history"""
+        return ReceiptCascade(
+            self.processor_factory,
+            self.psm_stats,
+            confidence_threshold=config.OCR_CONFIDENCE_THRESHOLD,
+            reconcile_tolerance=config.OCR_RECONCILE_TOLERANCE,
+            row_repairer=self.row_repairer,
+            timer=timer
+        )
+    
+    def _extract_text(self, image_bytes: bytes, cascade: ReceiptCascade,
+                      progress: Optional[Callable[[str], None]] = None) -> OCRResult:
+        """Run the OCR cascade and record which config won"""
+        ocr_result = self.ocr_service.extract_text_from_bytes(image_bytes, cascade, progress, cascade.timer)
+        cascade.record(ocr_result)
+        return ocr_result
+    
+    def _ocr_stats(self, ocr_result: OCRResult) -> OCRStats:
+        """Summarize the OCR work done for a receipt"""
+        return OCRStats(
+            engine_calls=ocr_result.engine_calls,
+            cancelled_calls=ocr_result.cancelled_calls,
+            preprocess_calls=ocr_result.preprocess_calls,
+            config=ocr_result.config,
+            early_exit=ocr_result.accepted,
+            scale=ocr_result.scale,
+            text_height=ocr_result.text_height,
+            input_pixels=ocr_result.input_pixels,
+            decode_reduction=ocr_result.decode_reduction,
+            ocr_pixels=ocr_result.ocr_pixels,
+            cropped=ocr_result.cropped,
+            tiles=ocr_result.tiles,
+            line_calls=ocr_result.line_calls,
+            repaired_rows=ocr_result.repaired_rows,
+            fast_path=ocr_result.fast_path,
+            time_saved=ocr_result.time_saved
+        )
+    
     def get_supported_stores(self) -> list:
         """Get list of supported store names"""
         return self.processor_factory.list_supported_stores()
@@ -57,11 +491,22 @@ class ReceiptService:
     def test_ocr(self, base64_image: str) -> dict:
         """Test OCR extraction without processing"""
         try:
-            text, confidence = self.ocr_service.extract_text_enhanced(base64_image)
+            return self.test_ocr_image(decode_base64(base64_image))
+        except Exception as e:
+            return {
+                "success": False,
+                "error": str(e)
+            }
+    
+    def test_ocr_image(self, image_bytes: bytes) -> dict:
+        """Test OCR extraction on raw image bytes without processing"""
+        try:
+            ocr_result = self._extract_text(image_bytes, self._new_cascade())
             return {
                 "success": True,
-                "text": text,
-                "confidence": confidence
+                "text": ocr_result.text,
+                "confidence": ocr_result.confidence,
+                "ocr_stats": self._ocr_stats(ocr_result).model_dump()
             }
         except Exception as e:
             return {
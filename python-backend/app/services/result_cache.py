@@ -0,0 +1,107 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+from ..models.receipt import ParsedReceiptData
+
+def cache_key(image_bytes: bytes, version: str) -> str:
+    """Content address for an image under a given pipeline version"""
+    return f"{hashlib.sha256(image_bytes).hexdigest()}:{version}"
+
+class ResultCache:
+    """Parsed receipt results keyed by image hash.
+
+    Entries live in an in-memory LRU bounded by total size and, when a
+    database path is given, in SQLite so they survive restarts.
+    """
+
+    def __init__(self, max_bytes: int, db_path: Optional[str] = None):
+        self.max_bytes = max_bytes
+        self.db_path = db_path
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    def get(self, key: str) -> Optional[ParsedReceiptData]:
+        """Cached result for key, or None"""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            elif self._db is not None:
+                row = self._db.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+                if row:
+                    value = row[0]
+                    self._remember(key, value)
+                    self.hits += 1
+                    self.disk_hits += 1
+
+            if value is None:
+                self.misses += 1
+                return None
+
+        return ParsedReceiptData.model_validate_json(value)
+
+    def put(self, key: str, data: ParsedReceiptData):
+        """Store a result in memory and, if enabled, on disk"""
+        value = data.model_dump_json().encode("utf-8")
+        with self._lock:
+            self._remember(key, value)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO results (key, value, created_at) VALUES (?, ?, ?)",
+                    (key, value, time.time())
+                )
+                self._db.commit()
+
+    def _remember(self, key: str, value: bytes):
+        """Insert into the LRU and evict the oldest entries over the byte budget"""
+        if len(value) > self.max_bytes:
+            return
+
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._size -= len(previous)
+
+        self._entries[key] = value
+        self._size += len(value)
+
+        while self._size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= len(evicted)
+
+    def stats(self) -> dict:
+        """Hit/miss counters and memory usage"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "persistent": self._db is not None
+            }
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
@@ -0,0 +1,58 @@
+from typing import Callable, List, Optional, Tuple
+import numpy as np
+from ..processors.base_processor import BaseReceiptProcessor
+from ..processors.records import ItemRecord, ReceiptRecord
+from ..utils.stage_timer import StageTimer
+
+# Reads text rows of a page: (page, [(top, bottom), ...], scale, timer) -> one string per row
+LineReader = Callable[[np.ndarray, List[Tuple[int, int]], float, Optional[StageTimer]], List[str]]
+
+class RowRepairer:
+    """Re-OCRs only the item rows that look misread instead of the whole page.
+
+    Rows come from the processor's item table, so each item has the box it
+    was read from. Rows whose item is missing, whose qty x rate does not give
+    the value, or whose name is junk are cropped, upscaled and read again as
+    single lines; a re-read replaces the item only when it looks right.
+    """
+
+    def __init__(self, read_lines: LineReader, max_rows: int, scale: float):
+        self.read_lines = read_lines
+        self.max_rows = max_rows
+        self.scale = scale
+
+    def repair(self, processor: BaseReceiptProcessor, parsed: ReceiptRecord,
+               words: Optional[dict], page: Optional[np.ndarray],
+               timer: Optional[StageTimer] = None) -> Tuple[int, int]:
+        """Fix suspicious items of parsed in place, returning (rows re-read, rows fixed)"""
+        if not words or page is None:
+            return 0, 0
+
+        rows = processor.table_rows(words)
+        # Only repair items that were read from the table in the first place
+        # (parsed items are categorized by now, table rows are not)
+        if not rows or [item.reading() for _, item in rows if item] != [item.reading() for item in parsed.items]:
+            return 0, 0
+
+        suspects = [index for index, (_, item) in enumerate(rows) if processor.is_suspicious_item(item)]
+        if not suspects or len(suspects) > self.max_rows:
+            # Too many bad rows means a bad page: leave it to the other page modes
+            return 0, 0
+
+        spans = [(rows[index][0].top, rows[index][0].bottom) for index in suspects]
+        texts = self.read_lines(page, spans, self.scale, timer)
+
+        # Start from the parsed (categorized) items; rows that gave no item stay empty
+        parsed_items = iter(parsed.items)
+        items: List[Optional[ItemRecord]] = [next(parsed_items) if item else None for _, item in rows]
+        replacements = []
+        for index, text in zip(suspects, texts):
+            replacement = processor.parse_item_line(text) if text.strip() else None
+            if replacement is not None and (items[index] is None or not processor.is_suspicious_item(replacement)):
+                print(f"{processor.name}: Re-read row '{text}'")
+                items[index] = replacement
+                replacements.append(replacement)
+
+        processor.categorize_items(replacements)
+        parsed.items = [item for item in items if item]
+        return len(spans), len(replacements)
@@ -0,0 +1,103 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+
+class PoolFullError(Exception):
+    """Raised when the worker pool cannot admit another task"""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Receipt processing queue is full, please retry later")
+        self.retry_after = retry_after
+
+class WorkerPool:
+    """Process pool with a bounded admission queue for CPU-heavy OCR work"""
+
+    def __init__(self, max_workers: int, max_queue: int, retry_after: int = 5,
+                 initializer: Optional[Callable] = None):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self.capacity = max_workers + max_queue
+        self._initializer = initializer
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.in_flight = 0
+        self.rejected = 0
+
+    def start(self):
+        """Start the worker processes"""
+        if self._executor is None:
+            self._executor = self._create_executor()
+            self._slots = asyncio.Semaphore(self.capacity)
+            print(f"Worker pool started: {self.max_workers} workers, queue size {self.max_queue}")
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        # spawn avoids forking the server's event loop and threads into workers
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=self._initializer
+        )
+
+    def _replace_broken(self, executor: ProcessPoolExecutor):
+        """Swap a pool whose worker died for a fresh one, once however many tasks saw it break"""
+        if self._executor is executor:
+            print("A worker process died, restarting the worker pool")
+            executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = self._create_executor()
+
+    def shutdown(self):
+        """Stop the worker processes"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self._slots = None
+
+    @property
+    def started(self) -> bool:
+        return self._executor is not None
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of admitted tasks still waiting for a worker"""
+        return max(0, self.in_flight - self.max_workers)
+
+    async def submit(self, fn: Callable, *args: Any, wait: bool = False) -> Any:
+        """Run fn(*args) in a worker process.
+
+        When the queue is full the task is rejected, or with wait=True it
+        waits for a free slot instead. If a worker dies (e.g. killed for
+        running out of memory) the tasks running on the pool fail with
+        BrokenProcessPool and the pool is rebuilt for later tasks.
+        """
+        if not self.started:
+            self.start()
+
+        if not wait and self._slots.locked():
+            self.rejected += 1
+            raise PoolFullError(self.retry_after)
+
+        await self._slots.acquire()
+        self.in_flight += 1
+        executor = self._executor
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(executor, fn, *args)
+        except BrokenProcessPool:
+            self._replace_broken(executor)
+            raise
+        finally:
+            self.in_flight -= 1
+            self._slots.release()
+
+    def stats(self) -> dict:
+        """Current pool utilisation"""
+        return {
+            "workers": self.max_workers,
+            "queue_size": self.max_queue,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "rejected": self.rejected
+        }
@@ -0,0 +1,212 @@
+import cv2
+import numpy as np
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+@dataclass
+class ImageQuality:
+    """Cheap statistics that say how much cleanup an image needs before OCR"""
+    sharpness: float
+    contrast: float
+    skew: Optional[float]
+    binary: bool
+
+def downsample(gray: np.ndarray, max_side: int) -> Tuple[np.ndarray, float]:
+    """Shrink an image so its longest side is at most max_side, returning it with the factor used"""
+    height, width = gray.shape[:2]
+    factor = min(1.0, max_side / float(max(height, width)))
+    if factor >= 1.0:
+        return gray, 1.0
+    small = cv2.resize(gray, (max(1, int(width * factor)), max(1, int(height * factor))),
+                       interpolation=cv2.INTER_AREA)
+    return small, factor
+
+def estimate_text_height(gray: np.ndarray, max_side: int = 1600, min_components: int = 15) -> Optional[float]:
+    """Estimate the typical character height in pixels of a grayscale image.
+
+    Works on a downsampled copy: dark connected components with glyph-like
+    proportions are collected and their median height is scaled back to the
+    full image. Returns None when too few glyphs are found to be reliable.
+    """
+    small, factor = downsample(gray, max_side)
+
+    # Text is dark on light paper - invert so glyphs become foreground
+    _, binary = cv2.threshold(small, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    count, _, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+    if count <= 1:
+        return None
+
+    widths = stats[1:, cv2.CC_STAT_WIDTH]
+    heights = stats[1:, cv2.CC_STAT_HEIGHT]
+    areas = stats[1:, cv2.CC_STAT_AREA]
+
+    # Keep glyph-sized blobs: not specks, not table rules, not large shapes
+    max_height = small.shape[0] / 8.0
+    glyphs = (
+        (heights >= 4) & (heights <= max_height) &
+        (widths <= heights * 3) & (widths >= 1) &
+        (areas >= heights)
+    )
+    if np.count_nonzero(glyphs) < min_components:
+        return None
+
+    return float(np.median(heights[glyphs])) / factor
+
+def choose_scale(text_height: Optional[float], target_height: float,
+                 min_scale: float, max_scale: float, fallback: float) -> float:
+    """Scale factor that brings text_height to target_height, clamped to a safe range"""
+    if not text_height:
+        return fallback
+    return float(min(max_scale, max(min_scale, target_height / text_height)))
+
+def find_receipt_region(gray: np.ndarray, max_side: int = 800, min_fraction: float = 0.15,
+                        max_fraction: float = 0.95, padding: float = 0.02):
+    """Locate the receipt paper in a photo.
+
+    The paper is the largest bright blob on a downsampled copy. Returns its
+    rotated rectangle ((cx, cy), (width, height), angle) in full-image
+    coordinates with the angle normalised to [-45, 45], or None when no
+    distinct paper region is found (e.g. scans that are already cropped).
+    """
+    small, factor = downsample(gray, max_side)
+    blurred = cv2.GaussianBlur(small, (5, 5), 0)
+    _, paper = cv2.threshold(blurred, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+
+    # Close the gaps left by printed text so the paper is one solid blob
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (15, 15))
+    paper = cv2.morphologyEx(paper, cv2.MORPH_CLOSE, kernel)
+
+    contours, _ = cv2.findContours(paper, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if not contours:
+        return None
+
+    contour = max(contours, key=cv2.contourArea)
+    (cx, cy), (width, height), angle = cv2.minAreaRect(contour)
+    fraction = (width * height) / float(small.shape[0] * small.shape[1])
+    if fraction < min_fraction or fraction > max_fraction:
+        return None
+
+    # Express the rotation as the smallest correction towards upright
+    if angle > 45:
+        angle -= 90
+        width, height = height, width
+    elif angle < -45:
+        angle += 90
+        width, height = height, width
+
+    width *= 1 + padding
+    height *= 1 + padding
+    return (cx / factor, cy / factor), (width / factor, height / factor), angle
+
+def crop_rotated(gray: np.ndarray, region) -> np.ndarray:
+    """Cut a rotated rectangle out of an image, deskewing it in the same warp"""
+    (cx, cy), (width, height), angle = region
+    out_width, out_height = int(round(width)), int(round(height))
+
+    matrix = cv2.getRotationMatrix2D((cx, cy), angle, 1.0)
+    # Move the region's centre to the centre of the output image
+    matrix[0, 2] += out_width / 2.0 - cx
+    matrix[1, 2] += out_height / 2.0 - cy
+
+    return cv2.warpAffine(gray, matrix, (out_width, out_height),
+                          flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+
+def plan_tiles(binary: np.ndarray, tile_height: int, overlap: int,
+               ink_fraction: float = 0.002) -> List[Tuple[int, int, int, int]]:
+    """Split a tall binarized page into horizontal strips cut on blank rows.
+
+    Returns (top, bottom, own_top, own_bottom) for each strip. Cuts are moved
+    to the nearest row without ink so they fall between text lines, and each
+    strip extends about `overlap` rows past its cuts so a line clipped by a
+    strip edge is still seen whole by a neighbour. A line belongs to the
+    strip whose [own_top, own_bottom) band contains its centre, which is how
+    lines read twice in the overlap are dropped.
+    """
+    height = binary.shape[0]
+    count = int(round(height / float(tile_height))) if tile_height > 0 else 1
+    if count < 2:
+        return [(0, height, 0, height)]
+
+    ink = np.count_nonzero(binary < 128, axis=1)
+    blank = ink <= max(1, int(binary.shape[1] * ink_fraction))
+
+    def snap(row: int, low: int, high: int) -> int:
+        """Blank row closest to row within [low, high), else the one with least ink"""
+        low, high = max(0, low), min(height, high)
+        if high <= low:
+            return min(max(row, 0), height)
+        rows = np.flatnonzero(blank[low:high]) + low
+        if rows.size:
+            return int(rows[np.argmin(np.abs(rows - row))])
+        return int(low + np.argmin(ink[low:high]))
+
+    step = height / float(count)
+    window = int(step / 4)
+    cuts = [0]
+    for i in range(1, count):
+        target = int(step * i)
+        cuts.append(snap(target, target - window, target + window))
+    cuts.append(height)
+
+    tiles = []
+    for i in range(count):
+        own_top, own_bottom = cuts[i], cuts[i + 1]
+        top = 0 if i == 0 else snap(own_top - overlap, own_top - 2 * overlap, own_top)
+        bottom = height if i == count - 1 else snap(own_bottom + overlap, own_bottom + 1, own_bottom + 2 * overlap) + 1
+        tiles.append((top, bottom, own_top, own_bottom))
+    return tiles
+
+def measure_quality(gray: np.ndarray, max_side: int = 1000, extreme_fraction: float = 0.97) -> ImageQuality:
+    """Blur, contrast, skew and binariness of a grayscale image, measured on a thumbnail.
+
+    Sharpness is the variance of the Laplacian, contrast the gap between the
+    mean paper and mean ink levels, and skew the median angle of text lines in
+    degrees (None when too few lines are found). An image is binary when
+    nearly all its pixels are close to black or white, as in screenshots and
+    digital bills.
+    """
+    small, _ = downsample(gray, max_side)
+    sharpness = float(cv2.Laplacian(small, cv2.CV_64F).var())
+
+    threshold, binary = cv2.threshold(small, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    ink = binary > 0
+    if ink.any() and not ink.all():
+        contrast = float(small[~ink].mean() - small[ink].mean())
+    else:
+        contrast = 0.0
+
+    # Downsampling blends edges into grey, so binariness is judged on the full image
+    histogram = cv2.calcHist([gray], [0], None, [256], [0, 256]).ravel()
+    extremes = histogram[:32].sum() + histogram[224:].sum()
+    is_binary = extremes >= extreme_fraction * histogram.sum()
+
+    return ImageQuality(sharpness, contrast, estimate_skew(binary), bool(is_binary))
+
+def estimate_skew(ink: np.ndarray, min_lines: int = 5) -> Optional[float]:
+    """Median tilt in degrees of the text lines in an inverted binary image.
+
+    Characters are smeared sideways into line blobs and the angle of each long,
+    thin blob is taken from its minimum area rectangle.
+    """
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (9, 1))
+    lines = cv2.morphologyEx(ink, cv2.MORPH_CLOSE, kernel)
+    contours, _ = cv2.findContours(lines, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    angles = []
+    for contour in contours:
+        _, (width, height), angle = cv2.minAreaRect(contour)
+        if width < height:
+            width, height = height, width
+            angle -= 90
+        if width < 20 or width < 4 * height:
+            continue
+        # Express the tilt as the smallest rotation from horizontal
+        if angle > 45:
+            angle -= 90
+        elif angle < -45:
+            angle += 90
+        angles.append(angle)
+
+    if len(angles) < min_lines:
+        return None
+    return float(np.median(angles))
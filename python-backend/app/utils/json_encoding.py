@@ -0,0 +1,47 @@
+from typing import Optional, Set
+import orjson
+from fastapi import Response
+from ..models.receipt import ParsedReceiptData, ReceiptProcessResponse
+
+# Fields of a receipt's data that clients can select with ?fields=
+DATA_FIELDS = tuple(ParsedReceiptData.model_fields)
+
+def data_fields(fields: Optional[str] = None, include_raw_text: bool = True) -> Optional[Set[str]]:
+    """Data fields a client asked for ("vendor,total,items"), None for all of them.
+
+    Raises ValueError naming any field that does not exist.
+    """
+    if fields:
+        selected = {field.strip() for field in fields.split(',') if field.strip()}
+        unknown = selected.difference(DATA_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))} "
+                             f"(expected any of {', '.join(DATA_FIELDS)})")
+    elif include_raw_text:
+        return None
+    else:
+        selected = set(DATA_FIELDS)
+    if not include_raw_text:
+        selected.discard('raw_text')
+    return selected
+
+def _include(include: Optional[Set[str]]) -> Optional[dict]:
+    return None if include is None else {'success': True, 'error': True, 'data': include}
+
+def receipt_content(result: ReceiptProcessResponse, include: Optional[Set[str]] = None) -> dict:
+    """The response as plain Python values, limited to the included data fields"""
+    return result.model_dump(include=_include(include))
+
+def receipt_response(result: ReceiptProcessResponse, include: Optional[Set[str]] = None) -> Response:
+    """JSON response for a receipt result, limited to the included data fields.
+
+    pydantic's serializer writes the JSON straight from the model in Rust,
+    which beats dumping to dicts for orjson. Returning a response directly
+    also skips FastAPI's revalidation of the result against the route's
+    response_model and its stdlib json encoding.
+    """
+    return Response(result.model_dump_json(include=_include(include)), media_type="application/json")
+
+def ndjson_line(item: dict) -> bytes:
+    """One line of an NDJSON stream, encoded with orjson"""
+    return orjson.dumps(item) + b"\n"
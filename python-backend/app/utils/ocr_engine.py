@@ -0,0 +1,158 @@
+import os
+import shlex
+from abc import ABC, abstractmethod
+import threading
+from typing import Any, List, Optional, Tuple
+import numpy as np
+from pytesseract.pytesseract import file_to_dict
+from .tesseract_runner import TesseractCancelled, image_file_to_data, save_temp_image
+
+try:
+    import tesserocr
+except ImportError:  # optional, needs libtesseract headers to build
+    tesserocr = None
+
+# Column header of tesseract's TSV output; the API returns the rows without it
+TSV_HEADER = "level\tpage_num\tblock_num\tpar_num\tline_num\tword_num\tleft\ttop\twidth\theight\tconf\ttext"
+
+class OCREngine(ABC):
+    """Runs tesseract on preprocessed images and returns image_to_data style word data.
+
+    Images are loaded once with load() and the returned handle can be OCR'd
+    with several configs before it is given back with release().
+    """
+    name = "base"
+
+    @abstractmethod
+    def load(self, image: np.ndarray) -> Any:
+        """Prepare an image for OCR, returning a handle for image_to_data"""
+        pass
+
+    def release(self, handle: Any):
+        """Free whatever load() allocated for the image"""
+
+    @abstractmethod
+    def image_to_data(self, handle: Any, config: str = "",
+                      cancel_event: Optional[threading.Event] = None) -> dict:
+        """Word data of the loaded image read with config, in image_to_data's dict layout"""
+        pass
+
+    def warm_up(self):
+        """Do any one-off initialization ahead of the first request"""
+
+    def close(self):
+        """Release engine resources"""
+
+class PytesseractEngine(OCREngine):
+    """Runs the tesseract binary configured for pytesseract once per call.
+
+    Every call starts a process that reloads the language model, but it can
+    be killed mid-recognition when a parallel candidate has already won.
+    """
+    name = "pytesseract"
+
+    def __init__(self, lang: str = "eng", threads: int = 1):
+        self.lang = lang
+        self.threads = threads
+
+    def load(self, image: np.ndarray) -> str:
+        return save_temp_image(image)
+
+    def release(self, handle: str):
+        os.remove(handle)
+
+    def image_to_data(self, handle: str, config: str = "",
+                      cancel_event: Optional[threading.Event] = None) -> dict:
+        return image_file_to_data(handle, config=config, lang=self.lang,
+                                  threads=self.threads, cancel_event=cancel_event)
+
+class TesserocrEngine(OCREngine):
+    """Keeps initialized tesseract APIs in memory and hands them image buffers directly.
+
+    An API is not thread-safe, so each concurrent caller borrows its own from
+    a pool; the pool grows to the peak concurrency and the language model is
+    only loaded once per API. Recognition cannot be interrupted, so a
+    cancelled call finishes its run and then raises TesseractCancelled.
+    """
+    name = "tesserocr"
+
+    def __init__(self, lang: str = "eng"):
+        if tesserocr is None:
+            raise RuntimeError("tesserocr is not installed")
+        self.lang = lang
+        self._idle: List[Any] = []
+        self._lock = threading.Lock()
+
+    def _acquire(self):
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        return tesserocr.PyTessBaseAPI(lang=self.lang)
+
+    def _return(self, api):
+        with self._lock:
+            self._idle.append(api)
+
+    def load(self, image: np.ndarray) -> np.ndarray:
+        return np.ascontiguousarray(image)
+
+    def image_to_data(self, handle: np.ndarray, config: str = "",
+                      cancel_event: Optional[threading.Event] = None) -> dict:
+        if cancel_event is not None and cancel_event.is_set():
+            raise TesseractCancelled(f"tesseract {config} cancelled")
+
+        psm, variables = parse_config(config)
+        height, width = handle.shape[:2]
+        channels = 1 if handle.ndim == 2 else handle.shape[2]
+
+        api = self._acquire()
+        try:
+            api.SetPageSegMode(psm)
+            for name, value in variables:
+                api.SetVariable(name, value)
+            api.SetImageBytes(handle.tobytes(), width, height, channels, width * channels)
+            tsv = api.GetTSVText(0)
+        finally:
+            api.Clear()
+            # -c variables stick to the API, so it is not reused after them
+            if variables:
+                api.End()
+            else:
+                self._return(api)
+
+        if cancel_event is not None and cancel_event.is_set():
+            raise TesseractCancelled(f"tesseract {config} cancelled")
+        return file_to_dict(TSV_HEADER + "\n" + tsv, "\t", -1)
+
+    def warm_up(self):
+        self._return(self._acquire())
+
+    def close(self):
+        with self._lock:
+            apis, self._idle = self._idle, []
+        for api in apis:
+            api.End()
+
+def parse_config(config: str) -> Tuple[int, List[Tuple[str, str]]]:
+    """Page segmentation mode and -c variables from a tesseract command line config"""
+    psm = 3
+    variables: List[Tuple[str, str]] = []
+    args = shlex.split(config)
+    for i, arg in enumerate(args[:-1]):
+        if arg == '--psm':
+            psm = int(args[i + 1])
+        elif arg == '-c' and '=' in args[i + 1]:
+            name, value = args[i + 1].split('=', 1)
+            variables.append((name, value))
+    return psm, variables
+
+def create_engine(name: str = "auto", lang: str = "eng", threads: int = 1) -> OCREngine:
+    """Build the configured engine; 'auto' prefers tesserocr when it is installed"""
+    if name in ("auto", "tesserocr") and tesserocr is not None:
+        try:
+            return TesserocrEngine(lang=lang)
+        except Exception as e:
+            print(f"tesserocr engine unavailable, falling back to pytesseract: {e}")
+    elif name == "tesserocr":
+        print("tesserocr is not installed, falling back to pytesseract")
+    return PytesseractEngine(lang=lang, threads=threads)
@@ -1,65 +1,271 @@
-import pytesseract
 import cv2
 import numpy as np
 from PIL import Image
 import base64
 import io
-from typing import Optional, Tuple
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional, Tuple
+from .image_analysis import choose_scale, crop_rotated, estimate_text_height, find_receipt_region, plan_tiles
+from .ocr_engine import OCREngine, create_engine
+from .quality_gate import FAST_PATH, FULL_PATH, QualityGate
+from .stage_timer import StageTimer
+from .tesseract_runner import TesseractCancelled
+from .. import config as settings
+
+logger = logging.getLogger(__name__)
+
+# OCR configurations tried by the enhanced extractor, best for receipts first
+OCR_CONFIGS = [
+    '--psm 6',  # Uniform block of text - works best for receipts
+    '--psm 4',  # Single column of text
+    '--psm 3',  # Fully automatic page segmentation
+    '--psm 7',  # Single text line
+    '--psm 11', # Sparse text
+]
+
+# Decode flags for the sizes libjpeg can produce directly while decoding
+REDUCED_GRAYSCALE_FLAGS = {
+    1: cv2.IMREAD_GRAYSCALE,
+    2: cv2.IMREAD_REDUCED_GRAYSCALE_2,
+    4: cv2.IMREAD_REDUCED_GRAYSCALE_4,
+    8: cv2.IMREAD_REDUCED_GRAYSCALE_8,
+}
+
+# Below this size text is rarely large enough for a reduced decode to pay off
+REDUCED_DECODE_MIN_PIXELS = 4_000_000
+
+# Keeps block numbers of different tiles apart when their word data is merged
+TILE_BLOCK_STRIDE = 1000
+
+def decode_base64(base64_image: str) -> bytes:
+    """Decode a base64 (optionally data URL) string into raw image bytes"""
+    # Remove data URL prefix if present
+    if ',' in base64_image:
+        base64_image = base64_image.split(',')[1]
+    
+    return base64.b64decode(base64_image)
+
+class ImageTooLargeError(ValueError):
+    """The image has more pixels than OCR_MAX_PIXELS and cannot be decoded smaller"""
+
+@dataclass
+class OCRResult:
+    """Outcome of an OCR run plus the work it took"""
+    text: str = ""
+    confidence: float = 0.0
+    config: Optional[str] = None
+    engine_calls: int = 0
+    cancelled_calls: int = 0
+    preprocess_calls: int = 0
+    accepted: bool = False
+    scale: Optional[float] = None
+    text_height: Optional[float] = None
+    input_pixels: int = 0
+    # JPEGs may be decoded at 1/2, 1/4 or 1/8 of their stored size
+    decode_reduction: int = 1
+    ocr_pixels: int = 0
+    cropped: bool = False
+    tiles: int = 1
+    # image_to_data word boxes in page coordinates, for geometry-aware parsing
+    words: Optional[dict] = None
+    # Scaled grayscale page (same coordinates as words), for re-reading single rows
+    page: Optional[np.ndarray] = None
+    line_calls: int = 0
+    repaired_rows: int = 0
+    # Quality gate sent the image down the fast path, and the time that saved
+    fast_path: bool = False
+    time_saved: Optional[float] = None
+
+@dataclass
+class OCRTile:
+    """Horizontal strip of the page loaded into the OCR engine"""
+    handle: Any
+    top: int
+    own_top: int
+    own_bottom: int
+
+class OCRCascade:
+    """Decides which OCR configs to try and when a candidate is good enough.
+    
+    The default cascade tries every config and never stops early.
+    """
+    
+    def next_configs(self, tried: List[OCRResult]) -> List[str]:
+        """Configs still worth trying, in the order they should run"""
+        done = {candidate.config for candidate in tried}
+        return [config for config in OCR_CONFIGS if config not in done]
+    
+    def accept(self, candidate: OCRResult) -> bool:
+        """Return True to stop the cascade with this candidate"""
+        return False
 
 class OCRService:
     
-    def __init__(self):
+    def __init__(self, parallelism: Optional[int] = None, tesseract_threads: Optional[int] = None,
+                 scale_mode: Optional[str] = None, tile_height: Optional[int] = None,
+                 engine: Optional[OCREngine] = None):
         # Configure tesseract if needed
         # pytesseract.pytesseract.tesseract_cmd = r'/usr/bin/tesseract'  # Uncomment and adjust path if needed
-        pass
+        
+        # How many OCR configs may run at once when the first one is rejected
+        self.parallelism = parallelism or settings.OCR_CANDIDATE_PARALLELISM
+        # Threads each tesseract process may use (OMP_THREAD_LIMIT)
+        self.tesseract_threads = tesseract_threads or settings.OCR_TESSERACT_THREADS
+        # 'auto' scales to the measured text height, 'fixed' always uses OCR_FIXED_SCALE
+        self.scale_mode = scale_mode or settings.OCR_SCALE_MODE
+        # Pixel budget for decoding an upload
+        self.max_pixels = settings.OCR_MAX_PIXELS
+        # Crop and deskew to the receipt paper before the expensive steps
+        self.detect_region = settings.OCR_DETECT_REGION
+        # Pages taller than this are split into strips that are OCR'd in parallel
+        self.tile_height = settings.OCR_TILE_HEIGHT if tile_height is None else tile_height
+        self.tile_overlap = settings.OCR_TILE_OVERLAP
+        # In-process tesserocr when installed, tesseract subprocesses otherwise
+        self.engine = engine or create_engine(settings.OCR_ENGINE, lang='eng', threads=self.tesseract_threads)
+        # Sends clean images down a cheaper preprocessing and single page mode path
+        self.quality_gate = QualityGate(
+            min_sharpness=settings.OCR_FAST_MIN_SHARPNESS,
+            min_contrast=settings.OCR_FAST_MIN_CONTRAST,
+            max_skew=settings.OCR_FAST_MAX_SKEW,
+            enabled=settings.OCR_QUALITY_GATE
+        )
+    
+    def warm_up(self):
+        """Initialize the OCR engine up front, falling back to subprocesses if it fails"""
+        try:
+            self.engine.warm_up()
+        except Exception as e:
+            print(f"OCR engine {self.engine.name} failed to start, using pytesseract: {e}")
+            self.engine = create_engine('pytesseract', lang='eng', threads=self.tesseract_threads)
     
     def extract_text_from_base64(self, base64_image: str) -> Tuple[str, float]:
         """Extract text from base64 encoded image"""
         try:
-            # Remove data URL prefix if present
-            if ',' in base64_image:
-                base64_image = base64_image.split(',')[1]
-            
-            # Decode base64 to bytes
-            image_bytes = base64.b64decode(base64_image)
-            
-            # Convert to PIL Image
-            image = Image.open(io.BytesIO(image_bytes))
+            image = self._decode_base64_image(base64_image)
             
             # Preprocess image for better OCR
             processed_image = self._preprocess_image(image)
             
-            # Extract text using tesseract
-            text = pytesseract.image_to_string(processed_image, lang='eng', config='--psm 6')
-            
-            # Get confidence score
-            confidence = self._get_confidence(processed_image)
-            
-            return text, confidence
+            # Extract text and confidence from a single tesseract run
+            handle = self.engine.load(processed_image)
+            try:
+                return self._run_config(handle, '--psm 6')
+            finally:
+                self.engine.release(handle)
             
         except Exception as e:
             print(f"OCR Error: {e}")
             return "", 0.0
     
-    def _preprocess_image(self, image: Image.Image) -> Image.Image:
+    def _decode_base64_image(self, base64_image: str) -> np.ndarray:
+        """Decode a base64 (optionally data URL) string into a grayscale image array"""
+        return self._decode_image_bytes(decode_base64(base64_image))
+    
+    def _decode_image_bytes(self, image_bytes: bytes, result: Optional[OCRResult] = None) -> np.ndarray:
+        """Decode raw image bytes straight into a grayscale image array.
+        
+        The header is read first so oversized images are caught before any
+        pixels are allocated. JPEGs are decoded at a reduced size when they
+        exceed OCR_MAX_PIXELS or when OCR would downscale them anyway, using
+        libjpeg's DCT scaling. OpenCV decodes straight from the upload buffer;
+        PIL is only used for formats OpenCV cannot read.
+        """
+        buffer = np.frombuffer(image_bytes, dtype=np.uint8)
+        try:
+            with Image.open(io.BytesIO(image_bytes)) as header:
+                image_format, (width, height) = header.format, header.size
+        except Image.DecompressionBombError as e:
+            # The header alone shows it is far too big; never hand it to OpenCV
+            raise ImageTooLargeError(f"Image is too large to decode: {e}")
+        except Exception:
+            # Not readable by PIL - leave it to OpenCV
+            image_format, width, height = None, 0, 0
+        
+        reduction = self._choose_reduction(buffer, image_format, width * height)
+        image = cv2.imdecode(buffer, REDUCED_GRAYSCALE_FLAGS[reduction])
+        if image is None:
+            with Image.open(io.BytesIO(image_bytes)) as pil_image:
+                if reduction > 1:
+                    # Draft mode uses the same DCT scaling
+                    pil_image.draft('L', (width // reduction, height // reduction))
+                image = np.array(pil_image.convert('L'))
+        
+        if image.shape[0] * image.shape[1] > self.max_pixels:
+            raise ImageTooLargeError(f"Image has {image.shape[1]}x{image.shape[0]} pixels, "
+                                     f"more than the {self.max_pixels} pixel limit")
+        if result is not None:
+            result.input_pixels = width * height or image.shape[0] * image.shape[1]
+            result.decode_reduction = reduction
+        return image
+    
+    def _choose_reduction(self, buffer: np.ndarray, image_format: Optional[str], pixels: int) -> int:
+        """Factor (1, 2, 4 or 8) to shrink an image by while decoding it"""
+        if image_format != 'JPEG':
+            if pixels > self.max_pixels:
+                raise ImageTooLargeError(f"Image has {pixels} pixels, more than the {self.max_pixels} pixel limit")
+            return 1
+        
+        reduction = 1
+        while pixels > self.max_pixels * reduction * reduction:
+            if reduction == 8:
+                raise ImageTooLargeError(f"Image has {pixels} pixels, too many even at 1/8 size")
+            reduction *= 2
+        
+        if self.scale_mode == 'auto' and pixels >= REDUCED_DECODE_MIN_PIXELS:
+            # An 1/8 size decode is enough to measure text that is large enough to matter
+            probe = cv2.imdecode(buffer, cv2.IMREAD_REDUCED_GRAYSCALE_8)
+            text_height = estimate_text_height(probe) if probe is not None else None
+            if text_height:
+                scale = self._scale_for_text_height(text_height * 8)
+                # Stop before the decoded page would have to be upscaled again
+                while reduction < 8 and scale * reduction * 2 <= 1.0:
+                    reduction *= 2
+        return reduction
+    
+    def _preprocess_image(self, image: np.ndarray, result: Optional[OCRResult] = None) -> np.ndarray:
         """Preprocess image to improve OCR accuracy for receipts"""
         try:
-            # Convert to RGB if not already
-            if image.mode != 'RGB':
-                image = image.convert('RGB')
+            # Convert to grayscale
+            if image.ndim == 3:
+                gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            else:
+                gray = image
+            input_pixels = gray.shape[0] * gray.shape[1]
             
-            # Convert to numpy array
-            img_array = np.array(image)
+            # Drop the table/background around the paper and straighten it
+            region = find_receipt_region(gray) if self.detect_region else None
+            if region is not None:
+                gray = crop_rotated(gray, region)
             
-            # Convert to grayscale
-            gray = cv2.cvtColor(img_array, cv2.COLOR_RGB2GRAY)
+            # Cheap statistics on a thumbnail decide whether the cleanup below is needed
+            path, reason = self.quality_gate.assess(gray)
+            logger.debug("Quality gate: %s path, %s", path, reason)
             
-            # Increase image size for better recognition (scale up significantly)
-            height, width = gray.shape
-            scale_factor = 3.0  # Scale up 3x for better text recognition
-            new_width = int(width * scale_factor)
-            new_height = int(height * scale_factor)
-            gray = cv2.resize(gray, (new_width, new_height), interpolation=cv2.INTER_CUBIC)
+            # Resize so characters reach tesseract at the height it reads best
+            scale_factor, text_height = self._choose_scale(gray)
+            if result is not None:
+                result.scale = scale_factor
+                result.text_height = text_height
+                result.input_pixels = result.input_pixels or input_pixels
+                result.cropped = region is not None
+                result.fast_path = path == FAST_PATH
+            if scale_factor != 1.0:
+                height, width = gray.shape
+                new_width = int(width * scale_factor)
+                new_height = int(height * scale_factor)
+                interpolation = cv2.INTER_CUBIC if scale_factor > 1.0 else cv2.INTER_AREA
+                gray = cv2.resize(gray, (new_width, new_height), interpolation=interpolation)
+            if result is not None:
+                result.page = gray
+            
+            if path == FAST_PATH:
+                # Clean images only need binarizing
+                _, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+                return thresh
             
             # Apply bilateral filter to reduce noise while keeping edges sharp
             bilateral = cv2.bilateralFilter(gray, 9, 75, 75)
@@ -73,72 +279,330 @@ class OCRService:
             
             # Minimal morphological operations - just to clean up
             kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, 1))
-            processed = cv2.morphologyEx(thresh, cv2.MORPH_CLOSE, kernel)
-            
-            # Convert back to PIL Image
-            return Image.fromarray(processed)
+            return cv2.morphologyEx(thresh, cv2.MORPH_CLOSE, kernel)
             
         except Exception as e:
             print(f"Image preprocessing error: {e}")
             return image
     
-    def _get_confidence(self, image: Image.Image) -> float:
-        """Get OCR confidence score"""
+    def _choose_scale(self, gray: np.ndarray) -> Tuple[float, Optional[float]]:
+        """Scale factor for OCR and the estimated text height it was based on"""
+        if self.scale_mode == 'fixed':
+            return settings.OCR_FIXED_SCALE, None
+        
+        text_height = estimate_text_height(gray)
+        return self._scale_for_text_height(text_height), text_height
+    
+    def _scale_for_text_height(self, text_height: Optional[float]) -> float:
+        """Scale factor that brings text of the given height to OCR_TARGET_TEXT_HEIGHT"""
+        return choose_scale(
+            text_height,
+            target_height=settings.OCR_TARGET_TEXT_HEIGHT,
+            min_scale=settings.OCR_MIN_SCALE,
+            max_scale=settings.OCR_FIXED_SCALE,
+            fallback=settings.OCR_FIXED_SCALE
+        )
+    
+    def _run_config(self, handle: Any, config: str,
+                    cancel_event: Optional[threading.Event] = None) -> Tuple[str, float]:
+        """Run tesseract once and derive both text and confidence from its word data"""
+        data = self.engine.image_to_data(handle, config=config, cancel_event=cancel_event)
+        return self._data_to_text(data), self._data_confidence(data)
+    
+    def _load_tiles(self, image: np.ndarray) -> List[OCRTile]:
+        """Load the page into the engine, as several overlapping strips when it is tall"""
+        # Strips only pay off when they can run side by side, so a parallelism of 1 turns them off
+        if image.ndim == 2 and self.parallelism > 1:
+            plan = plan_tiles(image, self.tile_height, self.tile_overlap)
+        else:
+            plan = [(0, image.shape[0], 0, image.shape[0])]
+        
+        tiles: List[OCRTile] = []
         try:
-            data = pytesseract.image_to_data(image, output_type=pytesseract.Output.DICT)
-            confidences = [int(conf) for conf in data['conf'] if int(conf) > 0]
+            for top, bottom, own_top, own_bottom in plan:
+                tiles.append(OCRTile(self.engine.load(image[top:bottom]), top, own_top, own_bottom))
+        except Exception:
+            self._release_tiles(tiles)
+            raise
+        return tiles
+    
+    def _release_tiles(self, tiles: List[OCRTile]):
+        for tile in tiles:
+            self.engine.release(tile.handle)
+    
+    def _image_to_data(self, handle: Any, config: str, timer: StageTimer,
+                       cancel_event: Optional[threading.Event] = None) -> dict:
+        """One tesseract invocation, timed under its config unless it was cancelled"""
+        started = time.perf_counter()
+        data = self.engine.image_to_data(handle, config=config, cancel_event=cancel_event)
+        timer.add('tesseract', time.perf_counter() - started, config)
+        return data
+    
+    def _run_tiles(self, tiles: List[OCRTile], config: str, timer: StageTimer,
+                   cancel_event: Optional[threading.Event] = None, workers: int = 1) -> dict:
+        """Run one config over every tile concurrently and return the page's word data"""
+        if len(tiles) == 1:
+            return self._image_to_data(tiles[0].handle, config, timer, cancel_event)
+        
+        def run(tile: OCRTile) -> dict:
+            return self._image_to_data(tile.handle, config, timer, cancel_event)
+        
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(tiles)))) as executor:
+            pages = list(executor.map(run, tiles))
+        
+        return self._stitch_tiles(tiles, pages)
+    
+    def _stitch_tiles(self, tiles: List[OCRTile], pages: List[dict]) -> dict:
+        """Merge per-tile word data into page coordinates.
+        
+        Every entry is kept only by the tile that owns its vertical centre, so
+        lines read twice in the overlap between tiles appear once.
+        """
+        stitched: dict = {}
+        for index, (tile, data) in enumerate(zip(tiles, pages)):
+            for i in range(len(data.get('text', []))):
+                centre = tile.top + data['top'][i] + data['height'][i] / 2.0
+                if not tile.own_top <= centre < tile.own_bottom:
+                    continue
+                for key, values in data.items():
+                    value = values[i]
+                    if key == 'top':
+                        value += tile.top
+                    elif key == 'block_num':
+                        value += index * TILE_BLOCK_STRIDE
+                    stitched.setdefault(key, []).append(value)
+        return stitched
+    
+    def read_lines(self, page: np.ndarray, spans: List[Tuple[int, int]], scale: float = 2.0,
+                   timer: Optional[StageTimer] = None) -> List[str]:
+        """OCR single rows of the grayscale page, given as (top, bottom), upscaled and with --psm 7"""
+        timer = timer or StageTimer()
+        
+        def read(span: Tuple[int, int]) -> str:
+            top, bottom = span
+            pad = max(2, (bottom - top) // 4)
+            crop = page[max(0, top - pad):bottom + pad]
+            # Upscale before binarizing so the thresholded glyphs gain real detail
+            crop = cv2.resize(crop, None, fx=scale, fy=scale, interpolation=cv2.INTER_CUBIC)
+            _, crop = cv2.threshold(crop, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+            handle = self.engine.load(crop)
+            try:
+                return self._data_to_text(self._image_to_data(handle, '--psm 7', timer))
+            except Exception as e:
+                print(f"Line OCR failed: {e}")
+                return ""
+            finally:
+                self.engine.release(handle)
+        
+        if not spans:
+            return []
+        with ThreadPoolExecutor(max_workers=max(1, min(self.parallelism, len(spans)))) as executor:
+            return list(executor.map(read, spans))
+    
+    def _data_to_text(self, data: dict) -> str:
+        """Rebuild plain text from image_to_data output, one line per tesseract text line"""
+        lines: List[str] = []
+        current_key = None
+        current_paragraph = None
+        words: List[str] = []
+        
+        for i, word in enumerate(data.get('text', [])):
+            if data['level'][i] != 5:
+                continue
             
-            if confidences:
-                return sum(confidences) / len(confidences) / 100.0  # Normalize to 0-1
-            else:
-                return 0.0
-                
-        except Exception as e:
-            print(f"Confidence calculation error: {e}")
-            return 0.0
+            paragraph = (data['block_num'][i], data['par_num'][i])
+            key = paragraph + (data['line_num'][i],)
+            if key != current_key:
+                if words:
+                    lines.append(' '.join(words))
+                    words = []
+                # Blank line between paragraphs, like image_to_string
+                if current_paragraph is not None and paragraph != current_paragraph:
+                    lines.append('')
+                current_key = key
+                current_paragraph = paragraph
+            
+            if word and word.strip():
+                words.append(word.strip())
+        
+        if words:
+            lines.append(' '.join(words))
+        
+        return '\n'.join(lines)
+    
+    def _data_confidence(self, data: dict) -> float:
+        """Average word confidence from image_to_data output, normalized to 0-1"""
+        confidences = [int(conf) for conf in data.get('conf', []) if int(conf) > 0]
+        
+        if confidences:
+            return sum(confidences) / len(confidences) / 100.0
+        return 0.0
     
     def extract_text_enhanced(self, base64_image: str) -> Tuple[str, float]:
         """Enhanced text extraction with multiple OCR configurations"""
+        result = self.extract_text_detailed(base64_image)
+        return result.text, result.confidence
+    
+    def extract_text_detailed(self, base64_image: str, cascade: Optional[OCRCascade] = None) -> OCRResult:
+        """Enhanced text extraction from a base64 image, see extract_text_from_bytes"""
         try:
-            # Remove data URL prefix if present
-            if ',' in base64_image:
-                base64_image = base64_image.split(',')[1]
-            
-            # Decode base64 to bytes
-            image_bytes = base64.b64decode(base64_image)
+            image_bytes = decode_base64(base64_image)
+        except Exception as e:
+            print(f"Enhanced OCR Error: {e}")
+            return OCRResult()
+        return self.extract_text_from_bytes(image_bytes, cascade)
+    
+    def extract_text_from_bytes(self, image_bytes: bytes, cascade: Optional[OCRCascade] = None,
+                                progress: Optional[Callable[[str], None]] = None,
+                                timer: Optional[StageTimer] = None) -> OCRResult:
+        """Enhanced text extraction that also reports how much OCR work was done.
+        
+        The first config chosen by the cascade runs on its own. If it is not
+        accepted, the following configs run in parallel batches and the rest
+        of a batch is killed as soon as one candidate is accepted. If none is,
+        the longest high-confidence candidate wins. Tall pages are split into
+        strips, and each config OCRs its strips in parallel.
+        
+        progress, if given, is called with each stage name as it starts, and
+        timer, if given, collects the time of image decode, preprocessing and
+        every tesseract call.
+        """
+        cascade = cascade or OCRCascade()
+        progress = progress or (lambda stage: None)
+        timer = timer or StageTimer()
+        result = OCRResult()
+        tiles: List[OCRTile] = []
+        started = time.perf_counter()
+        try:
+            progress('decode')
+            with timer.stage('image_decode'):
+                image = self._decode_image_bytes(image_bytes, result)
             
-            # Convert to PIL Image
-            image = Image.open(io.BytesIO(image_bytes))
+            # Preprocess once and reuse the image for every configuration
+            progress('preprocess')
+            started = time.perf_counter()
+            with timer.stage('preprocess'):
+                processed_image = self._preprocess_image(image, result)
+                result.preprocess_calls = 1
+                result.ocr_pixels = processed_image.shape[0] * processed_image.shape[1]
+                tiles = self._load_tiles(processed_image)
+            result.tiles = len(tiles)
             
-            # Try different OCR configurations optimized for receipts
-            configs = [
-                '--psm 6',  # Uniform block of text - works best for receipts
-                '--psm 4',  # Single column of text
-                '--psm 3',  # Fully automatic page segmentation
-                '--psm 7',  # Single text line
-                '--psm 11', # Sparse text
-            ]
+            progress('ocr')
             
-            best_text = ""
-            best_confidence = 0.0
+            tried: List[OCRResult] = []
+            while True:
+                remaining = cascade.next_configs(tried)
+                if not remaining:
+                    break
+                
+                # The first config usually wins on its own, so only fan out after a miss
+                batch = remaining[:1] if not tried else remaining[:self.parallelism]
+                winner = self._run_batch(tiles, result.page, batch, cascade, result, tried, timer)
+                if winner:
+                    logger.debug("OCR cascade accepted %s after %d engine calls", winner.config, result.engine_calls)
+                    self._take_candidate(result, winner)
+                    return result
+                if result.fast_path:
+                    # Clean images are read with a single page mode
+                    break
             
-            for config in configs:
-                try:
-                    processed_image = self._preprocess_image(image)
-                    text = pytesseract.image_to_string(processed_image, lang='eng', config=config)
-                    confidence = self._get_confidence(processed_image)
-                    
-                    # Choose the result with highest confidence and reasonable length
-                    if confidence > best_confidence and len(text.strip()) > len(best_text.strip()):
-                        best_text = text
-                        best_confidence = confidence
-                        
-                except Exception as e:
-                    print(f"OCR config {config} failed: {e}")
-                    continue
+            # Choose the result with highest confidence and reasonable length
+            for candidate in tried:
+                if candidate.confidence > result.confidence and len(candidate.text.strip()) > len(result.text.strip()):
+                    self._take_candidate(result, candidate)
             
-            return best_text if best_text else "", best_confidence
+            return result
             
+        except ImageTooLargeError:
+            raise
         except Exception as e:
             print(f"Enhanced OCR Error: {e}")
-            return "", 0.0
\ No newline at end of file
+            return result
+        finally:
+            self._release_tiles(tiles)
+            if result.ocr_pixels:
+                self._record_path_time(result, time.perf_counter() - started)
+    
+    def _record_path_time(self, result: OCRResult, seconds: float):
+        """Track how long each quality gate path takes and log what the fast path saved"""
+        if result.fast_path:
+            result.time_saved = self.quality_gate.estimated_saving(seconds, result.ocr_pixels)
+            if result.time_saved is None:
+                logger.debug("Quality gate: fast path took %.2fs, no full path timing to compare yet", seconds)
+            else:
+                logger.debug("Quality gate: fast path took %.2fs, about %.2fs saved", seconds, result.time_saved)
+        self.quality_gate.record(FAST_PATH if result.fast_path else FULL_PATH, seconds, result.ocr_pixels)
+    
+    def _run_candidate(self, tiles: List[OCRTile], page: Optional[np.ndarray], config: str, timer: StageTimer,
+                       cancel_event: Optional[threading.Event] = None, workers: int = 1) -> OCRResult:
+        """OCR the image with one config, returning an empty candidate on failure"""
+        candidate = OCRResult(config=config)
+        try:
+            candidate.words = self._run_tiles(tiles, config, timer, cancel_event, workers)
+            candidate.page = page
+            candidate.text = self._data_to_text(candidate.words)
+            candidate.confidence = self._data_confidence(candidate.words)
+        except TesseractCancelled:
+            raise
+        except Exception as e:
+            print(f"OCR config {config} failed: {e}")
+        return candidate
+    
+    def _run_batch(self, tiles: List[OCRTile], page: Optional[np.ndarray], batch: List[str], cascade: OCRCascade,
+                   result: OCRResult, tried: List[OCRResult], timer: StageTimer) -> Optional[OCRResult]:
+        """Run a batch of configs concurrently and return the first accepted candidate"""
+        # Share the parallelism budget between the configs and their tiles
+        tile_workers = max(1, self.parallelism // len(batch))
+        if len(batch) == 1:
+            result.engine_calls += len(tiles)
+            candidate = self._run_candidate(tiles, page, batch[0], timer, workers=tile_workers)
+            tried.append(candidate)
+            if cascade.accept(candidate):
+                candidate.accepted = True
+                return candidate
+            return None
+        
+        cancel_event = threading.Event()
+        completed = {}
+        winner = None
+        with ThreadPoolExecutor(max_workers=len(batch)) as executor:
+            futures = {
+                executor.submit(self._run_candidate, tiles, page, config, timer, cancel_event, tile_workers): config
+                for config in batch
+            }
+            for future in as_completed(futures):
+                try:
+                    candidate = future.result()
+                except TesseractCancelled:
+                    continue
+                completed[candidate.config] = candidate
+                if winner is None and cascade.accept(candidate):
+                    candidate.accepted = True
+                    winner = candidate
+                    # Kill the candidates still running and drop the queued ones
+                    cancel_event.set()
+                    for pending in futures:
+                        pending.cancel()
+        
+        # Each config runs tesseract once per tile; a cancelled config counts all of its tiles
+        for future, config in futures.items():
+            if future.cancelled():
+                continue
+            result.engine_calls += len(tiles)
+            if config not in completed:
+                result.cancelled_calls += len(tiles)
+        
+        # Keep batch order so the fallback choice does not depend on timing
+        tried.extend(completed[config] for config in batch if config in completed)
+        return winner
+    
+    def _take_candidate(self, result: OCRResult, candidate: OCRResult):
+        """Copy a candidate's output into the overall result"""
+        result.text = candidate.text
+        result.confidence = candidate.confidence
+        result.config = candidate.config
+        result.accepted = candidate.accepted
+        result.words = candidate.words
+        result.line_calls = candidate.line_calls
+        result.repaired_rows = candidate.repaired_rows
@@ -0,0 +1,67 @@
+import threading
+from typing import Dict, Optional, Tuple
+import numpy as np
+from .image_analysis import ImageQuality, measure_quality
+
+FAST_PATH = "fast"
+FULL_PATH = "full"
+
+class QualityGate:
+    """Routes clean images to a fast OCR path and everything else to the full one.
+
+    Screenshots, digital bills and sharp, well-lit, straight photos skip the
+    denoising and contrast steps and are read with a single page mode. The
+    gate keeps a moving average of how long each path takes per megapixel so
+    every fast request can report roughly how much time it saved.
+    """
+
+    def __init__(self, min_sharpness: float, min_contrast: float, max_skew: float,
+                 enabled: bool = True, smoothing: float = 0.2):
+        self.min_sharpness = min_sharpness
+        self.min_contrast = min_contrast
+        self.max_skew = max_skew
+        self.enabled = enabled
+        self.smoothing = smoothing
+        # Exponentially weighted seconds per megapixel, per path
+        self._seconds_per_mpx: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def assess(self, gray: np.ndarray) -> Tuple[str, str]:
+        """Measure a grayscale image and pick its path, with the reason for the choice"""
+        if not self.enabled:
+            return FULL_PATH, "quality gate disabled"
+        return self.choose(measure_quality(gray))
+
+    def choose(self, quality: ImageQuality) -> Tuple[str, str]:
+        """Pick the path for measured image statistics, with the reason for the choice"""
+        if quality.skew is None and not quality.binary:
+            return FULL_PATH, "no text lines found to measure skew"
+        if quality.skew is not None and abs(quality.skew) > self.max_skew:
+            return FULL_PATH, f"skewed {quality.skew:.1f} degrees"
+        if quality.binary:
+            return FAST_PATH, "already binary"
+        if quality.sharpness < self.min_sharpness:
+            return FULL_PATH, f"blurry (sharpness {quality.sharpness:.0f})"
+        if quality.contrast < self.min_contrast:
+            return FULL_PATH, f"low contrast ({quality.contrast:.0f})"
+        return FAST_PATH, f"sharp (sharpness {quality.sharpness:.0f}, contrast {quality.contrast:.0f})"
+
+    def record(self, path: str, seconds: float, pixels: int):
+        """Fold a finished request's preprocessing and OCR time into the path's average"""
+        if pixels <= 0:
+            return
+        rate = seconds / (pixels / 1e6)
+        with self._lock:
+            previous = self._seconds_per_mpx.get(path)
+            if previous is None:
+                self._seconds_per_mpx[path] = rate
+            else:
+                self._seconds_per_mpx[path] = previous + self.smoothing * (rate - previous)
+
+    def estimated_saving(self, seconds: float, pixels: int) -> Optional[float]:
+        """Seconds a fast request saved compared to the full path's average, if known"""
+        with self._lock:
+            full_rate = self._seconds_per_mpx.get(FULL_PATH)
+        if full_rate is None or pixels <= 0:
+            return None
+        return max(0.0, full_rate * pixels / 1e6 - seconds)
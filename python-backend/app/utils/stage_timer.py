@@ -0,0 +1,42 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+# (stage, seconds, OCR config the stage ran with, if it was tied to one)
+StageSample = Tuple[str, float, Optional[str]]
+
+class StageTimer:
+    """Wall-clock time spent in each stage of one receipt.
+
+    Samples are plain tuples so a worker process can send them back with its
+    result; the main process labels them with the receipt's vendor and OCR
+    config and records them in the metrics histograms. Stages running on
+    several threads at once (tesseract calls) can record concurrently.
+    """
+
+    def __init__(self):
+        self.samples: List[StageSample] = []
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def elapsed(self) -> float:
+        """Seconds since the timer was created, in this process"""
+        return time.perf_counter() - self.started
+
+    @contextmanager
+    def stage(self, name: str, psm: Optional[str] = None) -> Iterator[None]:
+        """Time the enclosed block as one sample of stage name"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started, psm)
+
+    def add(self, name: str, seconds: float, psm: Optional[str] = None):
+        with self._lock:
+            self.samples.append((name, seconds, psm))
+
+    def extend(self, samples: Iterable[StageSample]):
+        with self._lock:
+            self.samples.extend(samples)
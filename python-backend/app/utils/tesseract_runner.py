@@ -0,0 +1,55 @@
+import os
+import shlex
+import subprocess
+import tempfile
+import threading
+from typing import Optional
+import cv2
+import numpy as np
+import pytesseract
+from pytesseract.pytesseract import file_to_dict
+
+class TesseractCancelled(Exception):
+    """Raised when a running tesseract process was killed on request"""
+
+def save_temp_image(image: np.ndarray) -> str:
+    """Write an image to a temporary file tesseract can read, returning its path"""
+    handle, path = tempfile.mkstemp(prefix="ocr_", suffix=".png")
+    os.close(handle)
+    # Fast compression - the file only lives for the duration of the OCR run
+    cv2.imwrite(path, image, [cv2.IMWRITE_PNG_COMPRESSION, 1])
+    return path
+
+def image_file_to_data(image_path: str, config: str = "", lang: str = "eng",
+                       threads: int = 1, cancel_event: Optional[threading.Event] = None,
+                       poll_interval: float = 0.02) -> dict:
+    """Run tesseract on an image file and return image_to_data style word data.
+
+    The process is killed as soon as cancel_event is set. OMP_THREAD_LIMIT is
+    set for the child so parallel runs do not oversubscribe the CPU.
+    """
+    cmd = [pytesseract.pytesseract.tesseract_cmd, image_path, "stdout", "-l", lang]
+    cmd += shlex.split(config)
+    cmd += ["-c", "tessedit_create_tsv=1", "tsv"]
+
+    env = dict(os.environ, OMP_THREAD_LIMIT=str(threads))
+
+    try:
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=env)
+    except FileNotFoundError:
+        raise pytesseract.TesseractNotFoundError()
+
+    while True:
+        try:
+            stdout, stderr = proc.communicate(timeout=poll_interval)
+            break
+        except subprocess.TimeoutExpired:
+            if cancel_event is not None and cancel_event.is_set():
+                proc.kill()
+                proc.communicate()
+                raise TesseractCancelled(f"tesseract {config} cancelled")
+
+    if proc.returncode != 0:
+        raise pytesseract.TesseractError(proc.returncode, stderr.decode("utf-8", "ignore").strip())
+
+    return file_to_dict(stdout.decode("utf-8", "ignore"), "\t", -1)
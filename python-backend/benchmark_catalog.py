@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Measure fuzzy product matching against the trigram catalog index
+
+Usage: python benchmark_catalog.py [catalog sizes...]
+
+Builds synthetic catalogs of canonical product names (10k and 50k products
+by default), garbles some of them the way OCR does ("NANDINI" -> "NANDINT",
+"500ml" -> "500m", dropped spaces) and reports how long matching a receipt's
+worth of names takes per item and how often the right product comes back.
+"""
+import random
+import sys
+import time
+sys.path.append('app')
+
+from app.models.product import CatalogProduct
+from app.services.product_catalog import ProductCatalog
+
+BRANDS = ["Nandini", "Amul", "Tata", "Maggi", "Parle", "Britannia", "Fortune", "Aashirvaad", "Haldiram",
+          "Everest", "MDH", "Saffola", "Surf", "Vim", "Lizol", "Kwality", "Ganesh", "Too Yum", "Mother Dairy"]
+PRODUCTS = ["Paste", "Salted Butter", "Tea Premium", "Spicy Noodles", "Biscuit", "Bread", "Rice Bran Oil",
+            "Atta", "Namkeen", "Garam Masala", "Chips", "Detergent", "Dishwash Bar", "Curd", "Paneer",
+            "Toned Milk", "Ghee", "Basmati Rice", "Coffee", "Juice"]
+SIZES = ["100g", "200g", "500g", "1kg", "5kg", "250ml", "500ml", "1L", "75g", "2kg"]
+# Characters OCR commonly confuses
+CONFUSIONS = {"i": "t", "l": "1", "o": "0", "e": "c", "n": "m", "s": "5"}
+
+SYLLABLES = ["ka", "ra", "mi", "su", "no", "ve", "ta", "li", "pa", "go", "de", "shi", "an", "bo", "ru", "ya"]
+
+def make_catalog(size: int, rng: random.Random):
+    """Products of the known brands plus made-up ones, so large catalogs stay varied like real ones"""
+    brands = BRANDS + ["".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).title()
+                       for _ in range(size // 20)]
+    return [CatalogProduct(id=f"p{i}", name=f"{rng.choice(brands)} {rng.choice(PRODUCTS)} {rng.choice(SIZES)}")
+            for i in range(size)]
+
+def garble(name: str, rng: random.Random) -> str:
+    """An OCR-style misreading of a product name"""
+    chars = list(name.upper())
+    for _ in range(rng.randint(1, 2)):
+        index = rng.randrange(len(chars))
+        chars[index] = CONFUSIONS.get(chars[index].lower(), chars[index]).upper()
+    text = "".join(chars)
+    if rng.random() < 0.5:
+        # Unit cut short: "500ML" -> "500M"
+        text = text[:-1]
+    return text.replace(" ", "-", 1) if rng.random() < 0.3 else text
+
+def benchmark(sizes, queries: int = 1000):
+    print("🧪 Benchmarking trigram product matching...")
+    print(f"{'products':>9s} {'build':>8s} {'µs/item':>9s} {'correct':>8s}")
+    print("-" * 38)
+    for size in sizes:
+        rng = random.Random(size)
+        products = make_catalog(size, rng)
+
+        catalog = ProductCatalog()
+        start = time.perf_counter()
+        catalog.upsert(products)
+        build = time.perf_counter() - start
+
+        targets = [rng.choice(products) for _ in range(queries)]
+        names = [garble(product.name, rng) for product in targets]
+        start = time.perf_counter()
+        matches = catalog.match_many(names)
+        per_item = (time.perf_counter() - start) / queries
+
+        # Duplicate names in the catalog are equally good answers
+        correct = sum(1 for target, match in zip(targets, matches)
+                      if match.product_name and match.product_name.lower() == target.name.lower())
+        print(f"{size:9d} {build:7.2f}s {per_item * 1e6:9.0f} {correct / queries:8.1%}")
+
+if __name__ == "__main__":
+    benchmark([int(arg) for arg in sys.argv[1:]] or [10000, 50000])
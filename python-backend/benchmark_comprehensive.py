@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Measure how DMart item extraction scales with the number of OCR lines
+
+Usage: python benchmark_comprehensive.py [line counts...] [--legacy-max N]
+
+Builds synthetic multi-page DMart output (1k, 10k and 50k lines by default),
+as produced when several pages are OCRed and concatenated, and times
+_extract_items with the comprehensive pass as it was before (a list rebuilt
+for every combined line, every item line parsed again) and as it is now.
+The previous version is quadratic, so it only runs up to --legacy-max lines
+(10000 by default; 50000 lines take about two minutes).
+"""
+import io
+import random
+import re
+import sys
+import time
+from contextlib import redirect_stdout
+from typing import AbstractSet, List
+sys.path.append('app')
+
+from app.processors.dmart_processor import NON_PRODUCT_NAME, DMartProcessor
+from app.processors.receipt_document import ReceiptDocument
+from app.processors.records import ItemRecord
+
+PRODUCTS = ["NANDINI SALTED-100g", "MAGGI SPICY GA-240g", "TATA SALT 1KG", "AMUL BUTTER 100GM",
+            "PARLE G BISCUIT", "FORTUNE RICE BRAN OIL", "BRITANNIA BREAD", "KWALITY WALLS",
+            "GANESH ATTA 5KG", "TOO YUM CHIPS"]
+PREFIXES = ["", "", "~ ", "= ", "#", "7 "]
+
+class LegacyDMartProcessor(DMartProcessor):
+    """DMart processor with the comprehensive pass as it was before it reused the main pass"""
+
+    def _extract_dmart_items_comprehensive(self, document: ReceiptDocument,
+                                           parsed_lines: AbstractSet[str] = frozenset()) -> List[ItemRecord]:
+        items = []
+        lines = document.lines
+
+        for line in lines:
+            if not line.strip() or len(line.strip()) < 15:
+                continue
+            item_patterns = [
+                r'^\d{6}\s+[A-Za-z]',
+                r'^[~\s]*\d{6}\s+[A-Za-z]',
+                r'^\d+\s+\d{6}\s+[A-Za-z]',
+                r'^[#=«©—»]\s*\d{6}\s+[A-Za-z]',
+                r'^[=\s]*\d{5,6}\s+[A-Za-z]',
+                r'^[—»]\s*\d{6}\s+[A-Za-z]',
+            ]
+            for pattern in item_patterns:
+                if re.match(pattern, line):
+                    item = self._parse_dmart_item_line(line, strict=False)
+                    if item:
+                        items.append(item)
+                        break
+
+        combined_lines = []
+        i = 0
+        while i < len(lines):
+            current_line = lines[i].strip()
+            if re.match(r'^\d+', current_line) and len(re.findall(r'\d+(?:\.\d+)?', current_line)) < 3:
+                if i + 1 < len(lines):
+                    next_line = lines[i + 1].strip()
+                    if re.search(r'\d+(?:\.\d+)?', next_line):
+                        combined_lines.append(f"{current_line} {next_line}")
+                        i += 2
+                        continue
+            combined_lines.append(current_line)
+            i += 1
+
+        for line in combined_lines:
+            if line not in [l.strip() for l in lines]:
+                item = self._parse_dmart_item_line(line, strict=False)
+                if item:
+                    items.append(item)
+
+        return [item for item in items
+                if 0 < item.unit_price <= 50000 and 0 < item.total_price <= 50000 and item.quantity <= 10000
+                and len(item.name) >= 3 and not NON_PRODUCT_NAME.match(item.name.lower())]
+
+def make_text(line_count: int, seed: int = 0) -> str:
+    """Concatenated DMart pages: header, a short item table, split item lines and tax lines"""
+    rng = random.Random(seed)
+    lines = []
+    page = 0
+    while len(lines) < line_count:
+        page += 1
+        lines += ["Avenue Supermarts Ltd", f"GSTIN 27AABCA{page:04d}F1ZR", "HSN Particulars Qty Rate Value"]
+        for row in range(12):
+            code = 100000 + (page * 100 + row) % 900000
+            name = f"{rng.choice(PRODUCTS)} P{page}R{row}"
+            qty = rng.randint(1, 3)
+            rate = rng.randint(10, 500)
+            if row % 5 == 4:
+                # Name and prices on separate lines
+                lines += [f"{code} {qty}", f"{name} {rate}.00 {rate * qty}.00"]
+            else:
+                lines.append(f"{rng.choice(PREFIXES)}{code} {name} {qty} {rate}.00 {rate * qty}.00")
+        lines += [f"Total Items: 12 Total Qty: {page}", "CGST 2.5% 12.40", "SGST 2.5% 12.40"]
+    return "\n".join(lines[:line_count])
+
+def extract(processor: DMartProcessor, text: str) -> List[ItemRecord]:
+    with redirect_stdout(io.StringIO()):
+        return processor._extract_items(ReceiptDocument(text))
+
+def timed(processor: DMartProcessor, text: str):
+    start = time.perf_counter()
+    items = extract(processor, text)
+    return items, time.perf_counter() - start
+
+def benchmark(line_counts: List[int], legacy_max: int = 10000):
+    print("🧪 Benchmarking DMart item extraction on multi-page OCR output...")
+    legacy, current = LegacyDMartProcessor(), DMartProcessor()
+    print(f"{'lines':>8s} {'items':>7s} {'before':>10s} {'after':>10s} {'after µs/line':>14s} {'speedup':>8s}")
+    print("-" * 62)
+    for line_count in line_counts:
+        text = make_text(line_count)
+        items, seconds = timed(current, text)
+        before = "skipped"
+        speedup = ""
+        if line_count <= legacy_max:
+            legacy_items, legacy_seconds = timed(legacy, text)
+            if [item.reading() for item in legacy_items] != [item.reading() for item in items]:
+                print(f"❌ Extractions disagree on {line_count} lines", file=sys.stderr)
+                sys.exit(1)
+            before = f"{legacy_seconds:.2f}s"
+            speedup = f"{legacy_seconds / seconds:.1f}x"
+        print(f"{line_count:8d} {len(items):7d} {before:>10s} {seconds:9.2f}s "
+              f"{seconds / line_count * 1e6:14.1f} {speedup:>8s}")
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    legacy_max = 10000
+    if '--legacy-max' in args:
+        index = args.index('--legacy-max')
+        legacy_max = int(args[index + 1])
+        del args[index:index + 2]
+    benchmark([int(arg) for arg in args] or [1000, 10000, 50000], legacy_max)
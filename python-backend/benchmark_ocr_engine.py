@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Compare the OCR engines: tesseract subprocesses (pytesseract) vs in-process tesserocr
+
+Usage: python benchmark_ocr_engine.py [runs]
+
+Measures engine startup (loading the language model), the fixed cost of a
+call on a one-line image, and a full synthetic receipt.
+"""
+import statistics
+import sys
+import time
+sys.path.append('app')
+
+from app.utils.ocr_engine import PytesseractEngine, TesserocrEngine, tesserocr
+from app.utils.ocr_service import OCRService
+from benchmark_scaling import make_receipt, tesseract_available
+
+def timed(fn, runs: int) -> float:
+    """Median wall time of fn() in milliseconds"""
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+def measure(engine, images: dict, runs: int) -> dict:
+    start = time.perf_counter()
+    engine.warm_up()
+    results = {"startup": (time.perf_counter() - start) * 1000}
+    for label, image in images.items():
+        handle = engine.load(image)
+        try:
+            results[label] = timed(lambda: engine.image_to_data(handle, '--psm 6'), runs)
+        finally:
+            engine.release(handle)
+    engine.close()
+    return results
+
+def benchmark():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    print(f"🧪 OCR engine overhead (median of {runs} runs)")
+
+    engines = []
+    if tesseract_available():
+        engines.append(PytesseractEngine())
+    else:
+        print("⚠️  tesseract binary not found - skipping pytesseract")
+    if tesserocr is not None:
+        engines.append(TesserocrEngine())
+    else:
+        print("⚠️  tesserocr not installed - skipping in-process engine")
+    if not engines:
+        print("❌ No OCR engine available")
+        return
+
+    service = OCRService(engine=engines[0])
+    page, _ = make_receipt(1.0, 2)
+    page = service._preprocess_image(page)
+    line = page[:page.shape[0] // 40]
+    images = {"one line": line, "full receipt": page}
+
+    print("-" * 70)
+    print(f"{'engine':14s} {'startup ms':>12s} {'one line ms':>12s} {'full receipt ms':>16s}")
+    for engine in engines:
+        results = measure(engine, images, runs)
+        print(f"{engine.name:14s} {results['startup']:12.1f} {results['one line']:12.1f} {results['full receipt']:16.1f}")
+    print("-" * 70)
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Measure the parse stage with slotted item records against pydantic models
+
+Usage: python benchmark_records.py [text files...] [--lines N ...]
+
+Parses the sample receipt (and any given OCR text files) plus synthetic
+multi-page receipts from benchmark_comprehensive, once with the processors
+building ItemRecord/ReceiptRecord and converting the result to
+ParsedReceiptData at the end, as ReceiptService does, and once with the
+processors building ReceiptItem/ParsedReceiptData for every candidate as
+they used to. Reports time per receipt and the memory the parse allocates.
+"""
+import io
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager, redirect_stdout
+sys.path.append('app')
+
+from app.models.receipt import ParsedReceiptData, ReceiptItem
+from app.processors import base_processor, dmart_processor, kpn_processor
+from app.processors.processor_factory import ProcessorFactory
+from app.processors.receipt_document import ReceiptDocument
+from app.services.receipt_service import ReceiptService
+from benchmark_comprehensive import make_text
+
+PROCESSOR_MODULES = (base_processor, dmart_processor, kpn_processor)
+
+@contextmanager
+def pydantic_items():
+    """Make the processors build pydantic models directly, as before records"""
+    saved = [(module, module.ItemRecord, module.ReceiptRecord) for module in PROCESSOR_MODULES]
+    for module in PROCESSOR_MODULES:
+        module.ItemRecord, module.ReceiptRecord = ReceiptItem, ParsedReceiptData
+    try:
+        yield
+    finally:
+        for module, item_class, receipt_class in saved:
+            module.ItemRecord, module.ReceiptRecord = item_class, receipt_class
+
+def parse_with_records(processor, text: str) -> ParsedReceiptData:
+    parsed = processor.process_receipt(ReceiptDocument(text))
+    return ReceiptService.receipt_data(parsed)
+
+def parse_with_models(processor, text: str) -> ParsedReceiptData:
+    with pydantic_items():
+        return processor.process_receipt(ReceiptDocument(text))
+
+def measure(parse, processor, text: str, rounds: int):
+    """(seconds per receipt, peak KiB allocated during one parse, the parsed data)"""
+    with redirect_stdout(io.StringIO()):
+        data = parse(processor, text)
+        start = time.perf_counter()
+        for _ in range(rounds):
+            parse(processor, text)
+        seconds = (time.perf_counter() - start) / rounds
+
+        tracemalloc.start()
+        parse(processor, text)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return seconds, peak / 1024, data
+
+def benchmark(inputs):
+    print("🧪 Benchmarking the parse stage: item records vs pydantic models...")
+    factory = ProcessorFactory()
+    print(f"{'receipt':>22s} {'items':>6s} {'models':>10s} {'records':>10s} {'speedup':>8s} "
+          f"{'models KiB':>11s} {'records KiB':>12s}")
+    print("-" * 86)
+    for label, text in inputs:
+        with redirect_stdout(io.StringIO()):
+            processor = factory.get_processor(text)
+        rounds = max(1, 20000 // max(1, text.count('\n')))
+        before, before_peak, expected = measure(parse_with_models, processor, text, rounds)
+        after, after_peak, data = measure(parse_with_records, processor, text, rounds)
+
+        if data.model_dump(exclude={'date'}) != expected.model_dump(exclude={'date'}):
+            print(f"❌ Results differ for {label}", file=sys.stderr)
+            sys.exit(1)
+        print(f"{label:>22s} {len(data.items):6d} {before * 1000:8.2f}ms {after * 1000:8.2f}ms "
+              f"{before / after:7.2f}x {before_peak:11.0f} {after_peak:12.0f}")
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    line_counts = [1000, 10000]
+    if '--lines' in args:
+        index = args.index('--lines')
+        line_counts = [int(arg) for arg in args[index + 1:]]
+        del args[index:]
+
+    inputs = []
+    for path in args or ['extracted_text.txt']:
+        with open(path) as f:
+            inputs.append((path, f.read()))
+    inputs += [(f"synthetic {count} lines", make_text(count)) for count in line_counts]
+    benchmark(inputs)
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Measure receipt response size and JSON encode time
+
+Usage: python benchmark_responses.py [text files...] [--lines N ...]
+
+Builds the ReceiptProcessResponse for the sample receipt (and any given OCR
+text files) plus synthetic multi-page receipts from benchmark_comprehensive,
+then encodes it the way FastAPI did by default (revalidation against the
+response_model and stdlib json), with orjson over model_dump, and with
+receipt_response (pydantic's JSON serializer) in full, without raw_text and
+with only the fields a receipt list needs.
+"""
+import asyncio
+import io
+import sys
+import time
+from contextlib import redirect_stdout
+sys.path.append('app')
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from app.models.receipt import OCRStats, ReceiptProcessResponse
+from app.processors.processor_factory import ProcessorFactory
+from app.services.receipt_service import ReceiptService
+from app.utils.json_encoding import data_fields, receipt_content, receipt_response
+from benchmark_comprehensive import make_text
+
+RESPONSE_FIELD = create_response_field(name="response", type_=ReceiptProcessResponse, mode="serialization")
+LOOP = asyncio.new_event_loop()
+
+def fastapi_default(result: ReceiptProcessResponse) -> bytes:
+    """What a route returning the model with response_model set used to send"""
+    content = LOOP.run_until_complete(
+        serialize_response(field=RESPONSE_FIELD, response_content=result, is_coroutine=True)
+    )
+    return JSONResponse(content).body
+
+def encoders():
+    yield "fastapi default", fastapi_default
+    yield "orjson", lambda result: ORJSONResponse(receipt_content(result)).body
+    for label, fields, include_raw_text in (("receipt_response", None, True),
+                                            ("receipt_response, no raw_text", None, False),
+                                            ("receipt_response, fields=vendor,total,items", "vendor,total,items", True)):
+        include = data_fields(fields, include_raw_text)
+        yield label, lambda result, include=include: receipt_response(result, include).body
+
+def time_per_call(encode, result, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        encode(result)
+    return (time.perf_counter() - start) / rounds
+
+def benchmark(inputs, rounds: int = 500):
+    print("🧪 Benchmarking receipt response encoding...")
+    factory = ProcessorFactory()
+    for label, text in inputs:
+        with redirect_stdout(io.StringIO()):
+            parsed = factory.get_processor(text).process_receipt(text)
+        result = ReceiptProcessResponse(
+            success=True,
+            data=ReceiptService.receipt_data(parsed, 0.9, OCRStats(engine_calls=1, config="--psm 6"))
+        )
+        receipt_rounds = max(5, rounds * 60 // max(60, len(parsed.items)))
+        print(f"\n📄 {label}: {len(parsed.items)} items, {len(parsed.raw_text or '')} chars of OCR text")
+        print(f"{'encoder':>44s} {'bytes':>9s} {'µs/receipt':>11s} {'speedup':>8s}")
+        print("-" * 75)
+        baseline = None
+        for name, encode in encoders():
+            size = len(encode(result))
+            seconds = time_per_call(encode, result, receipt_rounds)
+            baseline = baseline or seconds
+            print(f"{name:>44s} {size:9,d} {seconds * 1e6:11.0f} {baseline / seconds:7.1f}x")
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    line_counts = [1000]
+    if '--lines' in args:
+        index = args.index('--lines')
+        line_counts = [int(arg) for arg in args[index + 1:]]
+        del args[index:]
+
+    inputs = []
+    for path in args or ['extracted_text.txt']:
+        with open(path) as f:
+            inputs.append((path, f.read()))
+    inputs += [(f"synthetic {count} lines", make_text(count)) for count in line_counts]
+    benchmark(inputs)
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Compare the fixed 3x upscale with resolution-aware scaling before OCR
+
+Usage: python benchmark_scaling.py [receipt images...]
+
+Without arguments synthetic receipts at several resolutions are generated so
+the ground truth text is known. For real images the fixed-scale OCR output is
+used as the reference text.
+"""
+import difflib
+import os
+import sys
+import time
+import cv2
+import numpy as np
+sys.path.append('app')
+
+from app.utils.ocr_service import OCRService
+
+def make_receipt(font_scale: float, thickness: int, lines: int = 40):
+    """Synthetic receipt image and its text"""
+    line_height = int(40 * font_scale) + 12
+    text_lines = [f"{190230 + i} MAGGI SPICY {i:02d}-240g 1 {90 + i}.00 {90 + i}.00" for i in range(lines)]
+    width = int(cv2.getTextSize(text_lines[0], cv2.FONT_HERSHEY_SIMPLEX, font_scale, thickness)[0][0] * 1.15)
+    image = np.full((line_height * (lines + 2), width), 235, dtype=np.uint8)
+    for i, line in enumerate(text_lines):
+        cv2.putText(image, line, (int(width * 0.05), line_height * (i + 1)),
+                    cv2.FONT_HERSHEY_SIMPLEX, font_scale, 25, thickness)
+    noise = np.random.default_rng(lines).integers(0, 15, image.shape, dtype=np.uint8)
+    return cv2.add(image, noise), "\n".join(text_lines)
+
+def tesseract_available() -> bool:
+    try:
+        import pytesseract
+        pytesseract.get_tesseract_version()
+        return True
+    except Exception:
+        return False
+
+def run(service: OCRService, image: np.ndarray, with_ocr: bool):
+    """Preprocess (and optionally OCR) an image, returning timings and text"""
+    start = time.perf_counter()
+    processed = service._preprocess_image(image)
+    preprocess_ms = (time.perf_counter() - start) * 1000
+
+    text, ocr_ms = "", 0.0
+    if with_ocr:
+        handle = service.engine.load(processed)
+        try:
+            start = time.perf_counter()
+            text, _ = service._run_config(handle, '--psm 6')
+            ocr_ms = (time.perf_counter() - start) * 1000
+        finally:
+            service.engine.release(handle)
+    return processed, preprocess_ms, ocr_ms, text
+
+def similarity(text: str, reference: str) -> float:
+    normalize = lambda value: " ".join(value.split())
+    return difflib.SequenceMatcher(None, normalize(text), normalize(reference)).ratio()
+
+def benchmark():
+    print("🧪 Fixed 3x upscale vs resolution-aware scaling")
+    with_ocr = tesseract_available()
+    if not with_ocr:
+        print("⚠️  tesseract not found - reporting preprocessing cost only")
+
+    if len(sys.argv) > 1:
+        cases = [(os.path.basename(path), cv2.imread(path, cv2.IMREAD_GRAYSCALE), None) for path in sys.argv[1:]]
+    else:
+        cases = []
+        for label, font_scale, thickness in [("thermal crop", 0.45, 1), ("scan", 1.0, 2), ("phone photo", 2.6, 5)]:
+            image, truth = make_receipt(font_scale, thickness)
+            cases.append((label, image, truth))
+
+    fixed = OCRService(scale_mode='fixed')
+    auto = OCRService(scale_mode='auto')
+
+    print("-" * 100)
+    print(f"{'image':14s} {'size':>11s} {'mode':6s} {'scale':>6s} {'buffer MB':>10s} {'prep ms':>9s} {'ocr ms':>9s} {'accuracy':>9s}")
+    for label, image, truth in cases:
+        reference = truth
+        for mode, service in (("fixed", fixed), ("auto", auto)):
+            scale, _ = service._choose_scale(image)
+            processed, preprocess_ms, ocr_ms, text = run(service, image, with_ocr)
+            if reference is None:
+                reference = text
+            accuracy = f"{similarity(text, reference):.3f}" if with_ocr else "n/a"
+            size = f"{image.shape[1]}x{image.shape[0]}"
+            print(f"{label:14s} {size:>11s} {mode:6s} {scale:6.2f} {processed.nbytes / 1024 / 1024:10.1f} "
+                  f"{preprocess_ms:9.1f} {ocr_ms:9.1f} {accuracy:>9s}")
+    print("-" * 100)
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Compare single-pass OCR with tiled parallel OCR on tall receipts
+
+Usage: python benchmark_tiling.py [receipt images...]
+
+Without arguments a synthetic DMart-length receipt (~95 lines) is generated.
+"""
+import os
+import sys
+import time
+import numpy as np
+sys.path.append('app')
+
+from app.utils.ocr_service import OCRService
+from app.utils.stage_timer import StageTimer
+from benchmark_scaling import make_receipt, similarity, tesseract_available
+
+def ocr(service: OCRService, image: np.ndarray):
+    """OCR an already preprocessed page, returning wall time, tile count and text"""
+    tiles = service._load_tiles(image)
+    try:
+        start = time.perf_counter()
+        data = service._run_tiles(tiles, '--psm 6', StageTimer(), workers=service.parallelism)
+        return (time.perf_counter() - start) * 1000, len(tiles), service._data_to_text(data)
+    finally:
+        service._release_tiles(tiles)
+
+def benchmark():
+    print("🧪 Single-pass vs tiled parallel OCR")
+    if not tesseract_available():
+        print("❌ tesseract not found - nothing to measure")
+        return
+
+    if len(sys.argv) > 1:
+        import cv2
+        cases = [(os.path.basename(path), cv2.imread(path, cv2.IMREAD_GRAYSCALE)) for path in sys.argv[1:]]
+    else:
+        image, _ = make_receipt(1.0, 2, lines=95)
+        cases = [("synthetic dmart", image)]
+
+    cores = os.cpu_count() or 1
+    if cores == 1:
+        print("⚠️  single CPU - tiling is disabled without spare cores")
+    single = OCRService(parallelism=cores, tile_height=0)
+    tiled = OCRService(parallelism=cores)
+
+    print("-" * 80)
+    print(f"{'image':18s} {'size':>11s} {'mode':7s} {'tiles':>6s} {'ocr ms':>9s} {'speedup':>8s} {'match':>7s}")
+    for label, image in cases:
+        processed = single._preprocess_image(image)
+        size = f"{processed.shape[1]}x{processed.shape[0]}"
+        single_ms, _, reference = ocr(single, processed)
+        tiled_ms, tile_count, text = ocr(tiled, processed)
+        print(f"{label:18s} {size:>11s} {'single':7s} {1:6d} {single_ms:9.1f} {1.0:8.2f} {1.0:7.3f}")
+        print(f"{label:18s} {size:>11s} {'tiled':7s} {tile_count:6d} {tiled_ms:9.1f} "
+              f"{single_ms / tiled_ms:8.2f} {similarity(text, reference):7.3f}")
+    print("-" * 80)
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Compare peak memory of the base64 JSON upload path with the binary upload path
+"""
+import base64
+import io
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+import cv2
+import numpy as np
+from PIL import Image
+sys.path.append('app')
+
+from app.utils.ocr_service import OCRService, decode_base64
+
+def make_receipt_jpeg(width: int = 3000, height: int = 4000) -> bytes:
+    """Synthetic phone-photo sized receipt"""
+    image = np.full((height, width, 3), 235, dtype=np.uint8)
+    for i, y in enumerate(range(120, height - 120, 70)):
+        cv2.putText(image, f"{100000 + i} ITEM NAME {i:03d}-500g  1  {i + 10}.00  {i + 10}.00",
+                    (100, y), cv2.FONT_HERSHEY_SIMPLEX, 1.6, (30, 30, 30), 3)
+    noise = np.random.default_rng(0).integers(0, 20, image.shape, dtype=np.uint8)
+    ok, encoded = cv2.imencode('.jpg', cv2.add(image, noise), [cv2.IMWRITE_JPEG_QUALITY, 90])
+    return encoded.tobytes()
+
+def legacy_base64_path(image_bytes: bytes):
+    """What /api/receipts/process did before: JSON string -> split -> b64decode -> PIL -> numpy"""
+    body = json.dumps({"image_base64": "data:image/jpeg;base64," + base64.b64encode(image_bytes).decode()})
+    base64_image = json.loads(body)["image_base64"]
+    if ',' in base64_image:
+        base64_image = base64_image.split(',')[1]
+    decoded = base64.b64decode(base64_image)
+    image = Image.open(io.BytesIO(decoded))
+    image = image.convert('RGB')
+    img_array = np.array(image)
+    return cv2.cvtColor(img_array, cv2.COLOR_RGB2GRAY)
+
+def current_base64_path(image_bytes: bytes):
+    """Base64 JSON request decoded by the current service"""
+    body = json.dumps({"image_base64": "data:image/jpeg;base64," + base64.b64encode(image_bytes).decode()})
+    decoded = decode_base64(json.loads(body)["image_base64"])
+    return OCRService()._decode_image_bytes(decoded)
+
+def binary_upload_path(image_bytes: bytes):
+    """Multipart upload: buffer -> np.frombuffer -> cv2.imdecode"""
+    return OCRService()._decode_image_bytes(image_bytes)
+
+PATHS = {
+    "legacy base64": legacy_base64_path,
+    "base64": current_base64_path,
+    "binary upload": binary_upload_path,
+}
+
+def _current_rss() -> int:
+    """Resident set size of this process in bytes (Linux)"""
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+def _measure(name: str, image_bytes: bytes, queue):
+    """Run one path in a fresh process and report its peak RSS growth and time"""
+    baseline = _current_rss()
+    peak = baseline
+    running = True
+
+    def sample():
+        nonlocal peak
+        while running:
+            peak = max(peak, _current_rss())
+            time.sleep(0.0005)
+
+    sampler = threading.Thread(target=sample)
+    sampler.start()
+    start = time.perf_counter()
+    PATHS[name](image_bytes)
+    elapsed = time.perf_counter() - start
+    running = False
+    sampler.join()
+    queue.put(((peak - baseline) / 1024 / 1024, elapsed * 1000))
+
+def benchmark():
+    print("🧪 Measuring peak memory per upload path...")
+    image_bytes = make_receipt_jpeg()
+    print(f"📸 Upload size: {len(image_bytes) / 1024 / 1024:.1f} MB (base64: {len(image_bytes) * 4 / 3 / 1024 / 1024:.1f} MB)")
+
+    context = multiprocessing.get_context("spawn")
+    print("-" * 60)
+    for name in PATHS:
+        queue = context.Queue()
+        process = context.Process(target=_measure, args=(name, image_bytes, queue))
+        process.start()
+        peak, elapsed = queue.get()
+        process.join()
+        print(f"{name:15s} peak RSS growth: {peak:8.1f} MB   decode time: {elapsed:7.1f} ms")
+    print("-" * 60)
+
+if __name__ == "__main__":
+    benchmark()
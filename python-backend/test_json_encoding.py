@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Test receipt field selection and response encoding
+"""
+import json
+import sys
+sys.path.append('app')
+
+import orjson
+from fastapi.testclient import TestClient
+from app.main import app
+from app.models.receipt import ParsedReceiptData, ReceiptItem, ReceiptProcessResponse
+from app.utils.json_encoding import DATA_FIELDS, data_fields, ndjson_line, receipt_content, receipt_response
+
+RESULT = ReceiptProcessResponse(success=True, data=ParsedReceiptData(
+    vendor="DMart", date="2024-01-01", total=56.0, raw_text="D-Mart\n040510 NANDINI 56.00", confidence=91.5,
+    items=[ReceiptItem(name="NANDINI", quantity=1.0, unit_price=56.0, total_price=56.0, category="Dairy")]
+))
+
+def test_selecting_fields():
+    """Listed fields are returned, surrounding spaces and empty entries ignored"""
+    assert data_fields() is None
+    assert data_fields(" vendor, total,,items ") == {"vendor", "total", "items"}
+    assert receipt_content(RESULT, {"vendor", "total"}) == {
+        "success": True, "data": {"vendor": "DMart", "total": 56.0}, "error": None
+    }
+
+def test_unknown_fields_are_rejected():
+    """Unknown names raise ValueError listing them; the API answers 400"""
+    try:
+        data_fields("vendor,totals,itemz")
+        assert False, "unknown fields should be rejected"
+    except ValueError as e:
+        assert str(e).startswith("Unknown fields: itemz, totals ")
+        assert all(field in str(e) for field in DATA_FIELDS)
+
+    response = TestClient(app).post("/api/receipts/process/upload?fields=vendor,totals",
+                                    files={"file": ("receipt.jpg", b"not an image", "image/jpeg")})
+    assert response.status_code == 400
+    assert "totals" in response.json()["detail"]
+
+def test_raw_text_can_be_left_out():
+    """include_raw_text=False drops raw_text from all fields or from the selected ones"""
+    assert data_fields(include_raw_text=False) == set(DATA_FIELDS) - {"raw_text"}
+    assert data_fields("vendor,raw_text", include_raw_text=False) == {"vendor"}
+    content = json.loads(receipt_response(RESULT, data_fields(include_raw_text=False)).body)
+    assert "raw_text" not in content["data"]
+    assert content["data"]["items"][0]["category"] == "Dairy"
+    assert content["data"]["confidence"] == 91.5
+
+def test_encodings_agree():
+    """The JSON response and the NDJSON line carry the same content as the model"""
+    assert json.loads(receipt_response(RESULT).body) == RESULT.model_dump()
+    line = ndjson_line({"index": 0, **receipt_content(RESULT, {"vendor"})})
+    assert line.endswith(b"\n") and line.count(b"\n") == 1
+    assert orjson.loads(line) == {"index": 0, "success": True, "data": {"vendor": "DMart"}, "error": None}
+
+if __name__ == "__main__":
+    test_selecting_fields()
+    test_unknown_fields_are_rejected()
+    test_raw_text_can_be_left_out()
+    test_encodings_agree()
+    print("✅ JSON encoding tests passed")
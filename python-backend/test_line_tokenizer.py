@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Test the single-pass line tokenizer against the regexes it replaced
+"""
+import io
+import os
+import random
+import re
+import sys
+from contextlib import redirect_stdout
+sys.path.append('app')
+
+from app.processors.dmart_processor import DMartProcessor
+from app.processors.line_tokenizer import CODE, DECIMAL, INTEGER, SYMBOL, WORD, tokenize
+from benchmark_tokenizer import LegacyDMartProcessor
+
+SAMPLE_TEXT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'extracted_text.txt')
+
+# OCR noise the tokenizer has to split the same way the regexes did
+TRICKY_LINES = [
+    "040510 NANDINI SALTED-100g 1 56.00 56.00",
+    "190230 MAGGI SPICY GA-240g = 1 90.00 90.00",
+    "~ 040510 NANDINI 2 99,00 198.00",
+    "#250100 KWALITY 1.5.00 2,50,00 7.",
+    "12345678 x1.00y 3,14 .50 1..2 ,75",
+    "a1,23b 4,567 12,34,56 9.9.9.9",
+    "",
+]
+
+def sample_lines():
+    with open(SAMPLE_TEXT) as f:
+        lines = [line.strip() for line in f if line.strip()]
+    rng = random.Random(7)
+    alphabet = "0123456789.,  ab-=~#"
+    noise = ["".join(rng.choice(alphabet) for _ in range(rng.randint(1, 30))) for _ in range(3000)]
+    return lines + TRICKY_LINES + noise
+
+def test_number_views_match_regexes():
+    """Item code, decimals, integers and comma decimals equal the legacy regex results"""
+    for line in sample_lines():
+        tokens = tokenize(line)
+        code = re.search(r'\d{5,6}', line)
+        assert tokens.item_code == (code.group() if code else None), line
+        assert tokens.decimals == re.findall(r'\b\d+\.\d+\b', line), line
+        assert tokens.integers == re.findall(r'\b(\d+)\b', line), line
+        assert tokens.comma_decimals == re.findall(r'\b(\d{1,4}),(\d{2})\b', line), line
+
+def test_token_stream():
+    """Codes, words, decimals and noise come back typed and in order"""
+    tokens = tokenize("~ 040510 NANDINI 1 56.00")
+    assert [(token.kind, token.text) for token in tokens] == [
+        (SYMBOL, "~"), (CODE, "040510"), (WORD, "NANDINI"), (INTEGER, "1"), (DECIMAL, "56.00")
+    ]
+    assert all("~ 040510 NANDINI 1 56.00"[token.start:token.end] == token.text for token in tokens)
+
+def test_dmart_item_lines_match_legacy_parser():
+    """The tokenizer-based DMart line parser reads every line as the regex parser did"""
+    legacy, current = LegacyDMartProcessor(), DMartProcessor()
+    with redirect_stdout(io.StringIO()):
+        for line in sample_lines():
+            before, after = legacy._parse_dmart_item_line(line), current._parse_dmart_item_line(line)
+            assert (before and before.reading()) == (after and after.reading()), line
+
+if __name__ == "__main__":
+    test_number_views_match_regexes()
+    test_token_stream()
+    test_dmart_item_lines_match_legacy_parser()
+    print("✅ Line tokenizer tests passed")
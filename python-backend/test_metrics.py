@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Test the Prometheus text rendering of the latency histograms
+"""
+import sys
+sys.path.append('app')
+
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.metrics import Histogram
+
+def test_bucket_bounds_are_inclusive():
+    """A sample equal to a bound counts in that bucket; counts are cumulative up to +Inf"""
+    histogram = Histogram("stage_seconds", "Stage time", ("stage",), buckets=(0.5, 0.1, 1.0))
+    for seconds in (0.1, 0.05, 0.1000001, 0.5, 1.0, 1.5):
+        histogram.observe(seconds, "ocr")
+    assert histogram.render()[2:6] == [
+        'stage_seconds_bucket{stage="ocr",le="0.1"} 2',
+        'stage_seconds_bucket{stage="ocr",le="0.5"} 4',
+        'stage_seconds_bucket{stage="ocr",le="1.0"} 5',
+        'stage_seconds_bucket{stage="ocr",le="+Inf"} 6',
+    ]
+
+def test_sum_and_count_lines():
+    """Each label set ends with its _sum and _count; label sets come out sorted"""
+    histogram = Histogram("stage_seconds", "Stage time", ("stage", "vendor"), buckets=(1.0,))
+    histogram.observe(0.25, "parse", 'Big "Bazaar"')
+    histogram.observe(2.0, "ocr", "DMart")
+    histogram.observe(0.5, "ocr", "DMart")
+    assert histogram.render() == [
+        "# HELP stage_seconds Stage time",
+        "# TYPE stage_seconds histogram",
+        'stage_seconds_bucket{stage="ocr",vendor="DMart",le="1.0"} 1',
+        'stage_seconds_bucket{stage="ocr",vendor="DMart",le="+Inf"} 2',
+        'stage_seconds_sum{stage="ocr",vendor="DMart"} 2.5',
+        'stage_seconds_count{stage="ocr",vendor="DMart"} 2',
+        'stage_seconds_bucket{stage="parse",vendor="Big \\"Bazaar\\"",le="1.0"} 1',
+        'stage_seconds_bucket{stage="parse",vendor="Big \\"Bazaar\\"",le="+Inf"} 1',
+        'stage_seconds_sum{stage="parse",vendor="Big \\"Bazaar\\""} 0.25',
+        'stage_seconds_count{stage="parse",vendor="Big \\"Bazaar\\""} 1',
+    ]
+
+def test_histogram_without_labels():
+    """Without labels the buckets carry only le and the totals none"""
+    histogram = Histogram("wait_seconds", "Queue wait", (), buckets=(1.0,))
+    histogram.observe(0.5)
+    assert histogram.render()[2:] == [
+        'wait_seconds_bucket{le="1.0"} 1',
+        'wait_seconds_bucket{le="+Inf"} 1',
+        'wait_seconds_sum 0.5',
+        'wait_seconds_count 1',
+    ]
+
+def test_metrics_endpoint_content_type():
+    """The exposition format version and a single charset are sent"""
+    response = TestClient(app).get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "text/plain; version=0.0.4; charset=utf-8"
+    assert "# TYPE receipt_stage_seconds histogram" in response.text
+
+if __name__ == "__main__":
+    test_bucket_bounds_are_inclusive()
+    test_sum_and_count_lines()
+    test_histogram_without_labels()
+    test_metrics_endpoint_content_type()
+    print("✅ Metrics tests passed")
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Test product categorization and fuzzy matching against the catalog
+"""
+import random
+import sys
+sys.path.append('app')
+
+from app.models.product import CatalogProduct
+from app.processors.keyword_scanner import KeywordScanner
+from app.processors.product_categorizer import DEFAULT_TAXONOMY, ProductCategorizer
+from app.services.product_catalog import ProductCatalog
+
+def substring_category(name: str) -> str:
+    """How categorize_product worked before the scanner: the first category with a keyword in the name"""
+    lower_name = name.lower()
+    for category, keywords in DEFAULT_TAXONOMY:
+        if any(keyword in lower_name for keyword in keywords):
+            return category
+    return 'Other'
+
+def generated_names(count: int):
+    """Names mixing taxonomy keywords into noise, often several and often inside other words"""
+    rng = random.Random(11)
+    keywords = [keyword for _, words in DEFAULT_TAXONOMY for keyword in words]
+    pieces = keywords + ["nandini", "paste", "500ml", "spicy", "premium", "ga-240g", "x", "ca"]
+    names = []
+    for _ in range(count):
+        words = [rng.choice(pieces) for _ in range(rng.randint(1, 4))]
+        separator = rng.choice([" ", "", "-"])
+        name = separator.join(words)
+        names.append(name.upper() if rng.random() < 0.5 else name)
+    return names
+
+def test_scanner_finds_overlapping_keywords():
+    """Keywords inside, overlapping and starting other keywords are all reported"""
+    scanner = KeywordScanner(["tea", "team", "ea", "am", "masala"])
+    assert scanner.find("steam masala") == {"tea", "team", "ea", "am", "masala"}
+    assert sorted(scanner.finditer("teams")) == [(0, "tea"), (0, "team"), (1, "ea"), (2, "am")]
+    assert KeywordScanner([]).find("anything") == set()
+
+def test_categorizer_matches_substring_rules():
+    """One scan per batch gives the same categories as checking every keyword in taxonomy order"""
+    names = generated_names(5000)
+    categorizer = ProductCategorizer(DEFAULT_TAXONOMY, cache_size=256)
+    expected = [substring_category(name) for name in names]
+    assert categorizer.categorize_many(names) == expected
+    # Again, partly from the memo
+    assert categorizer.categorize_many(names[-300:]) == expected[-300:]
+    assert [categorizer.categorize(name) for name in names[:300]] == expected[:300]
+
+def test_categorizer_priority_and_default():
+    """A name with keywords of several categories gets the first; none gives the default"""
+    categorizer = ProductCategorizer(DEFAULT_TAXONOMY)
+    assert categorizer.categorize("MAGGI MASALA NOODLES") == "Spices"
+    assert categorizer.categorize("NANDINI PASTE") == "Other"
+    assert categorizer.categorize_many([]) == []
+
+def test_catalog_matches_ocr_misreads():
+    """Garbled names find their product; unrelated names score below min_score"""
+    catalog = ProductCatalog(min_score=0.3)
+    catalog.upsert([
+        CatalogProduct(id="1", name="Nandini Paste 500ml", category="Dairy"),
+        CatalogProduct(id="2", name="Maggi Spicy Garlic Noodles 240g", category="Snacks"),
+        CatalogProduct(id="3", name="Tata Tea Premium 1kg", category="Beverages"),
+    ])
+    matches = catalog.match_many(["NANDINT PASTE-500m", "MAGGI SPICY GA-240g", "TATA TEA PREMIUM", "XYZ"])
+    assert [match.product_id for match in matches] == ["1", "2", "3", None]
+    assert matches[0].category == "Dairy" and 0.3 <= matches[0].score < 1.0
+    assert catalog.match("Tata Tea Premium 1kg").score == 1.0
+    assert catalog.match("NANDINT PASTE-500m", min_score=0.99).product_id is None
+
+def test_catalog_updates():
+    """Upserts replace products with the same id and removed products stop matching"""
+    catalog = ProductCatalog()
+    catalog.upsert([CatalogProduct(id="1", name="Amul Butter 100g"), CatalogProduct(id="2", name="Amul Ghee 1L")])
+    catalog.upsert([CatalogProduct(id="1", name="Nandini Butter 100g")])
+    assert len(catalog) == 2
+    assert catalog.match("NANDINI BUTTER").product_name == "Nandini Butter 100g"
+    assert catalog.remove("2") and not catalog.remove("2")
+    assert catalog.match("AMUL GHEE").product_id != "2"
+    catalog.upsert([CatalogProduct(id="3", name="Amul Ghee 1L")])
+    assert catalog.match("AMUL GHEE 1L").product_id == "3"
+
+if __name__ == "__main__":
+    test_scanner_finds_overlapping_keywords()
+    test_categorizer_matches_substring_rules()
+    test_categorizer_priority_and_default()
+    test_catalog_matches_ocr_misreads()
+    test_catalog_updates()
+    print("✅ Product matching tests passed")
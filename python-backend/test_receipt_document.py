@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Test that one shared ReceiptDocument parses like the plain text it wraps
+"""
+import io
+import os
+import sys
+from contextlib import redirect_stdout
+sys.path.append('app')
+
+from app.processors.processor_factory import ProcessorFactory
+from app.processors.receipt_document import ReceiptDocument
+
+SAMPLE_TEXT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'extracted_text.txt')
+
+def sample_text() -> str:
+    with open(SAMPLE_TEXT) as f:
+        return f.read()
+
+def test_views_are_computed_once():
+    """Each view is built on first use and then shared"""
+    document = ReceiptDocument("  D-Mart Avenue  \n\n 040510 NANDINI 56.00 \n")
+    assert document.lines == ["D-Mart Avenue", "040510 NANDINI 56.00"]
+    assert document.lines is document.lines
+    assert document.lower_lines == ["d-mart avenue", "040510 nandini 56.00"]
+    assert document.numeric_spans == [[], [(0, 6), (15, 20)]]
+    assert ReceiptDocument.coerce(document) is document
+    assert ReceiptDocument.coerce(None).lines == []
+
+def test_shared_document_parses_like_text():
+    """Vendor detection and parsing give the same result from a document as from its text"""
+    text = sample_text()
+    factory = ProcessorFactory()
+    document = ReceiptDocument(text)
+    with redirect_stdout(io.StringIO()):
+        processor = factory.get_processor(document)
+        assert processor.name == factory.get_processor(text).name == "DMart"
+        from_document = processor.process_receipt(document)
+        from_text = processor.process_receipt(text)
+    assert (from_document.vendor, from_document.total) == (from_text.vendor, from_text.total)
+    assert [item.reading() for item in from_document.items] == [item.reading() for item in from_text.items]
+    assert [item.category for item in from_document.items] == [item.category for item in from_text.items]
+
+if __name__ == "__main__":
+    test_views_are_computed_once()
+    test_shared_document_parses_like_text()
+    print("✅ Receipt document tests passed")
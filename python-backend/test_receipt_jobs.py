@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Test background jobs: admission next to interactive requests, storage and retention
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+sys.path.append('app')
+
+from app.models.receipt import ReceiptProcessResponse
+from app.services import receipt_service
+from app.services.job_store import JOB_COMPLETED, JOB_FAILED, JOB_QUEUED, JobStore
+from app.services.receipt_service import ReceiptService
+from app.services.worker_pool import PoolFullError, WorkerPool
+
+class SlowWorkerService:
+    """Stands in for the per-process service of a pool worker"""
+
+    def process_image(self, image_bytes, progress=None, timer=None):
+        time.sleep(0.2)
+        return ReceiptProcessResponse(success=False, error=f"processed {image_bytes.decode()}")
+
+def thread_pool(max_workers: int, max_queue: int) -> WorkerPool:
+    """WorkerPool with its admission queue but threads instead of spawned processes"""
+    pool = WorkerPool(max_workers=max_workers, max_queue=max_queue)
+    pool.start()
+    pool._executor.shutdown()
+    pool._executor = ThreadPoolExecutor(max_workers)
+    return pool
+
+def test_job_backlog_leaves_room_for_interactive_requests():
+    """With 1 worker, queue size 2 and 6 queued jobs, an interactive request is still admitted"""
+    async def run():
+        saved = receipt_service._worker_service
+        receipt_service._worker_service = SlowWorkerService()
+        pool = thread_pool(max_workers=1, max_queue=2)
+        try:
+            store = JobStore(os.path.join(tempfile.mkdtemp(), 'jobs.db'))
+            service = ReceiptService(pool=pool, job_store=store)
+            job_ids = [service.submit_job(f"job {i}".encode()) for i in range(6)]
+            await asyncio.sleep(0.05)
+            assert pool.in_flight < pool.capacity
+
+            result, _ = await pool.submit(receipt_service._process_image_in_worker, b"interactive", time.time())
+            assert result.error == "processed interactive"
+
+            statuses = [await service.get_job(job_id, wait=5) for job_id in job_ids]
+            assert [job.status for job in statuses] == [JOB_FAILED] * 6
+        finally:
+            receipt_service._worker_service = saved
+            pool.shutdown()
+    asyncio.run(run())
+
+def test_concurrent_batches_leave_room_for_interactive_requests():
+    """Three batches at once on 1 worker with queue size 2 still admit an interactive request"""
+    async def run():
+        saved = receipt_service._worker_service
+        receipt_service._worker_service = SlowWorkerService()
+        pool = thread_pool(max_workers=1, max_queue=2)
+        try:
+            service = ReceiptService(pool=pool)
+
+            async def batch(number):
+                images = [(f"{number}-{i}.jpg", f"batch {number}-{i}".encode()) for i in range(2)]
+                return [line async for line in service.process_batch(images)]
+
+            batches = [asyncio.create_task(batch(number)) for number in range(3)]
+            await asyncio.sleep(0.05)
+            assert pool.in_flight < pool.capacity
+
+            result = await service.process_image_async(b"interactive")
+            assert result.error == "processed interactive"
+            lines = [line for lines in await asyncio.gather(*batches) for line in lines]
+            assert sorted(line["error"] for line in lines) == [
+                f"processed batch {number}-{i}" for number in range(3) for i in range(2)
+            ]
+            assert pool.rejected == 0
+        finally:
+            receipt_service._worker_service = saved
+            pool.shutdown()
+    asyncio.run(run())
+
+def test_interactive_requests_are_rejected_when_the_queue_is_full():
+    """Admission still rejects interactive requests once every slot is taken"""
+    async def run():
+        saved = receipt_service._worker_service
+        receipt_service._worker_service = SlowWorkerService()
+        pool = thread_pool(max_workers=1, max_queue=0)
+        try:
+            first = asyncio.create_task(pool.submit(receipt_service._process_image_in_worker, b"a", time.time()))
+            await asyncio.sleep(0.05)
+            try:
+                await pool.submit(receipt_service._process_image_in_worker, b"b", time.time())
+                assert False, "second request should have been rejected"
+            except PoolFullError:
+                pass
+            await first
+            assert pool.rejected == 1
+        finally:
+            receipt_service._worker_service = saved
+            pool.shutdown()
+    asyncio.run(run())
+
+def test_job_database_opened_on_start():
+    """Creating the service touches no files; start() creates the database and its directory"""
+    db_path = os.path.join(tempfile.mkdtemp(), 'data', 'jobs.db')
+    service = ReceiptService(job_db_path=db_path)
+    assert service.job_store is None and not os.path.exists(db_path)
+    service.start()
+    assert os.path.exists(db_path)
+    service.shutdown()
+
+def test_finished_jobs_expire():
+    """Completed and failed jobs past the retention are pruned, pending ones are kept"""
+    store = JobStore(os.path.join(tempfile.mkdtemp(), 'jobs.db'), retention=60)
+    completed, failed, queued = store.create(b"1"), store.create(b"2"), store.create(b"3")
+    store.complete(completed, '{"success": true}')
+    store.fail(failed, "unreadable")
+    assert store.get(completed)["status"] == JOB_COMPLETED
+    assert store.get_image(completed) is None
+    assert store.prune() == 0
+
+    store.retention = 0.01
+    time.sleep(0.05)
+    assert store.prune() == 2
+    assert store.get(completed) is None and store.get(failed) is None
+    assert store.get(queued)["status"] == JOB_QUEUED
+    assert store.pending() == [queued]
+
+if __name__ == "__main__":
+    test_job_backlog_leaves_room_for_interactive_requests()
+    test_concurrent_batches_leave_room_for_interactive_requests()
+    test_interactive_requests_are_rejected_when_the_queue_is_full()
+    test_job_database_opened_on_start()
+    test_finished_jobs_expire()
+    print("✅ Receipt job tests passed")
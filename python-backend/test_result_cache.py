@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Test the parsed result cache: byte budget, LRU order and the SQLite copy
+"""
+import os
+import sys
+import tempfile
+sys.path.append('app')
+
+from app.models.receipt import ParsedReceiptData
+from app.services.result_cache import ResultCache, cache_key
+
+def receipt(name: str, size: int = 100) -> ParsedReceiptData:
+    return ParsedReceiptData(vendor=name, date="2024-01-01", total=1.0, items=[], raw_text="x" * size)
+
+def entry_size(data: ParsedReceiptData) -> int:
+    return len(data.model_dump_json().encode("utf-8"))
+
+def test_evicts_to_the_byte_budget():
+    """Entries are evicted oldest first until the total size fits the budget"""
+    size = entry_size(receipt("a"))
+    cache = ResultCache(max_bytes=3 * size)
+    for name in "abcd":
+        cache.put(name, receipt(name))
+    assert cache.stats()["entries"] == 3
+    assert cache.stats()["bytes"] == 3 * size <= cache.max_bytes
+    assert cache.get("a") is None
+    assert [cache.get(name).vendor for name in "bcd"] == ["b", "c", "d"]
+
+    # One larger entry pushes out as many as it needs
+    cache.put("e", receipt("e", size=100 + 2 * size))
+    assert cache.stats()["bytes"] <= cache.max_bytes
+    assert [name for name in "bcde" if cache.get(name)] == ["e"]
+
+def test_lookups_refresh_lru_order():
+    """A hit makes an entry the most recently used, so the next eviction skips it"""
+    cache = ResultCache(max_bytes=3 * entry_size(receipt("a")))
+    for name in "abc":
+        cache.put(name, receipt(name))
+    assert cache.get("a").vendor == "a"
+    cache.put("d", receipt("d"))
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+
+    # Re-storing a key updates it in place and also counts as a use
+    cache.put("c", receipt("c"))
+    cache.put("e", receipt("e"))
+    assert cache.get("d") is None
+    assert cache.stats()["entries"] == 3
+
+def test_oversized_results_are_not_kept_in_memory():
+    """A result larger than the whole budget is skipped instead of emptying the cache"""
+    cache = ResultCache(max_bytes=2 * entry_size(receipt("a")))
+    cache.put("a", receipt("a"))
+    cache.put("huge", receipt("huge", size=10000))
+    assert cache.get("huge") is None
+    assert cache.get("a").vendor == "a"
+
+def test_evicted_results_come_back_from_disk():
+    """With a database, entries evicted from memory are still found and counted as disk hits"""
+    db_path = os.path.join(tempfile.mkdtemp(), 'results.db')
+    cache = ResultCache(max_bytes=entry_size(receipt("a")), db_path=db_path)
+    key_a, key_b = cache_key(b"image a", "v1"), cache_key(b"image b", "v1")
+    cache.put(key_a, receipt("a"))
+    cache.put(key_b, receipt("b"))
+    assert cache.get(key_a).vendor == "a"
+    assert cache.stats()["disk_hits"] == 1
+    assert cache.get(cache_key(b"image a", "v2")) is None
+    cache.close()
+
+    reopened = ResultCache(max_bytes=1000, db_path=db_path)
+    assert reopened.get(key_b).vendor == "b"
+    reopened.close()
+
+if __name__ == "__main__":
+    test_evicts_to_the_byte_budget()
+    test_lookups_refresh_lru_order()
+    test_oversized_results_are_not_kept_in_memory()
+    test_evicted_results_come_back_from_disk()
+    print("✅ Result cache tests passed")
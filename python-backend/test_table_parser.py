@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Test reading item tables from word boxes and re-reading suspicious rows
+"""
+import io
+import random
+import sys
+from contextlib import redirect_stdout
+from typing import List
+sys.path.append('app')
+
+import numpy as np
+from app.processors.dmart_processor import DMartProcessor
+from app.processors.receipt_document import ReceiptDocument
+from app.processors.table_parser import TableRow, Word, group_rows
+from app.services.row_repair import RowRepairer
+
+# Column positions of a DMart bill: HSN, Particulars, Qty, N/Rate, Value
+HEADER = [("HSN", 20), ("Particulars", 120), ("Qty", 500), ("N/Rate", 600), ("Value", 720)]
+ITEMS = [
+    [("040510", 20), ("AMUL", 120), ("BUTTER-100g", 190), ("1", 510), ("56.00", 610), ("56.00", 730)],
+    # Misread rate: 2 x 45.00 is not 80.00
+    [("190230", 20), ("MAGGI", 120), ("SPICY", 190), ("GA-240g", 260), ("2", 510), ("45.00", 610), ("80.00", 730)],
+    [("170410", 20), ("TATA", 120), ("TEA", 180), ("PREMIUM", 230), ("1", 510), ("120.00", 610), ("120.00", 730)],
+]
+FOOTER = [("Items:", 20), ("3", 100), ("Total", 400), ("256.00", 730)]
+
+def word_data(lines: List[list], line_height: int = 40) -> dict:
+    """image_to_data style word boxes for lines of (text, left), one line every line_height pixels"""
+    data = {key: [] for key in ('level', 'block_num', 'par_num', 'line_num', 'left', 'top',
+                                'width', 'height', 'conf', 'text')}
+    for number, line in enumerate(lines):
+        for text, left in line:
+            values = (5, 1, 1, number + 1, left, 20 + number * line_height,
+                      len(text) * 10, 24, 95.0, text)
+            for key, value in zip(data, values):
+                data[key].append(value)
+    return data
+
+def pairwise_group_rows(words: List[Word]) -> List[List[Word]]:
+    """Reference grouping that compares every word with every open row"""
+    rows: List[List[Word]] = []
+    for word in sorted(words, key=lambda w: w.left):
+        best, best_overlap = None, 0.0
+        for row in rows:
+            last = row[-1]
+            if last.left >= word.left:
+                continue
+            overlap = min(last.top + last.height, word.top + word.height) - max(last.top, word.top)
+            if overlap > 0.5 * min(last.height, word.height) and overlap > best_overlap:
+                best, best_overlap = row, overlap
+        if best is None:
+            rows.append([word])
+        else:
+            best.append(word)
+    rows.sort(key=lambda row: sum(w.centre_y for w in row) / len(row))
+    return rows
+
+def texts(rows: List[List[Word]]) -> List[List[str]]:
+    return [[word.text for word in row] for row in rows]
+
+def test_group_rows_keeps_skewed_lines_together():
+    """A tilted line drifts more than half a word height across the page but stays one row"""
+    words = [Word(text, left, int(20 + line * 40 + 0.02 * left), len(text) * 10, 24)
+             for line, items in enumerate([HEADER] + ITEMS) for text, left in items]
+    rows = group_rows(words)
+    assert texts(rows) == [[text for text, _ in line] for line in [HEADER] + ITEMS]
+
+def test_group_rows_matches_pairwise_grouping():
+    """Banding the open rows gives exactly the rows of comparing against all of them"""
+    rng = random.Random(3)
+    for _ in range(500):
+        words = [Word(str(i), rng.randint(0, 300), rng.randint(-20, 300), rng.randint(1, 40),
+                      rng.choice([0, 5, 10, 20, 30]))
+                 for i in range(rng.randint(0, 60))]
+        assert texts(group_rows(list(words))) == texts(pairwise_group_rows(list(words)))
+
+def test_table_parser_reads_columns():
+    """Rows are keyed by HSN code, names come from their column and prices from theirs"""
+    continued = [[("040510", 20), ("NANDINI", 120)], [("SALTED-100g", 120), ("1", 510), ("56.00", 610), ("56.00", 730)]]
+    rows = DMartProcessor.table_parser.parse(word_data([HEADER] + continued + ITEMS[2:] + [FOOTER]))
+    assert [row.key for row in rows] == ["040510", "170410"]
+    assert rows[0].text('name') == "NANDINI SALTED-100g"
+    assert (rows[0].number('qty'), rows[0].number('rate'), rows[0].number('value')) == (1.0, 56.0, 56.0)
+    assert rows[1].number('value') == 120.0
+
+def test_row_numbers_with_thousands_separators():
+    """Grouping commas are dropped; a comma is a decimal point only before exactly two closing digits"""
+    def number(text):
+        return TableRow(cells={'value': [Word(word, 0, 0, 10, 24) for word in text.split()]}).number('value')
+    assert number("1,299.00") == number("1299.00") == 1299.0
+    assert number("2,150") == 2150.0
+    assert number("2,50,000.50") == 250000.5
+    assert number("99,00") == 99.0
+    assert number("147 .00") == 147.0
+    assert number("-") is None
+
+    expensive = [("850410", 20), ("PHILIPS", 120), ("IRON", 210), ("1", 510), ("1,299.00", 610), ("1,299.00", 730)]
+    rows = DMartProcessor.table_parser.parse(word_data([HEADER, expensive, FOOTER]))
+    assert [row.key for row in rows] == ["850410"]
+    assert (rows[0].number('rate'), rows[0].number('value')) == (1299.0, 1299.0)
+
+def test_row_repair_rereads_suspicious_rows_of_categorized_items():
+    """Parsed items carry categories and table rows do not; repair must still run"""
+    processor = DMartProcessor()
+    words = word_data([HEADER] + ITEMS + [FOOTER])
+    document = ReceiptDocument("D-Mart Avenue Supermarts\nTotal 256.00", words)
+    with redirect_stdout(io.StringIO()):
+        parsed = processor.process_receipt(document)
+    assert [item.category for item in parsed.items] == ["Dairy", "Snacks", "Beverages"]
+    assert processor.is_suspicious_item(parsed.items[1])
+
+    spans = []
+    def read_lines(page, row_spans, scale, timer=None):
+        spans.extend(row_spans)
+        return ["190230 MAGGI SPICY GA-240g 2 40.00 80.00"]
+
+    repairer = RowRepairer(read_lines, max_rows=8, scale=2.0)
+    with redirect_stdout(io.StringIO()):
+        line_calls, fixed = repairer.repair(processor, parsed, words, np.zeros((400, 900), dtype=np.uint8))
+    assert (line_calls, fixed) == (1, 1)
+    assert spans == [(100, 124)]
+    repaired = parsed.items[1]
+    assert (repaired.quantity, repaired.unit_price, repaired.total_price) == (2.0, 40.0, 80.0)
+    assert [item.category for item in parsed.items] == ["Dairy", "Snacks", "Beverages"]
+    assert processor.items_reconcile(parsed, document=document)
+
+if __name__ == "__main__":
+    test_group_rows_keeps_skewed_lines_together()
+    test_group_rows_matches_pairwise_grouping()
+    test_table_parser_reads_columns()
+    test_row_numbers_with_thousands_separators()
+    test_row_repair_rereads_suspicious_rows_of_categorized_items()
+    print("✅ Table parser tests passed")
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Test literal extraction from store-name patterns and the vendor index built on it
+"""
+import random
+import re
+import sys
+from types import SimpleNamespace
+sys.path.append('app')
+
+from app.processors.vendor_index import VendorIndex, required_literals
+
+def test_literals_around_quantifiers():
+    """A quantified character is optional unless the quantifier is +"""
+    assert required_literals(r'avenue\s*supermarts') == ["avenue", "supermarts"]
+    assert required_literals(r'kpn\s*farm\s*fresh') == ["kpn", "farm", "fresh"]
+    assert required_literals(r'freshh?mart') == ["fresh", "mart"]
+    assert required_literals(r'freshs*mart') == ["fresh", "mart"]
+    assert required_literals(r'fresh+mart') == ["fresh", "mart"]
+    assert required_literals(r'fresh{1,2}mart') == ["fres", "mart"]
+    assert required_literals(r'fresh.mart$') == ["fresh", "mart"]
+    assert required_literals(r'^fresh+?mart') == ["fresh", "mart"]
+
+def test_literals_around_classes_and_escapes():
+    """Classes and escapes end a run, including classes holding ']' or escapes"""
+    assert required_literals(r'd[-\s]*mart') == ["mart"]
+    assert required_literals(r'super[ -]mart') == ["super", "mart"]
+    assert required_literals(r'super[]a]mart') == ["super", "mart"]
+    assert required_literals(r'super[^]a]mart') == ["super", "mart"]
+    assert required_literals(r'super[\]a]mart') == ["super", "mart"]
+    assert required_literals(r'super\.mart\d+') == ["super", "mart"]
+    assert required_literals(r'ab\scd') == []
+
+def test_literals_fallback():
+    """Groups and alternation are not analysed"""
+    assert required_literals(r'(super)?mart') == []
+    assert required_literals(r'dmart|d mart') == []
+    assert required_literals(r'(?i)dmart') == []
+
+def test_literals_occur_in_every_match():
+    """Each literal of a random pattern is part of everything the pattern matches"""
+    rng = random.Random(5)
+    pieces = ["abb", "bab", "a", "b", "a?", "b*", "a+", "b{2}", "a{0,2}", "[ab]", "[^a]", "[]a]",
+              r"[\]b]", r"\s", r"\.", ".", " "]
+    checked = 0
+    for _ in range(3000):
+        pattern = "".join(rng.choice(pieces) for _ in range(rng.randint(1, 6)))
+        literals = required_literals(pattern)
+        text = "".join(rng.choice("abab] .") for _ in range(40))
+        for match in re.finditer(pattern, text):
+            assert all(literal in match.group() for literal in literals), (pattern, match.group())
+            checked += 1
+    assert checked > 1000
+
+def test_index_scores_like_plain_regexes():
+    """Filtering by literals never changes which vendors match or their scores"""
+    processors = [
+        SimpleNamespace(name="DMart", patterns=[r'd[-\s]*mart', r'avenue\s*supermarts']),
+        SimpleNamespace(name="KPN", patterns=[r'kpn\s*farm\s*fresh', r'kpn\s*fresh']),
+        SimpleNamespace(name="More", patterns=[r'(more)\s*retail']),
+        SimpleNamespace(name="Empty", patterns=[]),
+    ]
+    index = VendorIndex(processors)
+    texts = ["avenue supermarts ltd d-mart", "kpn farm fresh", "kpnfresh kpn  fresh", "more retail",
+             "fresh farm", "nothing here", "avenuesupermarts kpn fresh"]
+    for text in texts:
+        expected = {}
+        for processor in processors:
+            count = sum(1 for _ in re.finditer('|'.join(processor.patterns), text)) if processor.patterns else 0
+            if count:
+                expected[processor.name] = count
+        assert index.scores(text) == expected, text
+    assert index.best("avenue supermarts kpn fresh d mart").name == "DMart"
+    assert index.best("avenue supermarts kpn fresh").name == "DMart"
+    assert index.best("nothing here") is None
+
+if __name__ == "__main__":
+    test_literals_around_quantifiers()
+    test_literals_around_classes_and_escapes()
+    test_literals_fallback()
+    test_literals_occur_in_every_match()
+    test_index_scores_like_plain_regexes()
+    print("✅ Vendor index tests passed")
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Test that the worker pool recovers when a worker process dies
+"""
+import asyncio
+import os
+import sys
+sys.path.append('app')
+
+from concurrent.futures.process import BrokenProcessPool
+from app.services.worker_pool import WorkerPool
+
+def test_dead_worker_fails_only_its_request():
+    """A worker killed mid-task fails that task; the pool is rebuilt and later tasks run"""
+    async def run():
+        pool = WorkerPool(max_workers=1, max_queue=1)
+        pool.start()
+        try:
+            broken = pool._executor
+            try:
+                await pool.submit(os._exit, 1)
+                assert False, "the task of a dead worker should fail"
+            except BrokenProcessPool:
+                pass
+            assert pool._executor is not broken
+            assert await pool.submit(abs, -3) == 3
+            assert pool.in_flight == 0
+        finally:
+            pool.shutdown()
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    test_dead_worker_fails_only_its_request()
+    print("✅ Worker pool tests passed")